@@ -1,14 +1,19 @@
 from fastapi import APIRouter, Request, Depends, HTTPException, status
 from fastapi.responses import RedirectResponse, JSONResponse
 from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from typing import Optional
 from app.services.auth import (
-    get_authorization_url,
-    authenticate_with_code,
-    get_logout_url
+    auth_backend,
+    set_session_cookie,
+    RedirectLoginMixin,
+    SESSION_COOKIE
 )
-from app.dependencies import get_current_user, require_auth
+from app.dependencies import get_current_user, require_auth, sync_user
 from app.database import get_db
-from app.models.user import User
+from app.log import get_logger
+
+logger = get_logger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -21,8 +26,14 @@ async def login(state: str = None):
     This endpoint initiates the authentication flow by redirecting
     the user to WorkOS's hosted authentication page.
     """
-    authorization_url = get_authorization_url(state=state)
-    print(f"Redirecting to: {authorization_url}")
+    if not isinstance(auth_backend, RedirectLoginMixin):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Redirect login is disabled with AUTH_BACKEND=local; use POST /auth/local/session"
+        )
+    
+    authorization_url = auth_backend.get_authorization_url(state=state)
+    logger.debug("Redirecting to WorkOS", extra={"url": authorization_url})
     return RedirectResponse(url=authorization_url)
 
 
@@ -41,6 +52,12 @@ async def callback(
     3. Sets the encrypted session cookie
     4. Redirects to the frontend dashboard
     """
+    if not isinstance(auth_backend, RedirectLoginMixin):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Redirect login is disabled with AUTH_BACKEND=local; use POST /auth/local/session"
+        )
+    
     if not code:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -49,32 +66,12 @@ async def callback(
     
     try:
         # Exchange code for user session
-        auth_data = await authenticate_with_code(code)
+        auth_data = await auth_backend.authenticate_with_code(code)
         user_data = auth_data["user"]
         sealed_session = auth_data["sealed_session"]
         
-        # Create or update user in database
-        user = db.query(User).filter(User.id == user_data.id).first()
-        
-        if user:
-            # Update existing user
-            user.email = user_data.email
-            user.first_name = user_data.first_name
-            user.last_name = user_data.last_name
-            user.profile_picture_url = user_data.profile_picture_url
-            user.email_verified = str(user_data.email_verified)
-        else:
-            # Create new user
-            user = User(
-                id=user_data.id,
-                email=user_data.email,
-                first_name=user_data.first_name,
-                last_name=user_data.last_name,
-                profile_picture_url=user_data.profile_picture_url,
-                email_verified=str(user_data.email_verified)
-            )
-            db.add(user)
-        
+        # Create or update user in database (single upsert)
+        sync_user(db, user_data)
         db.commit()
         
         # Create response with redirect to frontend
@@ -84,19 +81,12 @@ async def callback(
         )
         
         # Set secure session cookie
-        response.set_cookie(
-            key="wos-session",
-            value=sealed_session,
-            httponly=True,
-            secure=False,  # Set to False for localhost development
-            samesite="lax",
-            max_age=3600 * 24 * 7  # 7 days
-        )
+        set_session_cookie(response, sealed_session)
         
         return response
         
     except Exception as e:
-        print(f"Error in callback: {e}")
+        logger.exception("Error in callback")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Authentication failed: {str(e)}"
@@ -113,7 +103,7 @@ async def logout(request: Request):
     2. Clears the session cookie
     3. Redirects to WorkOS logout page (which then redirects to your configured logout redirect)
     """
-    session_cookie = request.cookies.get("wos-session")
+    session_cookie = request.cookies.get(SESSION_COOKIE)
     
     # Create response redirecting to home page
     response = RedirectResponse(
@@ -122,19 +112,19 @@ async def logout(request: Request):
     )
     
     # Clear the session cookie
-    response.delete_cookie(key="wos-session")
+    response.delete_cookie(key=SESSION_COOKIE)
     
     if session_cookie:
         try:
             # Get WorkOS logout URL
-            logout_url = get_logout_url(session_cookie)
+            logout_url = await auth_backend.get_logout_url(session_cookie)
             response = RedirectResponse(
                 url=logout_url,
                 status_code=status.HTTP_302_FOUND
             )
-            response.delete_cookie(key="wos-session")
+            response.delete_cookie(key=SESSION_COOKIE)
         except Exception as e:
-            print(f"Error getting logout URL: {e}")
+            logger.warning("Error getting logout URL", extra={"error": str(e)})
     
     return response
 
@@ -161,3 +151,29 @@ async def auth_status(user: dict = Depends(get_current_user)):
         "authenticated": user is not None,
         "user": user
     })
+
+
+class LocalSessionCreate(BaseModel):
+    id: str
+    email: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+
+
+if auth_backend.name == "local":
+    @router.post("/local/session")
+    async def create_local_session(body: LocalSessionCreate, db: Session = Depends(get_db)):
+        """
+        Log in as any user with a locally signed session (AUTH_BACKEND=local only).
+        
+        Creates or updates the local user and sets the session cookie; the
+        cookie value is also returned for load-testing tools.
+        """
+        user = body.model_dump()
+        session = auth_backend.issue_session(user)
+        sync_user(db, auth_backend.user_from_claims(user))
+        db.commit()
+        
+        response = JSONResponse(content={"user": user, "session": session})
+        set_session_cookie(response, session)
+        return response
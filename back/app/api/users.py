@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import func
+from app.database import get_db, get_read_db, upsert_insert
 from app.models.user import User
 from app.models.profile import UserProfile
 from app.schemas.profile import UserProfileCreate, UserProfileResponse
@@ -14,26 +15,26 @@ def create_or_update_profile(
     current_user: User = Depends(require_auth),
     db: Session = Depends(get_db)
 ):
-    # Check if profile exists
-    profile = db.query(UserProfile).filter(UserProfile.user_id == current_user["id"]).first()
-    
-    if profile:
-        # Update existing profile
-        for key, value in profile_data.dict(exclude_unset=True).items():
-            setattr(profile, key, value)
-    else:
-        # Create new profile
-        profile = UserProfile(**profile_data.dict(), user_id=current_user["id"])
-        db.add(profile)
+    # Single upsert: new profiles get every field, existing ones only the fields sent
+    stmt = upsert_insert(db)(UserProfile).values(**profile_data.dict(), user_id=current_user["id"])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserProfile.user_id],
+        set_={
+            **{key: stmt.excluded[key] for key in profile_data.dict(exclude_unset=True)},
+            "updated_at": func.now(),
+        },
+    ).returning(UserProfile)
+    profile = db.scalars(stmt).one()
     
+    # Serialize before commit expires the returned row
+    response = UserProfileResponse.model_validate(profile)
     db.commit()
-    db.refresh(profile)
-    return profile
+    return response
 
 @router.get("/me/profile", response_model=UserProfileResponse)
 def get_profile(
     current_user: User = Depends(require_auth),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     profile = db.query(UserProfile).filter(UserProfile.user_id == current_user["id"]).first()
     if not profile:
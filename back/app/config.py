@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -10,9 +11,110 @@ class Settings(BaseSettings):
     workos_client_id: str = Field(..., alias="WORKOS_CLIENT_ID")
     workos_redirect_uri: str = Field(..., alias="WORKOS_REDIRECT_URI")
     workos_cookie_password: str = Field(..., alias="WORKOS_COOKIE_PASSWORD")
+    # Override to point at a local stand-in server (defaults to https://api.workos.com/)
+    workos_base_url: Optional[str] = Field(default=None, alias="WORKOS_BASE_URL")
+    workos_request_timeout: int = Field(default=10, alias="WORKOS_REQUEST_TIMEOUT")  # Seconds
+    workos_max_connections: int = Field(default=20, alias="WORKOS_MAX_CONNECTIONS")
+    workos_max_keepalive_connections: int = Field(default=10, alias="WORKOS_MAX_KEEPALIVE_CONNECTIONS")
+    workos_keepalive_expiry: float = Field(default=30.0, alias="WORKOS_KEEPALIVE_EXPIRY")
+    # How long a refreshed session is reused for requests still sending the old cookie
+    workos_refresh_reuse_seconds: int = Field(default=30, alias="WORKOS_REFRESH_REUSE_SECONDS")
+    # Local access-token verification
+    workos_jwks_refresh_seconds: int = Field(default=3600, alias="WORKOS_JWKS_REFRESH_SECONDS")
+    workos_jwks_min_refresh_seconds: int = Field(default=30, alias="WORKOS_JWKS_MIN_REFRESH_SECONDS")
+    workos_jwt_leeway: float = Field(default=0, alias="WORKOS_JWT_LEEWAY")  # Clock skew, seconds
+    
+    # Auth backend: "workos" (default) or "local" (HMAC-signed sessions for
+    # benchmarks and staging, no external provider; never in production)
+    auth_backend: str = Field(default="workos", alias="AUTH_BACKEND")
+    local_auth_secret: Optional[str] = Field(default=None, alias="LOCAL_AUTH_SECRET")  # Required with AUTH_BACKEND=local
+    local_session_ttl_seconds: int = Field(default=3600 * 24 * 7, alias="LOCAL_SESSION_TTL_SECONDS")
     
     # Database Configuration
     database_url: str = Field(..., alias="DATABASE_URL")
+    # Optional read replica for marketplace GET endpoints (falls back to DATABASE_URL)
+    database_read_url: Optional[str] = Field(default=None, alias="DATABASE_READ_URL")
+    # After a write, the same client reads from the primary for this many seconds
+    read_your_writes_seconds: int = Field(default=5, alias="READ_YOUR_WRITES_SECONDS")
+    # Concurrent GET /loans/{id} and GET /pools/{id} for the same id share one fetch
+    coalesce_reads: bool = Field(default=True, alias="COALESCE_READS")
+    
+    # Connection Pool Configuration (per engine, per worker process)
+    db_pool_size: int = Field(default=5, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(default=10.0, alias="DB_POOL_TIMEOUT")  # Seconds to wait for a free connection
+    db_pool_recycle: int = Field(default=1800, alias="DB_POOL_RECYCLE")  # Seconds before a connection is replaced
+    db_pool_pre_ping: bool = Field(default=False, alias="DB_POOL_PRE_PING")  # Extra round trip per checkout
+    db_connect_timeout: int = Field(default=10, alias="DB_CONNECT_TIMEOUT")
+    db_statement_cache_size: int = Field(default=500, alias="DB_STATEMENT_CACHE_SIZE")  # Compiled SQL cache
+    # PgBouncer (transaction mode) and similar poolers: disable server-side prepared statements
+    db_pooler_mode: bool = Field(default=False, alias="DB_POOLER_MODE")
+    db_pool_slow_checkout_ms: float = Field(default=100.0, alias="DB_POOL_SLOW_CHECKOUT_MS")
+    
+    # Query time limits for requests (applied by get_db / get_read_db; 0 disables)
+    db_statement_timeout_ms: int = Field(default=5000, alias="DB_STATEMENT_TIMEOUT_MS")  # Per statement
+    request_deadline_ms: int = Field(default=10000, alias="REQUEST_DEADLINE_MS")  # All of a request's queries
+    # Per-route overrides, keyed "METHOD /full/path" as mounted, e.g. "GET /loans/{loan_id}" (JSON in the environment)
+    db_route_statement_timeouts: Dict[str, int] = Field(
+        default={"GET /loans/": 2000, "GET /pools/": 2000}, alias="DB_ROUTE_STATEMENT_TIMEOUTS"
+    )
+    db_route_deadlines: Dict[str, int] = Field(default={}, alias="DB_ROUTE_DEADLINES")
+    
+    # Pool Formation Configuration
+    pool_target_amount: float = Field(default=10_000_000, alias="POOL_TARGET_AMOUNT")
+    pool_max_members: int = Field(default=5, alias="POOL_MAX_MEMBERS")
+    pool_min_members: int = Field(default=2, alias="POOL_MIN_MEMBERS")
+    pool_max_wait_hours: int = Field(default=24, alias="POOL_MAX_WAIT_HOURS")
+    pool_bidding_hours: int = Field(default=24, alias="POOL_BIDDING_HOURS")
+    
+    # Pool Settlement (one transaction per pool, run by a bounded thread pool)
+    settlement_workers: int = Field(default=4, ge=1, alias="SETTLEMENT_WORKERS")
+    settlement_max_attempts: int = Field(default=3, ge=1, alias="SETTLEMENT_MAX_ATTEMPTS")  # Per pool, per run
+    settlement_retry_backoff_seconds: float = Field(default=0.5, alias="SETTLEMENT_RETRY_BACKOFF_SECONDS")
+    settlement_dead_letter_after: int = Field(default=5, alias="SETTLEMENT_DEAD_LETTER_AFTER")  # Failed runs
+    
+    # How often pools are formed and expired pools settled
+    pool_check_interval_seconds: int = Field(default=60, alias="POOL_CHECK_INTERVAL_SECONDS")
+    
+    # Runtime diagnostics (GET /diagnostics)
+    diagnostics_interval_seconds: float = Field(default=10.0, alias="DIAGNOSTICS_INTERVAL_SECONDS")  # DB probes
+    # Bearer token for monitoring probes; admins (ADMIN_EMAILS) can always read it
+    diagnostics_token: Optional[str] = Field(default=None, alias="DIAGNOSTICS_TOKEN")
+    loop_lag_warn_ms: float = Field(default=100.0, alias="LOOP_LAG_WARN_MS")  # Event loop blocked longer = logged
+    
+    # Persistent job queue (jobs table); each API process runs a worker unless disabled
+    job_worker_enabled: bool = Field(default=True, alias="JOB_WORKER_ENABLED")
+    job_worker_concurrency: int = Field(default=4, alias="JOB_WORKER_CONCURRENCY")  # Jobs at once per worker
+    job_poll_seconds: float = Field(default=2.0, alias="JOB_POLL_SECONDS")
+    job_max_attempts: int = Field(default=5, alias="JOB_MAX_ATTEMPTS")
+    job_retry_backoff_seconds: float = Field(default=30.0, alias="JOB_RETRY_BACKOFF_SECONDS")  # Doubles per attempt
+    job_lease_seconds: int = Field(default=120, ge=3, alias="JOB_LEASE_SECONDS")  # Not renewed for this long = worker died
+    job_retention_days: int = Field(default=7, alias="JOB_RETENTION_DAYS")
+    
+    # Repayment ledger: how often to open new accounts and accrue completed days
+    ledger_interval_minutes: int = Field(default=10, alias="LEDGER_INTERVAL_MINUTES")
+    
+    # Archival of settled auctions (moved to the *_archive tables)
+    archive_after_days: int = Field(default=90, alias="ARCHIVE_AFTER_DAYS")
+    archive_batch_size: int = Field(default=1000, alias="ARCHIVE_BATCH_SIZE")
+    archive_interval_minutes: int = Field(default=60, alias="ARCHIVE_INTERVAL_MINUTES")  # 0 disables
+    
+    # Bid Rate Limiting (token buckets; rate in bids/second, burst = bucket size)
+    rate_limit_backend: str = Field(default="memory", alias="RATE_LIMIT_BACKEND")  # memory | redis
+    rate_limit_redis_url: Optional[str] = Field(default=None, alias="RATE_LIMIT_REDIS_URL")
+    bid_rate_per_lender: float = Field(default=1.0, alias="BID_RATE_PER_LENDER")
+    bid_burst_per_lender: int = Field(default=5, alias="BID_BURST_PER_LENDER")
+    bid_rate_per_auction: float = Field(default=10.0, alias="BID_RATE_PER_AUCTION")
+    bid_burst_per_auction: int = Field(default=30, alias="BID_BURST_PER_AUCTION")
+    
+    # Roles, by verified email (JSON lists in the environment); full exports need one of them
+    admin_emails: List[str] = Field(default=[], alias="ADMIN_EMAILS")
+    institutional_lender_emails: List[str] = Field(default=[], alias="INSTITUTIONAL_LENDER_EMAILS")
+    
+    # Logging (app.log): json for production, text for local development
+    log_level: str = Field(default="INFO", alias="LOG_LEVEL")
+    log_format: str = Field(default="json", alias="LOG_FORMAT")  # json | text
+    log_queue_size: int = Field(default=10_000, alias="LOG_QUEUE_SIZE")  # Records beyond this are dropped
     
     # Application Configuration
     api_host: str = Field(default="0.0.0.0", alias="API_HOST")
@@ -1,30 +1,469 @@
-from sqlalchemy import create_engine
+import asyncio
+import sqlite3
+import threading
+import time
+from typing import Optional
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 from app.config import settings
+from app.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class PoolWaitStats:
+    """Thread-safe counters for time spent waiting on a pool checkout."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+            self.slow_checkouts = 0
+            self.timeouts = 0
+
+    def record(self, wait: float, timed_out: bool = False):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            if wait * 1000 >= settings.db_pool_slow_checkout_ms:
+                self.slow_checkouts += 1
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "avg_wait_ms": (self.total_wait / self.checkouts * 1000) if self.checkouts else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+                "slow_checkouts": self.slow_checkouts,
+                "timeouts": self.timeouts,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    wait_stats: PoolWaitStats = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        wait = time.perf_counter() - start
+        self.wait_stats.record(wait)
+        if wait * 1000 >= settings.db_pool_slow_checkout_ms:
+            # Under saturation every checkout is slow: sampled
+            logger.warning("Slow DB pool checkout", extra={
+                "wait_ms": round(wait * 1000), "pool": self.status(), "sample_rate": 0.1,
+            })
+        return connection
+
+
+# Databases with INSERT ... ON CONFLICT (see upsert_insert)
+SUPPORTED_BACKENDS = ("postgresql", "sqlite")
+
+
+def _create_engine(url: str):
+    """
+    Create an engine with the pool configured from settings.
+
+    Each engine gets its own InstrumentedQueuePool subclass so wait stats
+    are tracked per engine (primary vs. replica).
+
+    Raises:
+        ValueError: The database isn't one of SUPPORTED_BACKENDS
+    """
+    backend = make_url(url).get_backend_name()
+    if backend not in SUPPORTED_BACKENDS:
+        raise ValueError(f"Unsupported database {backend!r}: use PostgreSQL (or SQLite for tests)")
+
+    connect_args = {}
+    if backend == "postgresql":
+        connect_args["connect_timeout"] = settings.db_connect_timeout
+        if settings.db_pooler_mode:
+            # psycopg: never switch to server-side prepared statements
+            connect_args["prepare_threshold"] = None
+
+    pool_class = type("InstrumentedQueuePool", (InstrumentedQueuePool,), {"wait_stats": PoolWaitStats()})
+
+    new_engine = create_engine(
+        url,
+        poolclass=pool_class,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        query_cache_size=settings.db_statement_cache_size,
+        connect_args=connect_args,
+        echo=False
+    )
+    event.listen(new_engine, "before_cursor_execute", _check_query_guard)
+    event.listen(new_engine, "handle_error", _translate_cancellation)
+    event.listen(new_engine, "checkin", _release_query_guard)
+    return new_engine
+
+
+class QueryCancelled(Exception):
+    """A request's query was cancelled: out of time, or the client went away."""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Query cancelled: {reason}")
+        self.reason = reason  # statement_timeout | deadline | disconnected
+
+
+class QueryGuard:
+    """
+    Time limits for one request's database work (see get_db).
+
+    Each statement may run for `statement_timeout_ms`, and none may start
+    after the request's deadline; a statement's timeout is also capped by
+    what's left of the deadline. Postgres enforces the timeout itself
+    (SET LOCAL statement_timeout); on SQLite a progress handler checks the
+    clock. `cancel()` aborts the statement in flight from any thread.
+    """
+
+    def __init__(self, statement_timeout_ms: int, deadline_ms: int, started: Optional[float] = None):
+        started = started or time.monotonic()
+        self.statement_timeout = statement_timeout_ms / 1000 if statement_timeout_ms > 0 else None
+        self.deadline = started + deadline_ms / 1000 if deadline_ms > 0 else None
+        self.reason = None  # Set once a query has been cancelled
+        self._statement_started = None
+        self._lock = threading.Lock()
+        self._connections = []  # DBAPI connections this request is using
+
+    def remaining(self) -> Optional[float]:
+        return self.deadline - time.monotonic() if self.deadline is not None else None
+
+    def statement_budget(self) -> Optional[float]:
+        limits = [limit for limit in (self.statement_timeout, self.remaining()) if limit is not None]
+        return min(limits) if limits else None
+
+    def check(self):
+        """Called before every statement: refuse to start once cancelled or out of time."""
+        remaining = self.remaining()
+        if self.reason is None and remaining is not None and remaining <= 0:
+            self.reason = "deadline"
+        if self.reason:
+            raise QueryCancelled(self.reason)
+        self._statement_started = time.monotonic()
+
+    def _sqlite_progress(self) -> int:
+        # Called by SQLite every few thousand VM steps; non-zero interrupts the statement
+        if self.reason:
+            return 1
+        now = time.monotonic()
+        if self.deadline is not None and now > self.deadline:
+            self.reason = "deadline"
+        elif self.statement_timeout and self._statement_started and now - self._statement_started > self.statement_timeout:
+            self.reason = "statement_timeout"
+        return 1 if self.reason else 0
+
+    def attach(self, connection):
+        """Apply the limits to a connection at the start of each transaction."""
+        connection.info["query_guard"] = self
+        dbapi_connection = connection.connection.dbapi_connection
+        if connection.dialect.name == "postgresql":
+            budget = self.statement_budget()
+            if budget is not None:
+                connection.exec_driver_sql(f"SET LOCAL statement_timeout = {max(int(budget * 1000), 1)}")
+        elif connection.dialect.name == "sqlite":
+            dbapi_connection.set_progress_handler(self._sqlite_progress, 1000)
+        with self._lock:
+            self._connections.append(dbapi_connection)
+
+    def detach(self, dbapi_connection):
+        with self._lock:
+            if dbapi_connection in self._connections:
+                self._connections.remove(dbapi_connection)
+
+    def cancel(self, reason: str = "disconnected"):
+        """Abort the statement in flight, if any, and every later one (thread-safe)."""
+        self.reason = self.reason or reason
+        with self._lock:
+            connections = list(self._connections)
+        for dbapi_connection in connections:
+            try:
+                if isinstance(dbapi_connection, sqlite3.Connection):
+                    dbapi_connection.interrupt()
+                else:
+                    dbapi_connection.cancel()  # psycopg: sends a cancel request to the server
+            except Exception:
+                logger.warning("Could not cancel query", exc_info=True)
+
+
+@event.listens_for(Session, "after_begin")
+def _attach_query_guard(session, transaction, connection):
+    guard = session.info.get("query_guard")
+    if guard is not None:
+        guard.attach(connection)
+
+
+def _check_query_guard(conn, cursor, statement, parameters, context, executemany):
+    guard = conn.info.get("query_guard")
+    if guard is not None:
+        guard.check()
+
+
+def _translate_cancellation(context):
+    """Raise QueryCancelled instead of the driver's error when a guard stopped the query."""
+    guard = context.connection.info.get("query_guard") if context.connection is not None else None
+    if guard is None:
+        return None
+    error = context.original_exception
+    if getattr(error, "sqlstate", None) == "57014" or (
+        isinstance(error, sqlite3.OperationalError) and "interrupted" in str(error)
+    ):
+        # Postgres reports timeouts and cancel requests alike (57014 query_canceled)
+        remaining = guard.remaining()
+        return QueryCancelled(guard.reason or ("deadline" if remaining is not None and remaining <= 0 else "statement_timeout"))
+    return None
+
+
+def _release_query_guard(dbapi_connection, connection_record):
+    guard = connection_record.info.pop("query_guard", None)
+    if guard is not None:
+        guard.detach(dbapi_connection)
+        if isinstance(dbapi_connection, sqlite3.Connection):
+            dbapi_connection.set_progress_handler(None, 0)
+
 
 # Create SQLAlchemy engine
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    echo=False
-)
+engine = _create_engine(settings.database_url)
+
+# Optional read-only engine for a replica; without one, reads use the primary
+if settings.database_read_url:
+    read_engine = _create_engine(settings.database_read_url)
+else:
+    read_engine = engine
+
+
+def pool_status(target_engine=None) -> dict:
+    """
+    Return utilization and checkout-wait stats for an engine's pool.
+    
+    Args:
+        target_engine: Engine to inspect (defaults to the primary)
+        
+    Returns:
+        Dictionary with pool size, connections in use, overflow and wait stats
+    """
+    pool = (target_engine or engine).pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings.db_max_overflow,
+        "wait": pool.wait_stats.snapshot(),
+    }
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# Cookie holding the unix time of the client's last successful write (set in app.main)
+LAST_WRITE_COOKIE = "last-write"
 
 # Create Base class for models
 Base = declarative_base()
 
 
-def get_db():
+def upsert_insert(db):
+    """
+    Return the dialect's `insert` construct, which supports ON CONFLICT.
+    Engines are only created for these dialects (see _create_engine).
+    
+    Args:
+        db: Session (or connection) whose bind decides the dialect
+        
+    Returns:
+        sqlalchemy.dialects.postgresql.insert or sqlalchemy.dialects.sqlite.insert
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {dialect}")
+    return insert
+
+
+def route_key(request: Request) -> Optional[str]:
+    """
+    "METHOD /path" of the matched route, with the full path template as
+    mounted in the app (e.g. "GET /loans/{loan_id}", not the "/{loan_id}"
+    declared on the loans router). None before routing.
+    """
+    route = request.scope.get("route")
+    if route is None:
+        return None
+    path = request.scope["path"]
+    root_path = request.scope.get("root_path", "")
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    # The route matched the tail of the path; what precedes it is the prefix it was included under
+    start = 0
+    while start != -1:
+        if route.path_regex.match(path[start:]):
+            return f"{request.method} {path[:start]}{route.path_format}"
+        start = path.find("/", start + 1)
+    return f"{request.method} {route.path_format}"
+
+
+def guard_session(request: Request, db: Session) -> QueryGuard:
+    """
+    Put the route's statement timeout and request deadline on a session.
+
+    Limits come from `db_route_statement_timeouts` / `db_route_deadlines`
+    (keyed by route_key, e.g. "GET /loans/"), falling back to
+    `db_statement_timeout_ms` / `request_deadline_ms`. The deadline counts
+    from when the request arrived (see QueryCancelMiddleware).
+    """
+    key = route_key(request)
+    guard = QueryGuard(
+        settings.db_route_statement_timeouts.get(key, settings.db_statement_timeout_ms),
+        settings.db_route_deadlines.get(key, settings.request_deadline_ms),
+        started=getattr(request.state, "started_at", None),
+    )
+    db.info["query_guard"] = guard
+    guards = getattr(request.state, "query_guards", None)
+    if guards is not None:
+        guards.append(guard)
+    return guard
+
+
+class QueryCancelMiddleware:
+    """
+    ASGI middleware: cancel a request's queries when its client disconnects.
+
+    Listens for the disconnect on requests without a body (the marketplace
+    GETs); requests with a body are passed through untouched. Only queries
+    run from a thread (sync `def` routes and dependencies) can be cancelled
+    mid-flight: a query run directly in an `async def` route blocks the loop,
+    so the disconnect is only seen once it returns.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        state = scope.setdefault("state", {})
+        state["started_at"] = time.monotonic()
+        guards = state["query_guards"] = []
+        headers = dict(scope["headers"])
+        if headers.get(b"content-length", b"0") != b"0" or b"transfer-encoding" in headers:
+            return await self.app(scope, receive, send)
+
+        messages = asyncio.Queue()
+
+        async def watch():
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    for guard in guards:
+                        await asyncio.to_thread(guard.cancel, "disconnected")
+                    return
+
+        watcher = asyncio.create_task(watch())
+        try:
+            await self.app(scope, messages.get, send)
+        finally:
+            watcher.cancel()
+
+
+@event.listens_for(Session, "after_flush")
+def _note_flushed_write(session, flush_context):
+    session.info["pending_write"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_statement_write(orm_execute_state):
+    # Core INSERT/UPDATE/DELETE run through the session (upserts, bulk updates)
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["pending_write"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _record_committed_write(session):
+    if session.info.pop("pending_write", False):
+        request_state = session.info.get("request_state")
+        if request_state is not None:
+            request_state.committed_write = True
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_write(session):
+    session.info.pop("pending_write", None)
+
+
+def get_db(request: Request):
     """
     Dependency function to get database session.
     
+    The session carries the route's query time limits (see guard_session),
+    and flags `request.state.committed_write` once it commits a write, so
+    app.main can send the read-your-writes cookie.
+    
     Yields:
         Database session that will be automatically closed after use.
     """
     db = SessionLocal()
+    db.info["request_state"] = request.state
+    guard_session(request, db)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def wrote_recently(request: Request) -> bool:
+    """
+    Return True if this client made a write within the read-your-writes window.
+    """
+    last_write = request.cookies.get(LAST_WRITE_COOKIE)
+    if not last_write:
+        return False
+    try:
+        return time.time() - float(last_write) < settings.read_your_writes_seconds
+    except ValueError:
+        return False
+
+
+def get_read_db(request: Request):
+    """
+    Dependency function to get a read-only database session.
+    
+    Uses the read replica unless the client wrote recently, in which case it
+    reads from the primary so it sees its own writes despite replication lag.
+    
+    Yields:
+        Database session that will be automatically closed after use.
+    """
+    if read_engine is engine or wrote_recently(request):
+        db = SessionLocal()
+    else:
+        db = ReadSessionLocal()
+    guard_session(request, db)
     try:
         yield db
     finally:
@@ -35,9 +474,11 @@ def init_db():
     """
     Initialize database by creating all tables.
     
-    This will create all tables defined in models that inherit from Base.
+    This will create all tables defined in models that inherit from Base,
+    plus the loan purpose full-text index if it's missing.
     """
     # Import all models here to ensure they are registered with Base
-    from app.models import user, profile, loan_request, loan_bid, loan_pool, pool_bid  # noqa
+    from app.models import user, profile, loan_request, loan_bid, loan_pool, pool_bid, outbox_event, market_rate_rollup, archive, settlement_failure, job_watermark, ledger_entry, loan_account, job  # noqa
     
     Base.metadata.create_all(bind=engine)
+    loan_request.ensure_search_index(engine)
@@ -1,55 +1,94 @@
+import hmac
+import math
+import time
 from fastapi import Request, HTTPException, status
-from typing import Optional
-from app.services.auth import load_sealed_session
+from typing import Dict, Optional
+from app.services.auth import auth_backend, SESSION_COOKIE
+from app.services.rate_limit import rate_limiter
+from app.config import settings
 
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, upsert_insert, QueryCancelled
 from app.models.user import User
 from fastapi import Depends
+from app.log import get_logger
+
+logger = get_logger(__name__)
+
+# User id -> time of the last committed sync, so steady-state requests skip the
+# upsert; entries expire so changes made at WorkOS still reach the local row
+_synced_users: Dict[str, float] = {}
+_SYNCED_USERS_MAX = 100_000
+_SYNCED_USERS_TTL_SECONDS = 300
+
+
+def sync_user(db: Session, user_data) -> User:
+    """
+    Create or update the local copy of a WorkOS user in one statement.
+    
+    Uses INSERT ... ON CONFLICT DO UPDATE ... RETURNING, so concurrent first
+    requests of the same user can't race into a unique-constraint error and
+    the row comes back in the same round trip.
+    
+    Args:
+        db: Database session (the caller commits)
+        user_data: WorkOS user
+        
+    Returns:
+        The stored user
+    """
+    values = {
+        "id": user_data.id,
+        "email": user_data.email,
+        "first_name": user_data.first_name,
+        "last_name": user_data.last_name,
+        "profile_picture_url": user_data.profile_picture_url,
+        "email_verified": str(user_data.email_verified),
+    }
+    stmt = upsert_insert(db)(User).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[User.id],
+        set_={**{k: stmt.excluded[k] for k in values if k != "id"}, "updated_at": func.now()},
+    ).returning(User)
+    return db.scalars(stmt).one()
+
+
+def _recently_synced(user_id: str) -> bool:
+    synced_at = _synced_users.get(user_id)
+    return synced_at is not None and time.monotonic() - synced_at < _SYNCED_USERS_TTL_SECONDS
+
+
+def _mark_synced(user_id: str):
+    """Remember a user whose sync was committed (never before the commit succeeds)."""
+    if len(_synced_users) >= _SYNCED_USERS_MAX:
+        _synced_users.clear()
+    _synced_users[user_id] = time.monotonic()
 
 async def get_current_user(request: Request, db: Session = Depends(get_db)) -> Optional[dict]:
     """
     Dependency to get the current authenticated user.
     Ensures user exists in local database.
     """
-    session_cookie = request.cookies.get("wos-session")
+    session_cookie = request.cookies.get(SESSION_COOKIE)
     
     if not session_cookie:
         return None
     
     try:
-        session = load_sealed_session(session_cookie)
-        auth_response = session.authenticate()
-        
-        user_data = None
-        
-        if auth_response.authenticated:
-            user_data = auth_response.user
-        elif auth_response.reason != "no_session_cookie_provided":
-            # Try refresh
-            try:
-                refresh_response = session.refresh()
-                if refresh_response.authenticated:
-                    user_data = refresh_response.user
-            except Exception:
-                pass
+        # Verified locally; with WorkOS only an expired token costs a (deduplicated) refresh call
+        user_data, refreshed_session = await auth_backend.authenticate_session(session_cookie)
+        if refreshed_session:
+            # The new cookie is set by app.main
+            request.state.refreshed_session = refreshed_session
         
         if user_data:
-            # Sync with local DB
-            db_user = db.query(User).filter(User.id == user_data.id).first()
-            if not db_user:
-                print(f"Syncing user {user_data.id} to local DB")
-                new_user = User(
-                    id=user_data.id,
-                    email=user_data.email,
-                    first_name=user_data.first_name,
-                    last_name=user_data.last_name,
-                    profile_picture_url=user_data.profile_picture_url,
-                    email_verified=str(user_data.email_verified)
-                )
-                db.add(new_user)
+            # Sync with local DB: one upsert per user and process every few minutes
+            if not _recently_synced(user_data.id):
+                sync_user(db, user_data)
                 db.commit()
+                _mark_synced(user_data.id)
             
             return {
                 "id": user_data.id,
@@ -62,17 +101,20 @@ async def get_current_user(request: Request, db: Session = Depends(get_db)) -> O
             
         return None
         
+    except QueryCancelled:
+        raise
     except Exception as e:
-        print(f"Error authenticating user: {e}")
+        # Expired or tampered cookies hit this on every request: sampled
+        logger.warning("Error authenticating user", extra={"error": str(e), "sample_rate": 0.1})
         return None
 
 
-async def require_auth(request: Request) -> dict:
+async def require_auth(user: Optional[dict] = Depends(get_current_user)) -> dict:
     """
     Dependency that requires authentication.
     
     Args:
-        request: FastAPI request object
+        user: Result of get_current_user
         
     Returns:
         User dict
@@ -80,8 +122,6 @@ async def require_auth(request: Request) -> dict:
     Raises:
         HTTPException: If user is not authenticated
     """
-    user = await get_current_user(request)
-    
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -89,3 +129,99 @@ async def require_auth(request: Request) -> dict:
         )
     
     return user
+
+
+def user_roles(user: dict) -> set:
+    """Roles granted to a user in settings (`admin`, `institutional_lender`), by verified email."""
+    if not user.get("email_verified"):
+        return set()
+    email = (user.get("email") or "").lower()
+    roles = set()
+    if email in {e.lower() for e in settings.admin_emails}:
+        roles.add("admin")
+    if email in {e.lower() for e in settings.institutional_lender_emails}:
+        roles.add("institutional_lender")
+    return roles
+
+
+def require_role(*roles: str):
+    """
+    Build a dependency that requires an authenticated user with any of `roles`.
+    
+    Raises:
+        HTTPException: 401 if not authenticated, 403 without the role
+    """
+    async def dependency(user: dict = Depends(require_auth)) -> dict:
+        if not user_roles(user) & set(roles):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="No tienes permisos para esta operación"
+            )
+        return user
+    
+    return dependency
+
+
+async def require_diagnostics_access(request: Request, user: Optional[dict] = Depends(get_current_user)):
+    """
+    Dependency for internal endpoints: admins, or probes sending
+    `Authorization: Bearer <DIAGNOSTICS_TOKEN>`.
+    
+    Raises:
+        HTTPException: 401 without either, 403 for other users
+    """
+    token = settings.diagnostics_token
+    if token and hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {token}"):
+        return
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required"
+        )
+    if "admin" not in user_roles(user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para esta operación"
+        )
+
+
+
+def bid_rate_limit(auction_type: str):
+    """
+    Build a dependency that authenticates the lender, then rate-limits their
+    bids per lender and per auction.
+    
+    Runs after require_auth and keys the lender bucket on the verified user
+    id, so a bot can't dodge it by rotating cookies; excess bids are still
+    rejected before the route touches the auction.
+    
+    Args:
+        auction_type: "loan" or "pool"; the auction id is the route's
+            `<auction_type>_id` path parameter
+        
+    Returns:
+        User dict, as require_auth
+        
+    Raises:
+        HTTPException: 401 if not authenticated, 429 with Retry-After if
+            either bucket is empty
+    """
+    async def dependency(request: Request, user: dict = Depends(require_auth)) -> dict:
+        auction_id = request.path_params.get(f"{auction_type}_id")
+        
+        # Both buckets in one take: a bid rejected by the auction bucket
+        # doesn't spend the lender's token, and vice versa
+        retry_after = await rate_limiter.hit(
+            (f"bid:lender:{user['id']}", settings.bid_rate_per_lender, settings.bid_burst_per_lender),
+            (f"bid:{auction_type}:{auction_id}", settings.bid_rate_per_auction, settings.bid_burst_per_auction),
+        )
+        
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Demasiadas ofertas, intenta nuevamente en unos segundos",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+            )
+        return user
+    
+    return dependency
@@ -0,0 +1,40 @@
+"""
+Background jobs run by the persistent queue (see app.services.jobs).
+
+Periodic jobs are enqueued once per interval by whichever worker gets there
+first; other work can be enqueued with `enqueue(db, kind, payload)` in the
+same transaction as the change that needs it.
+"""
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.services.archive import archive_settled
+from app.services.jobs import prune_jobs, register_job
+from app.services.ledger import run_ledger_jobs
+from app.services.pool_service import form_pools, process_expired_pools
+
+
+@register_job("pools.settle", priority=10, every=settings.pool_check_interval_seconds)
+def settle_pools(db: Session, payload: dict):
+    """Form new pools and settle expired ones."""
+    return form_pools(db) + process_expired_pools(db)
+
+
+@register_job("ledger.run", priority=5, every=settings.ledger_interval_minutes * 60)
+def run_ledger(db: Session, payload: dict):
+    """Open repayment accounts and run the daily accrual."""
+    results = run_ledger_jobs(db)
+    return results if any(results.values()) else None
+
+
+if settings.archive_interval_minutes > 0:
+    @register_job("archive.settled", every=settings.archive_interval_minutes * 60)
+    def archive_settled_records(db: Session, payload: dict):
+        """Move settled auctions to the archive tables."""
+        moved = archive_settled(db)
+        return moved if any(moved.values()) else None
+
+
+@register_job("jobs.prune", priority=-10, every=3600)
+def prune_finished_jobs(db: Session, payload: dict):
+    """Delete old finished jobs from the queue table."""
+    return prune_jobs(db) or None
@@ -0,0 +1,159 @@
+"""
+Structured, non-blocking application logging.
+
+Records from the `app.*` loggers are put on a bounded in-memory queue and
+written to stdout by a background thread, so logging never blocks the event
+loop on a slow stdout; if the writer falls behind, records are dropped and
+counted instead. Each record carries the request id of the request that
+produced it (set by the middleware in app.main).
+
+Usage:
+
+    logger = get_logger(__name__)
+    logger.info("Pool settled", extra={"pool_id": pool.id, "rate": rate})
+
+    # High-volume messages: keep ~1% of them (errors are never sampled)
+    logger.info("Bid rejected", extra={"sample_rate": 0.01, "loan_id": loan_id})
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from app.config import settings
+
+# Request id of the request being handled (None outside requests)
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName", "request_id"}
+
+_listener: Optional[QueueListener] = None
+_handler: Optional["NonBlockingQueueHandler"] = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+class ContextFilter(logging.Filter):
+    """Drop sampled-out records and stamp the rest with the request id."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        sample_rate = getattr(record, "sample_rate", None)
+        if sample_rate is not None and record.levelno < logging.ERROR and random.random() >= sample_rate:
+            return False
+        record.request_id = request_id_var.get()
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that never waits: drops (and counts) records when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only resolve the message here; formatting happens on the writer thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _extras(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.request_id:
+            entry["request_id"] = record.request_id
+        entry.update(_extras(record))
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development; extras as key=value."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = f"{self.formatTime(record)} {record.levelname:<7} {record.name}"
+        if record.request_id:
+            line += f" [{record.request_id}]"
+        line += f" {record.getMessage()}"
+        extras = _extras(record)
+        if extras:
+            line += " " + " ".join(f"{key}={value}" for key, value in extras.items())
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+def configure_logging():
+    """Route the `app` loggers through the queue. Safe to call more than once."""
+    global _listener, _handler
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if settings.log_format == "json" else TextFormatter())
+
+    log_queue = queue.Queue(maxsize=settings.log_queue_size)
+    _handler = NonBlockingQueueHandler(log_queue)
+    _handler.addFilter(ContextFilter())
+
+    logger = logging.getLogger("app")
+    logger.setLevel(settings.log_level.upper())
+    logger.addHandler(_handler)
+    logger.propagate = False
+
+    _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener, _handler
+    if _listener is not None:
+        _listener.stop()
+        logging.getLogger("app").removeHandler(_handler)
+        _listener = _handler = None
+
+
+def logging_status() -> dict:
+    return {
+        "queued": _handler.queue.qsize() if _handler else 0,
+        "dropped": _handler.dropped if _handler else 0,
+    }
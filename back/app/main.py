@@ -1,14 +1,22 @@
 import os
 import certifi
-from fastapi import FastAPI
+import time
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import JSONResponse
 
 # Fix for macOS SSL certificate issue
 os.environ["SSL_CERT_FILE"] = certifi.where()
 
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.auth import router as auth_router
-from app.database import init_db
+from app.database import init_db, LAST_WRITE_COOKIE, QueryCancelled, QueryCancelMiddleware
 from app.config import settings
+from app.services.auth import set_session_cookie, auth_backend
+from app.services.rate_limit import rate_limiter
+from app.log import configure_logging, get_logger, logging_status, request_id_var, new_request_id
+
+configure_logging()
+logger = get_logger(__name__)
 
 # Create FastAPI application
 app = FastAPI(
@@ -30,50 +38,108 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Query deadlines count from here; cancels a request's queries when its client disconnects
+app.add_middleware(QueryCancelMiddleware)
+
+
+@app.exception_handler(QueryCancelled)
+async def query_cancelled(request: Request, exc: QueryCancelled):
+    """A query hit the route's time limit (504) or its client went away (499, never seen)."""
+    logger.warning("Query cancelled", extra={"reason": exc.reason, "path": request.url.path, "sample_rate": 0.1})
+    if exc.reason == "disconnected":
+        return JSONResponse(status_code=499, content={"detail": "Cliente desconectado"})
+    return JSONResponse(status_code=504, content={"detail": "La consulta excedió el tiempo límite"})
+
+
+@app.middleware("http")
+async def track_last_write(request: Request, call_next):
+    """Stamp committed writes so get_read_db can route this client to the primary."""
+    response = await call_next(request)
+    if getattr(request.state, "committed_write", False):
+        response.set_cookie(
+            key=LAST_WRITE_COOKIE,
+            value=str(time.time()),
+            httponly=True,
+            samesite="lax",
+            max_age=settings.read_your_writes_seconds
+        )
+    return response
+
+
+@app.middleware("http")
+async def persist_refreshed_session(request: Request, call_next):
+    """Send the new session cookie when get_current_user refreshed the session."""
+    response = await call_next(request)
+    refreshed_session = getattr(request.state, "refreshed_session", None)
+    if refreshed_session:
+        set_session_cookie(response, refreshed_session)
+    return response
+
+
+@app.middleware("http")
+async def correlate_request(request: Request, call_next):
+    """Tag every log record of this request with its id (X-Request-ID, echoed back)."""
+    request_id = request.headers.get("x-request-id") or new_request_id()
+    token = request_id_var.set(request_id[:64])
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id[:64]
+    return response
+
+
 from app.api.auth import router as auth_router
 from app.api.users import router as users_router
-from app.routers import loans, pools, lender
+from app.routers import loans, pools, lender, events, dashboard, analytics, exports, market
 
 app.include_router(auth_router)
 app.include_router(users_router, prefix="/users", tags=["users"])
 app.include_router(loans.router, prefix="/loans", tags=["loans"])
 app.include_router(pools.router)
 app.include_router(lender.router)
+app.include_router(events.router)
+app.include_router(dashboard.router)
+app.include_router(analytics.router)
+app.include_router(exports.router)
+app.include_router(market.router)
 
 
 import asyncio
-from app.database import init_db, SessionLocal
-from app.services.pool_service import process_expired_pools
-
-async def check_expired_pools_loop():
-    """Background task to check for expired pools periodically."""
-    while True:
-        try:
-            # Create a new DB session
-            db = SessionLocal()
-            try:
-                results = process_expired_pools(db)
-                if results:
-                    print(f"Background task processed pools: {results}")
-            finally:
-                db.close()
-        except Exception as e:
-            print(f"Error in background pool check: {e}")
-        
-        # Wait for 60 seconds before next check
-        await asyncio.sleep(60)
+from app.dependencies import require_diagnostics_access
+from app.services.jobs import JobWorker
+from app.services.diagnostics import diagnostics
+from app.services.single_flight import SINGLE_FLIGHTS
+from app import jobs  # noqa: F401 - registers the background jobs
+
+job_worker = JobWorker()
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on application startup."""
-    print("🚀 Starting application...")
-    print(f"📊 Initializing database...")
+    logger.info("Starting application")
     init_db()
-    print("✅ Database initialized")
+    logger.info("Database initialized")
+    
+    # Pool settlement, the ledger and archival run from the job queue
+    if settings.job_worker_enabled:
+        asyncio.create_task(job_worker.run())
+        logger.info("Background job worker started", extra={"worker_id": job_worker.worker_id})
+    
+    # Event loop lag, slow callbacks and cached DB probes for /health and /diagnostics
+    asyncio.create_task(diagnostics.run())
     
-    # Start background task
-    asyncio.create_task(check_expired_pools_loop())
-    print("⏰ Background pool expiration task started")
+    # WorkOS: keeps the signing keys warm for local token verification
+    await auth_backend.start()
+    if auth_backend.name == "local":
+        logger.warning("AUTH_BACKEND=local: sessions are self-issued, do not use in production")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release the auth backend's connections (WorkOS pool) and the rate limit backend."""
+    await auth_backend.close()
+    await rate_limiter.backend.close()
 
 
 @app.get("/")
@@ -88,11 +154,22 @@ async def root():
 
 @app.get("/health")
 async def health():
-    """Detailed health check endpoint."""
+    """Public liveness check (database status from the last background probe); internals are in /diagnostics."""
+    database_ok = diagnostics.database_ok()
+    return {
+        "status": "healthy" if database_ok is not False else "unhealthy",
+        "database": {True: "connected", False: "unreachable", None: "unknown"}[database_ok],
+    }
+
+
+@app.get("/diagnostics", dependencies=[Depends(require_diagnostics_access)])
+async def get_diagnostics():
+    """Runtime diagnostics: event loop, threadpools, DB pools and latency, background jobs."""
     return {
-        "status": "healthy",
-        "database": "connected",
-        "auth": "workos-authkit"
+        **diagnostics.snapshot(),
+        "job_worker": job_worker.status() if settings.job_worker_enabled else None,
+        "logging": logging_status(),
+        "coalesced_reads": {name: flight.status() for name, flight in SINGLE_FLIGHTS.items()},
     }
 
 
@@ -1,4 +1,17 @@
 from app.models.user import User
 from app.models.profile import UserProfile
+# Import every model so string-based relationships resolve wherever models are used
+from app.models.loan_request import LoanRequest
+from app.models.loan_bid import LoanBid
+from app.models.loan_pool import LoanPool
+from app.models.pool_bid import PoolBid
+from app.models.outbox_event import OutboxEvent
+from app.models.market_rate_rollup import MarketRateRollup
+from app.models.settlement_failure import SettlementFailure
+from app.models.job_watermark import JobWatermark
+from app.models.ledger_entry import LedgerEntry
+from app.models.loan_account import LoanAccount
+from app.models.job import Job
+from app.models.archive import LoanRequestArchive, LoanBidArchive, LoanPoolArchive, PoolBidArchive
 
 __all__ = ["User"]
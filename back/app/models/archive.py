@@ -0,0 +1,80 @@
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Enum
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.database import Base
+from app.models.loan_pool import PoolStatus
+
+# Cold storage for settled auctions (see app.services.archive).
+#
+# Each table mirrors the columns of its hot table so rows move with
+# INSERT ... SELECT, plus archived_at. There are no foreign keys: a loan,
+# its bids and its pool may be archived in different runs. Relationships are
+# viewonly and mirror the hot models so the same response code can read both.
+
+
+class LoanRequestArchive(Base):
+    __tablename__ = "loan_requests_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(String, index=True)
+    amount = Column(Float, nullable=False)
+    term_months = Column(Integer, nullable=False)
+    interest_rate = Column(Float, nullable=False)
+    status = Column(String)
+    credit_score = Column(Integer, nullable=True)
+    purpose = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    pool_id = Column(Integer, nullable=True, index=True)
+    wants_pool = Column(Boolean, default=False)
+
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    user = relationship("User", primaryjoin="foreign(LoanRequestArchive.user_id) == User.id", viewonly=True)
+    bids = relationship("LoanBidArchive", primaryjoin="LoanRequestArchive.id == foreign(LoanBidArchive.loan_id)", viewonly=True)
+    borrower_profile = relationship(
+        "UserProfile",
+        primaryjoin="LoanRequestArchive.user_id == foreign(UserProfile.user_id)",
+        uselist=False,
+        viewonly=True,
+    )
+
+
+class LoanBidArchive(Base):
+    __tablename__ = "loan_bids_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    loan_id = Column(Integer, index=True)
+    lender_id = Column(String, index=True)
+    interest_rate = Column(Float, nullable=False)
+    created_at = Column(DateTime(timezone=True))
+
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class LoanPoolArchive(Base):
+    __tablename__ = "loan_pools_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    status = Column(Enum(PoolStatus))
+    created_at = Column(DateTime(timezone=True))
+    expires_at = Column(DateTime(timezone=True), nullable=True)
+    winning_bid_id = Column(Integer, nullable=True)
+    updated_at = Column(DateTime(timezone=True))
+
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    loans = relationship("LoanRequestArchive", primaryjoin="LoanPoolArchive.id == foreign(LoanRequestArchive.pool_id)", viewonly=True)
+    bids = relationship("PoolBidArchive", primaryjoin="LoanPoolArchive.id == foreign(PoolBidArchive.pool_id)", viewonly=True)
+
+
+class PoolBidArchive(Base):
+    __tablename__ = "pool_bids_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    pool_id = Column(Integer, index=True)
+    lender_id = Column(String, index=True)
+    interest_rate = Column(Float, nullable=False)
+    created_at = Column(DateTime(timezone=True))
+
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,46 @@
+import enum
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Text, DateTime, Enum, JSON, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    DEAD = "dead"  # Out of attempts; re-queue by setting status back to queued
+
+class Job(Base):
+    """
+    Background job in the persistent queue (see app.services.jobs).
+
+    Workers claim queued rows with SELECT ... FOR UPDATE SKIP LOCKED, so any
+    number of processes can share the queue without handing out a job twice.
+    """
+    __tablename__ = "jobs"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+
+    kind = Column(String, nullable=False)  # Registered handler, e.g. "pools.settle"
+    payload = Column(JSON, nullable=False, default=dict)
+    priority = Column(Integer, nullable=False, default=0)  # Higher runs first
+    # Periodic and deduplicated jobs: only one row per key is ever enqueued
+    dedupe_key = Column(String, nullable=True, unique=True)
+
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime(timezone=True), server_default=func.now())  # Retry backoff / scheduling
+    last_error = Column(Text, nullable=True)
+
+    locked_by = Column(String, nullable=True)  # Worker id while running
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    duration_ms = Column(Float, nullable=True)  # Last attempt
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Claim query: queued jobs that are due, by priority
+        Index("ix_jobs_claim", "status", "priority", "run_after"),
+        Index("ix_jobs_kind_status", "kind", "status"),
+    )
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, BigInteger, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+class JobWatermark(Base):
+    """
+    Progress marker of an incremental background job.
+
+    Each job stores the last position it fully processed (an outbox cursor,
+    a day number, ...) and advances it in the same transaction as the work.
+    """
+    __tablename__ = "job_watermarks"
+
+    name = Column(String, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Date, DateTime, Index
+from sqlalchemy.sql import func
+from app.database import Base
+import enum
+
+class LedgerEntryType(str, enum.Enum):
+    DISBURSEMENT = "disbursement"  # Principal, when the loan is funded
+    INTEREST = "interest"  # Daily accrual
+    PAYMENT = "payment"  # Borrower repayment (negative amount)
+
+class LedgerEntry(Base):
+    """
+    Append-only repayment ledger. Rows are never updated or deleted.
+
+    Amounts are signed from the borrower's side: positive increases what the
+    borrower owes, negative (payments) reduces it, so a loan's balance is the
+    sum of its entries. The running balance is kept in loan_accounts.
+    """
+    __tablename__ = "ledger_entries"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    loan_id = Column(Integer, nullable=False)  # No FK: entries outlive archived loans
+    entry_type = Column(String, nullable=False)
+    amount = Column(Float, nullable=False)
+    entry_date = Column(Date, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_ledger_entries_loan_date", "loan_id", "entry_date"),
+    )
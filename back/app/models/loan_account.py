@@ -0,0 +1,47 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
+from sqlalchemy.sql import func
+from app.database import Base
+import enum
+
+class AccountStatus(str, enum.Enum):
+    CURRENT = "current"
+    DELINQUENT = "delinquent"
+    PAID = "paid"
+
+class LoanAccount(Base):
+    """
+    Repayment state of a funded loan, derived from the ledger.
+
+    Opened when the loan is funded and updated in bulk by the daily accrual
+    (app.services.ledger). Days are stored as date ordinals so the accrual
+    can do date arithmetic in portable SQL.
+    """
+    __tablename__ = "loan_accounts"
+
+    loan_id = Column(Integer, primary_key=True, autoincrement=False)
+    borrower_id = Column(String, nullable=False, index=True)
+    lender_id = Column(String, nullable=True, index=True)
+    pool_id = Column(Integer, nullable=True)
+
+    principal = Column(Float, nullable=False)
+    annual_rate = Column(Float, nullable=False)
+    term_months = Column(Integer, nullable=False)
+    installment = Column(Float, nullable=False)  # Scheduled monthly payment
+
+    funded_day = Column(Integer, nullable=False)  # date.toordinal()
+    next_due_day = Column(Integer, nullable=False)
+    installments_due = Column(Integer, nullable=False, default=0)
+    due_total = Column(Float, nullable=False, default=0)  # Scheduled payments due so far
+    paid_total = Column(Float, nullable=False, default=0)
+    balance = Column(Float, nullable=False)  # Principal + accrued interest - payments
+
+    days_past_due = Column(Integer, nullable=False, default=0)
+    status = Column(String, nullable=False, default=AccountStatus.CURRENT)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        # Daily accrual scans open accounts
+        Index("ix_loan_accounts_status", "status"),
+    )
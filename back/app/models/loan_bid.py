@@ -14,5 +14,5 @@ class LoanBid(Base):
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
-    loan = relationship("LoanRequest")  # Removed back_populates
+    loan = relationship("LoanRequest", back_populates="bids")
     lender = relationship("User", backref="bids")
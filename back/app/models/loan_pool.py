@@ -17,5 +17,8 @@ class LoanPool(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     expires_at = Column(DateTime(timezone=True), nullable=True)  # When bidding ends
     winning_bid_id = Column(Integer, nullable=True)  # FK to pool_bids.id
+    updated_at = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
     
-    # Relationships will be queried manually to avoid circular dependencies
+    # Lazy by default; routes pick selectinload/joinedload per endpoint
+    loans = relationship("LoanRequest", back_populates="pool")
+    bids = relationship("PoolBid", back_populates="pool")
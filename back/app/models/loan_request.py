@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Enum, DateTime, ForeignKey, Boolean, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Float, Enum, DateTime, ForeignKey, Boolean, DateTime, Enum, Index, literal_column, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -27,10 +27,72 @@ class LoanRequest(Base):
     purpose = Column(String, nullable=False, default="Propósito no especificado")
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
 
     user = relationship("User", backref="loan_requests")
-    # bids = relationship("LoanBid", back_populates="loan")  # Commented out due to circular import
+    bids = relationship("LoanBid", back_populates="loan")
+    # Borrower profile joins through the shared user_id (both sides reference users.id)
+    borrower_profile = relationship(
+        "UserProfile",
+        primaryjoin="LoanRequest.user_id == foreign(UserProfile.user_id)",
+        uselist=False,
+        viewonly=True,
+    )
     
-    pool_id = Column(Integer, nullable=True)  # FK to loan_pools.id
+    pool_id = Column(Integer, ForeignKey("loan_pools.id"), nullable=True, index=True)
     wants_pool = Column(Boolean, default=False)
+
+    pool = relationship("LoanPool", back_populates="loans")
+
+    # Marketplace search indexes: every filter/sort is scoped by status, so status leads
+    __table_args__ = (
+        Index("ix_loan_requests_status_amount", "status", "amount"),
+        Index("ix_loan_requests_status_term", "status", "term_months"),
+        Index("ix_loan_requests_status_score", "status", "credit_score"),
+        Index("ix_loan_requests_status_rate", "status", "interest_rate"),
+        Index("ix_loan_requests_status_created", "status", "created_at"),
+        # Pool formation queue: pending wants_pool loans not yet assigned to a pool
+        Index("ix_loan_requests_pool_queue", "status", "wants_pool", "pool_id"),
+        # Full-text search on purpose (Postgres); must match the expression in app.services.loan_search
+        Index(
+            "ix_loan_requests_purpose_tsv",
+            func.to_tsvector(literal_column("'spanish'"), literal_column("purpose")),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+# Full-text search on purpose (SQLite): external-content FTS5 table kept in sync by triggers.
+# Not part of the metadata; created by ensure_search_index (from init_db).
+_SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS loan_requests_fts USING fts5("
+    "purpose, content='loan_requests', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS loan_requests_fts_ai AFTER INSERT ON loan_requests BEGIN "
+    "INSERT INTO loan_requests_fts(rowid, purpose) VALUES (new.id, new.purpose); END",
+    "CREATE TRIGGER IF NOT EXISTS loan_requests_fts_ad AFTER DELETE ON loan_requests BEGIN "
+    "INSERT INTO loan_requests_fts(loan_requests_fts, rowid, purpose) VALUES ('delete', old.id, old.purpose); END",
+    "CREATE TRIGGER IF NOT EXISTS loan_requests_fts_au AFTER UPDATE OF purpose ON loan_requests BEGIN "
+    "INSERT INTO loan_requests_fts(loan_requests_fts, rowid, purpose) VALUES ('delete', old.id, old.purpose); "
+    "INSERT INTO loan_requests_fts(rowid, purpose) VALUES (new.id, new.purpose); END",
+]
+
+
+def ensure_search_index(bind):
+    """
+    Create the full-text index on purpose if it's missing, e.g. on databases
+    whose loan_requests table predates it. Idempotent.
+
+    A newly created SQLite FTS table is rebuilt from the existing rows; the
+    Postgres GIN index is built by CREATE INDEX itself.
+    """
+    with bind.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            existed = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'loan_requests_fts'")).first()
+            for statement in _SQLITE_FTS_DDL:
+                conn.execute(text(statement))
+            if not existed:
+                conn.execute(text("INSERT INTO loan_requests_fts(loan_requests_fts) VALUES ('rebuild')"))
+        elif conn.dialect.name == "postgresql":
+            for index in LoanRequest.__table__.indexes:
+                if index.name == "ix_loan_requests_purpose_tsv":
+                    index.create(conn, checkfirst=True)
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+class MarketRateRollup(Base):
+    """
+    Daily clearing rates and volumes per (term, score band, channel).
+
+    Maintained incrementally in the same transaction that funds loans
+    (see app.services.market_stats), so analytics never scan raw history.
+    """
+    __tablename__ = "market_rate_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    day = Column(Date, nullable=False)
+    term_months = Column(Integer, nullable=False)
+    score_band = Column(String, nullable=False)  # "A", "B" or "C" (app.services.pricing)
+    channel = Column(String, nullable=False)  # "loan" (direct) or "pool"
+
+    deals = Column(Integer, nullable=False, default=0)
+    volume = Column(Float, nullable=False, default=0)
+    # Sum of rate * amount; volume-weighted average rate = rate_amount_sum / volume
+    rate_amount_sum = Column(Float, nullable=False, default=0)
+    min_rate = Column(Float, nullable=False)
+    max_rate = Column(Float, nullable=False)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # One row per bucket; day leads so time-range queries are index range scans
+    __table_args__ = (
+        UniqueConstraint("day", "term_months", "score_band", "channel", name="uq_market_rate_rollups_bucket"),
+    )
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, JSON
+from sqlalchemy.sql import func
+from app.database import Base
+
+class OutboxEvent(Base):
+    """
+    Append-only log of auction state changes.
+
+    Rows are written in the same transaction as the change they describe and
+    are never updated. The primary key doubles as the consumer cursor.
+    """
+    __tablename__ = "outbox_events"
+
+    # Monotonic sequence (BIGINT on Postgres, rowid on SQLite)
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+
+    event_type = Column(String, nullable=False)  # e.g. "loan.bid_placed", "pool.funded"
+    aggregate_type = Column(String, nullable=False)  # "loan" or "pool"
+    aggregate_id = Column(Integer, nullable=False, index=True)
+    payload = Column(JSON, nullable=False, default=dict)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -14,5 +14,5 @@ class PoolBid(Base):
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
-    # Relationships queried manually to avoid circular dependencies
+    pool = relationship("LoanPool", back_populates="bids")
     lender = relationship("User", backref="pool_bids")
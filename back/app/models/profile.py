@@ -18,7 +18,7 @@ class UserProfile(Base):
     city = Column(String, nullable=True)
     
     # Step 2: Work Info
-    work_situation = Column(String, nullable=True)
+    work_situation = Column(String, nullable=True, index=True)  # Marketplace filter
     employer = Column(String, nullable=True)
     seniority_years = Column(String, nullable=True)
     seniority_months = Column(String, nullable=True)
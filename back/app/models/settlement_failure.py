@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, Text, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+class SettlementFailure(Base):
+    """
+    Failed settlement attempts per pool (dead-letter record).
+
+    A row exists while a pool's settlement is failing and is removed once it
+    succeeds. After `settlement_dead_letter_after` failed runs the pool is
+    dead-lettered and skipped by settlement; delete the row to retry it.
+    """
+    __tablename__ = "settlement_failures"
+
+    id = Column(Integer, primary_key=True, index=True)
+    pool_id = Column(Integer, nullable=False, unique=True, index=True)
+
+    attempts = Column(Integer, nullable=False, default=0)  # Failed settlement runs
+    last_error = Column(Text, nullable=True)
+
+    first_failed_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_failed_at = Column(DateTime(timezone=True), server_default=func.now())
+    dead_lettered_at = Column(DateTime(timezone=True), nullable=True)
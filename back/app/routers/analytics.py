@@ -0,0 +1,43 @@
+from datetime import date, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app.database import get_read_db
+from app.schemas.analytics import MarketRatePoint, RollupDimension
+from app.services.market_stats import get_market_rates
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["analytics"],
+)
+
+MAX_RANGE_DAYS = 366 * 2
+
+@router.get("/rates", response_model=List[MarketRatePoint])
+async def get_rate_series(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    term_months: Optional[int] = Query(None, gt=0),
+    score_band: Optional[str] = Query(None, pattern="^[ABC]$"),
+    channel: Optional[str] = Query(None, pattern="^(loan|pool)$"),
+    group_by: List[RollupDimension] = Query(list(RollupDimension)),
+    db: Session = Depends(get_read_db)
+):
+    # Daily clearing rates and volumes, served from market_rate_rollups
+    end = end or date.today()
+    start = start or end - timedelta(days=90)
+    if start > end:
+        raise HTTPException(status_code=400, detail="La fecha de inicio debe ser anterior a la fecha de término")
+    if (end - start).days > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"El rango máximo es de {MAX_RANGE_DAYS} días")
+    
+    return get_market_rates(
+        db,
+        start=start,
+        end=end,
+        term_months=term_months,
+        band=score_band,
+        channel=channel,
+        group_by=[d.value for d in group_by],
+    )
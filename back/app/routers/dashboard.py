@@ -0,0 +1,103 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.database import get_read_db
+from app.models.loan_request import LoanRequest
+from app.models.loan_bid import LoanBid
+from app.models.loan_pool import LoanPool
+from app.models.pool_bid import PoolBid
+from app.models.profile import UserProfile
+from app.api.auth import get_current_user
+from app.schemas.dashboard import DashboardResponse, DashboardLoan, DashboardPool
+
+router = APIRouter(
+    prefix="/dashboard",
+    tags=["dashboard"],
+)
+
+@router.get("/", response_model=DashboardResponse)
+async def get_dashboard(
+    db: Session = Depends(get_read_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Everything the borrower dashboard needs in one round trip.
+
+    Replaces /auth/status + /users/me/profile + /loans/my + one
+    /loans/{id} and /pools/{id} per item. Runs a fixed number of queries:
+    profile, loans, bid summaries per loan, pools, pool members and pool
+    bid summaries (the last three only when the user has pooled loans).
+    """
+    if not current_user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required"
+        )
+
+    user_id = current_user["id"]
+
+    profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
+    loans = db.query(LoanRequest).filter(LoanRequest.user_id == user_id).order_by(LoanRequest.created_at.desc(), LoanRequest.id.desc()).all()
+
+    loan_ids = [l.id for l in loans]
+    loan_bids = {}
+    if loan_ids:
+        loan_bids = {
+            row.loan_id: row
+            for row in db.query(
+                LoanBid.loan_id,
+                func.count(LoanBid.id).label("bid_count"),
+                func.min(LoanBid.interest_rate).label("best_bid"),
+            ).filter(LoanBid.loan_id.in_(loan_ids)).group_by(LoanBid.loan_id)
+        }
+
+    loans_data = []
+    for loan in loans:
+        summary = loan_bids.get(loan.id)
+        item = DashboardLoan.model_validate(loan)
+        item.bid_count = summary.bid_count if summary else 0
+        item.best_bid = summary.best_bid if summary else None
+        loans_data.append(item)
+
+    pool_ids = sorted({l.pool_id for l in loans if l.pool_id})
+    pools_data = []
+    if pool_ids:
+        pools = db.query(LoanPool).filter(LoanPool.id.in_(pool_ids)).all()
+        members = {
+            row.pool_id: row
+            for row in db.query(
+                LoanRequest.pool_id,
+                func.count(LoanRequest.id).label("member_count"),
+                func.sum(LoanRequest.amount).label("total_amount"),
+            ).filter(LoanRequest.pool_id.in_(pool_ids)).group_by(LoanRequest.pool_id)
+        }
+        pool_bids = {
+            row.pool_id: row
+            for row in db.query(
+                PoolBid.pool_id,
+                func.count(PoolBid.id).label("bid_count"),
+                func.min(PoolBid.interest_rate).label("best_bid"),
+            ).filter(PoolBid.pool_id.in_(pool_ids)).group_by(PoolBid.pool_id)
+        }
+
+        for pool in pools:
+            member_summary = members.get(pool.id)
+            bid_summary = pool_bids.get(pool.id)
+            pools_data.append(DashboardPool(
+                id=pool.id,
+                status=pool.status.value,
+                created_at=pool.created_at,
+                expires_at=pool.expires_at,
+                member_count=member_summary.member_count if member_summary else 0,
+                total_amount=float(member_summary.total_amount or 0) if member_summary else 0,
+                bid_count=bid_summary.bid_count if bid_summary else 0,
+                best_bid=bid_summary.best_bid if bid_summary else None
+            ))
+
+    return DashboardResponse(
+        user=current_user,
+        profile=profile,
+        loans=loans_data,
+        pools=pools_data
+    )
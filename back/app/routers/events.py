@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_read_db
+from app.dependencies import require_role
+from app.schemas.event import OutboxEventPage
+from app.services.outbox import read_events
+
+router = APIRouter(
+    prefix="/events",
+    tags=["events"],
+)
+
+@router.get("/", response_model=OutboxEventPage)
+async def get_events(
+    after: int = Query(0, ge=0, description="Último id de evento procesado"),
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_read_db),
+    current_user: dict = Depends(require_role("admin"))
+):
+    # The outbox holds every user's events, so it's admin-only
+    # Incremental read; clients keep next_cursor and pass it back as `after`
+    events = read_events(db, after=after, limit=limit)
+    return OutboxEventPage(
+        events=events,
+        next_cursor=events[-1].id if events else after
+    )
@@ -0,0 +1,36 @@
+from datetime import date
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from app.dependencies import require_role
+from app.schemas.export import ExportDataset, ExportFormat
+from app.services.export import stream_csv, stream_parquet
+
+router = APIRouter(
+    prefix="/exports",
+    tags=["exports"],
+)
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+@router.get("/{dataset}")
+async def export_dataset(
+    dataset: ExportDataset,
+    format: ExportFormat = ExportFormat.CSV,
+    current_user: dict = Depends(require_role("admin", "institutional_lender"))
+):
+    # Full dataset export, streamed chunk by chunk from a server-side cursor
+    if format == ExportFormat.PARQUET:
+        body = stream_parquet(dataset)
+    else:
+        body = stream_csv(dataset)
+    
+    filename = f"{dataset.value}-{date.today().isoformat()}.{format.value}"
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -1,13 +1,12 @@
 from fastapi import APIRouter, Depends
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
 from typing import List
 from pydantic import BaseModel
 
-from app.database import get_db
-from app.models.loan_request import LoanRequest, LoanStatus
-from app.models.loan_pool import LoanPool
-from app.models.loan_bid import LoanBid
-from app.api.auth import get_current_user
+from app.database import get_read_db
+from app.models.loan_account import LoanAccount, AccountStatus
+from app.dependencies import require_auth
 
 router = APIRouter(
     prefix="/lender",
@@ -28,22 +27,58 @@ class Investment(BaseModel):
 
 @router.get("/stats", response_model=LenderStats)
 async def get_lender_stats(
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: dict = Depends(require_auth)
 ):
-    # For now, return mock data
-    # In production, you'd calculate based on actual investments
+    # One aggregate over the lender's repayment accounts (see app.services.ledger)
+    total_invested, scheduled, active_count = db.query(
+        func.coalesce(func.sum(LoanAccount.principal), 0.0),
+        func.coalesce(func.sum(LoanAccount.installment * LoanAccount.term_months), 0.0),
+        func.count(case((LoanAccount.status != AccountStatus.PAID.value, 1))),
+    ).filter(LoanAccount.lender_id == current_user["id"]).one()
+    
     return LenderStats(
-        total_invested=0,
-        expected_return=0,
-        active_count=0
+        total_invested=total_invested,
+        expected_return=scheduled - total_invested,
+        active_count=active_count
     )
 
 @router.get("/investments", response_model=List[Investment])
 async def get_lender_investments(
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: dict = Depends(require_auth)
 ):
-    # For now, return empty list
-    # In production, you'd fetch actual investments linked to this user
-    return []
+    lender_id = current_user["id"]
+    
+    # Direct loans are listed one by one
+    loans = db.query(LoanAccount.loan_id, LoanAccount.principal, LoanAccount.status).filter(
+        LoanAccount.lender_id == lender_id,
+        LoanAccount.pool_id.is_(None),
+    ).all()
+    
+    # Pooled loans are grouped by pool; a pool is delinquent if any of its loans is
+    pools = db.query(
+        LoanAccount.pool_id,
+        func.sum(LoanAccount.principal),
+        func.count(LoanAccount.loan_id),
+        func.sum(case((LoanAccount.status == AccountStatus.DELINQUENT.value, 1), else_=0)),
+        func.sum(case((LoanAccount.status != AccountStatus.PAID.value, 1), else_=0)),
+    ).filter(
+        LoanAccount.lender_id == lender_id,
+        LoanAccount.pool_id.isnot(None),
+    ).group_by(LoanAccount.pool_id).all()
+    
+    investments = [
+        Investment(id=loan_id, type="Loan", amount=principal, status=account_status)
+        for loan_id, principal, account_status in loans
+    ]
+    for pool_id, amount, member_count, delinquent, open_count in pools:
+        if delinquent:
+            pool_status = AccountStatus.DELINQUENT.value
+        elif open_count:
+            pool_status = AccountStatus.CURRENT.value
+        else:
+            pool_status = AccountStatus.PAID.value
+        investments.append(Investment(id=pool_id, type="Pool", amount=amount, status=pool_status, member_count=member_count))
+    
+    return investments
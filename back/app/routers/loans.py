@@ -1,15 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import List, Optional
+from app.config import settings
+from app.database import get_db, get_read_db, wrote_recently
 from app.models.loan_request import LoanRequest, LoanStatus
 from app.models.loan_bid import LoanBid
 from app.models.profile import UserProfile
-from app.schemas.loan import LoanRequestCreate, LoanRequestResponse, LoanRequestDetail, UserProfileSimple, LoanBidCreate, LoanBidResponse
+from app.models.archive import LoanRequestArchive
+from app.models.ledger_entry import LedgerEntry
+from app.models.loan_account import LoanAccount
+from app.schemas.loan import LoanRequestCreate, LoanRequestResponse, LoanRequestDetail, UserProfileSimple, LoanBidCreate, LoanBidResponse, LoanSortField, SortOrder, RateQuote
+from app.schemas.ledger import PaymentCreate, LoanAccountResponse
+from app.services.loan_search import search_loan_requests
+from app.services.pricing import quote
+from app.services.outbox import record_event
+from app.services.market_stats import record_fundings
+from app.services.jobs import enqueue
+from app.services.ledger import record_payment
+from app.services.single_flight import SingleFlight
 from app.api.auth import get_current_user
+from app.dependencies import bid_rate_limit, require_auth
 
 router = APIRouter()
 
+loan_details = SingleFlight("loans.detail")
+
 @router.post("/", response_model=LoanRequestResponse)
 async def create_loan_request(
     loan: LoanRequestCreate,
@@ -24,17 +40,9 @@ async def create_loan_request(
     if not profile:
         raise HTTPException(status_code=400, detail="Complete su perfil antes de solicitar un préstamo")
         
-    # Simple interest rate logic based on score
-    # Base rate 15%, discount for good score
-    score = profile.score or 500
-    base_rate = 0.25 # 25%
-    
-    if score >= 700:
-        interest_rate = 0.12 # 12%
-    elif score >= 600:
-        interest_rate = 0.18 # 18%
-    else:
-        interest_rate = 0.25 # 25%
+    # Starting rate comes from the pricing grid, same as GET /loans/quote
+    interest_rate = quote(profile.score, loan.term_months, loan.amount)["annual_rate"]
+    
      # Create loan request
     new_loan = LoanRequest(
         user_id=user_id,
@@ -47,66 +55,111 @@ async def create_loan_request(
         purpose=loan.purpose
     )
     
-    # Handle Pool Logic
-    if loan.wants_pool:
-        from app.models.loan_pool import LoanPool, PoolStatus
-        
-        # Find an open pool with less than 5 members
-        # This is a simplified logic. In production, we'd need better locking/concurrency handling.
-        open_pools = db.query(LoanPool).filter(LoanPool.status == PoolStatus.OPEN).all()
-        target_pool = None
-        
-        for pool in open_pools:
-            if len(pool.loans) < 5:
-                target_pool = pool
-                break
-        
-        if not target_pool:
-            # Create new pool
-            target_pool = LoanPool(status=PoolStatus.OPEN)
-            db.add(target_pool)
-            db.commit()
-            db.refresh(target_pool)
-            
-        new_loan.pool_id = target_pool.id
+    # Pooled loans wait unassigned (pool_id=None) until the periodic pool
+    # formation stage groups them with loans of the same risk band and term
+    # (see app.services.pool_service.form_pools).
 
     db.add(new_loan)
+    db.flush()
+    record_event(db, "loan.created", "loan", new_loan.id, {
+        "amount": new_loan.amount,
+        "term_months": new_loan.term_months,
+        "interest_rate": new_loan.interest_rate,
+        "wants_pool": bool(new_loan.wants_pool),
+    })
     db.commit()
     db.refresh(new_loan)
     
     return new_loan
 
+# Sync: runs in the threadpool, so a client disconnect can cancel its query mid-flight
 @router.get("/", response_model=List[LoanRequestResponse])
-async def get_loan_requests(
-    db: Session = Depends(get_db)
+def get_loan_requests(
+    min_amount: Optional[float] = Query(None, ge=0),
+    max_amount: Optional[float] = Query(None, ge=0),
+    term_months: Optional[int] = Query(None, gt=0),
+    min_score: Optional[int] = Query(None, ge=0),
+    max_score: Optional[int] = Query(None, ge=0),
+    work_situation: Optional[str] = None,
+    q: Optional[str] = Query(None, max_length=200, description="Búsqueda de texto en el propósito"),
+    sort_by: LoanSortField = LoanSortField.RECENT,
+    order: SortOrder = SortOrder.DESC,
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db)
 ):
-    # For now, return all loans so lenders can see them
-    # In a real app, we might filter by user or have a separate endpoint for lenders
-    return db.query(LoanRequest).filter(LoanRequest.status == LoanStatus.PENDING).all()
+    # Marketplace listing for lenders: PENDING loans, filtered and sorted server-side
+    return search_loan_requests(
+        db,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        term_months=term_months,
+        min_score=min_score,
+        max_score=max_score,
+        work_situation=work_situation,
+        q=q,
+        sort_by=sort_by,
+        order=order,
+        limit=limit,
+        offset=offset,
+    )
 
 @router.get("/my", response_model=List[LoanRequestResponse])
 async def get_my_loan_requests(
-    db: Session = Depends(get_db),
+    include_archived: bool = Query(False, description="Incluir solicitudes archivadas"),
+    db: Session = Depends(get_read_db),
     current_user: dict = Depends(get_current_user)
 ):
-    return db.query(LoanRequest).filter(LoanRequest.user_id == current_user["id"]).all()
+    loans = db.query(LoanRequest).filter(LoanRequest.user_id == current_user["id"]).all()
+    if include_archived:
+        loans += db.query(LoanRequestArchive).filter(LoanRequestArchive.user_id == current_user["id"]).all()
+    return loans
+
+@router.get("/quote", response_model=RateQuote)
+async def get_rate_quote(
+    amount: float = Query(..., gt=0),
+    term_months: int = Query(..., gt=0, le=120),
+    score: Optional[int] = Query(None, ge=0, description="Puntaje a cotizar; por defecto el del perfil"),
+    db: Session = Depends(get_read_db),
+    current_user: dict = Depends(get_current_user)
+):
+    # Priced from the in-memory grid; no writes, and no reads when a score is given
+    if score is None and current_user:
+        score = db.query(UserProfile.score).filter(UserProfile.user_id == current_user["id"]).scalar()
+    return quote(score, term_months, amount)
 
 @router.get("/{loan_id}", response_model=LoanRequestDetail)
 async def get_loan_detail(
     loan_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_read_db),
     current_user: dict = Depends(get_current_user)
 ):
-    loan = db.query(LoanRequest).filter(LoanRequest.id == loan_id).first()
+    # Same for every caller: concurrent readers of the same loan share one fetch; recent writers read their own
+    if settings.coalesce_reads and not wrote_recently(request):
+        return await loan_details.do(loan_id, _load_loan_detail, db, loan_id)
+    return await asyncio.to_thread(_load_loan_detail, db, loan_id)
+
+
+def _load_loan_detail(db: Session, loan_id: int) -> LoanRequestDetail:
+    # 2 queries: loan + borrower user + profile in one join, bids via selectin
+    loan = db.query(LoanRequest).options(
+        joinedload(LoanRequest.user),
+        joinedload(LoanRequest.borrower_profile),
+        selectinload(LoanRequest.bids),
+    ).filter(LoanRequest.id == loan_id).first()
+    if not loan:
+        # Settled loans may have been moved to cold storage
+        loan = db.query(LoanRequestArchive).options(
+            joinedload(LoanRequestArchive.user),
+            joinedload(LoanRequestArchive.borrower_profile),
+            selectinload(LoanRequestArchive.bids),
+        ).filter(LoanRequestArchive.id == loan_id).first()
     if not loan:
         raise HTTPException(status_code=404, detail="Solicitud no encontrada")
         
-    # Fetch borrower profile
-    profile = db.query(UserProfile).filter(UserProfile.user_id == loan.user_id).first()
-    
-    # Get user info for name
-    from app.models.user import User
-    user = db.query(User).filter(User.id == loan.user_id).first()
+    profile = loan.borrower_profile
+    user = loan.user
     
     # Construct response
     response = LoanRequestDetail.from_orm(loan)
@@ -119,12 +172,13 @@ async def get_loan_detail(
         response.borrower = borrower_data
         
     # Calculate best bid
-    bids = db.query(LoanBid).filter(LoanBid.loan_id == loan_id).all()
+    bids = loan.bids
     if bids:
         response.best_bid = min([bid.interest_rate for bid in bids])
     else:
         response.best_bid = loan.interest_rate
-    response.bids = bids
+    # Plain data: the response may be shared with other requests (see get_loan_detail)
+    response.bids = [LoanBidResponse.from_orm(bid) for bid in bids]
         
     return response
 
@@ -132,8 +186,8 @@ async def get_loan_detail(
 async def place_bid(
     loan_id: int,
     bid: LoanBidCreate,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(bid_rate_limit("loan")),
+    db: Session = Depends(get_db)
 ):
     loan = db.query(LoanRequest).filter(LoanRequest.id == loan_id).first()
     if not loan:
@@ -161,6 +215,12 @@ async def place_bid(
     )
     
     db.add(new_bid)
+    db.flush()
+    record_event(db, "loan.bid_placed", "loan", loan_id, {
+        "bid_id": new_bid.id,
+        "lender_id": new_bid.lender_id,
+        "interest_rate": new_bid.interest_rate,
+    })
     db.commit()
     db.refresh(new_bid)
     
@@ -193,6 +253,12 @@ async def accept_bid(
     loan.status = LoanStatus.FUNDED
     loan.interest_rate = bid.interest_rate
     
+    record_fundings(db, [loan], channel="loan")
+    record_event(db, "loan.bid_accepted", "loan", loan.id, {
+        "bid_id": bid.id,
+        "lender_id": bid.lender_id,
+        "interest_rate": bid.interest_rate,
+    })
     db.commit()
     db.refresh(loan)
     
@@ -216,6 +282,7 @@ async def close_loan_request(
     
     loan.status = LoanStatus.REJECTED  # Or create a CLOSED status if preferred
     
+    record_event(db, "loan.closed", "loan", loan.id)
     db.commit()
     db.refresh(loan)
     
@@ -238,7 +305,61 @@ async def invest_in_loan(
         raise HTTPException(status_code=400, detail="Esta solicitud ya no está disponible")
         
     loan.status = LoanStatus.FUNDED
+    record_fundings(db, [loan], channel="loan")
+    record_event(db, "loan.funded", "loan", loan.id, {"lender_id": current_user["id"]})
     db.commit()
     db.refresh(loan)
     
     return loan
+
+@router.get("/{loan_id}/account", response_model=LoanAccountResponse)
+async def get_loan_account(
+    loan_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: dict = Depends(require_auth)
+):
+    account = db.query(LoanAccount).filter(LoanAccount.loan_id == loan_id).first()
+    if not account:
+        raise HTTPException(status_code=404, detail="Cuenta de préstamo no encontrada")
+    
+    if current_user["id"] not in (account.borrower_id, account.lender_id):
+        raise HTTPException(status_code=403, detail="No tienes permiso para ver esta cuenta")
+    
+    response = LoanAccountResponse.model_validate(account)
+    response.entries = db.query(LedgerEntry).filter(
+        LedgerEntry.loan_id == loan_id
+    ).order_by(LedgerEntry.entry_date, LedgerEntry.id).all()
+    return response
+
+@router.post("/{loan_id}/payments", response_model=LoanAccountResponse)
+async def pay_loan(
+    loan_id: int,
+    payment: PaymentCreate,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_auth)
+):
+    # Row lock: concurrent payments and the accrual job serialize on the account
+    account = db.query(LoanAccount).filter(LoanAccount.loan_id == loan_id).with_for_update().first()
+    if not account:
+        loan = db.query(LoanRequest).filter(LoanRequest.id == loan_id).first()
+        if not loan or loan.status != LoanStatus.FUNDED:
+            raise HTTPException(status_code=404, detail="Cuenta de préstamo no encontrada")
+        if loan.user_id != current_user["id"]:
+            raise HTTPException(status_code=403, detail="Solo el solicitante puede pagar este préstamo")
+        
+        # Funded since the last ledger run: have the worker open it soon, once per loan
+        enqueue(db, "ledger.run", dedupe_key=f"ledger.run@loan:{loan_id}")
+        db.commit()
+        raise HTTPException(status_code=409, detail="La cuenta del préstamo aún se está abriendo, intenta nuevamente en unos minutos")
+    
+    if account.borrower_id != current_user["id"]:
+        raise HTTPException(status_code=403, detail="Solo el solicitante puede pagar este préstamo")
+    
+    if account.balance <= 0:
+        raise HTTPException(status_code=400, detail="Este préstamo ya está pagado")
+    
+    record_payment(db, account, payment.amount)
+    db.commit()
+    db.refresh(account)
+    
+    return account
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.database import get_read_db
+from app.schemas.market import MarketChanges
+from app.services.change_feed import CursorExpired, read_changes
+
+router = APIRouter(
+    prefix="/market",
+    tags=["market"],
+)
+
+@router.get("/changes", response_model=MarketChanges)
+async def get_market_changes(
+    cursor: Optional[str] = Query(None, max_length=1000, description="Cursor de la respuesta anterior"),
+    limit: int = Query(500, ge=1, le=2000, description="Máximo de eventos por consulta"),
+    db: Session = Depends(get_read_db)
+):
+    # Delta sync: clients keep `cursor` and pass it back; without one they get a starting cursor
+    try:
+        return read_changes(db, cursor, limit)
+    except CursorExpired:
+        raise HTTPException(status_code=410, detail="Cursor expirado; vuelva a cargar el mercado")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
@@ -1,14 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from pydantic import BaseModel
-from datetime import datetime
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session, selectinload
+from typing import List
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_db, get_read_db, wrote_recently, QueryCancelled
 from app.models.loan_pool import LoanPool, PoolStatus
-from app.models.loan_request import LoanRequest, LoanStatus
+from app.models.loan_request import LoanStatus
+from app.models.pool_bid import PoolBid
+from app.models.archive import LoanPoolArchive
 from app.api.auth import get_current_user
-from app.schemas.pool import PoolBidCreate, PoolBidResponse, PoolDetailResponse
+from app.dependencies import bid_rate_limit
+from app.schemas.pool import PoolBidCreate, PoolBidResponse, PoolDetailResponse, PoolResponse
+from app.services.outbox import record_event
+from app.services.market_stats import record_fundings
+from app.services.pool_service import summarize_pool
+from app.services.single_flight import SingleFlight
+from app.log import get_logger
+
+logger = get_logger(__name__)
+
+pool_details = SingleFlight("pools.detail")
 
 router = APIRouter(
     prefix="/pools",
@@ -16,74 +28,58 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-class PoolResponse(BaseModel):
-    id: int
-    status: str
-    created_at: datetime
-    member_count: int
-    total_amount: float
-    avg_interest_rate: float
-    avg_credit_score: float
-    
-    class Config:
-        from_attributes = True
-
 @router.get("/test")
 async def test_pools():
     return {"message": "Pools endpoint is working"}
 
+# Sync: runs in the threadpool, so a client disconnect can cancel its query mid-flight
 @router.get("/", response_model=List[PoolResponse])
-async def get_pools(
-    db: Session = Depends(get_db)
+def get_pools(
+    db: Session = Depends(get_read_db)
 ):
     try:
-        pools = db.query(LoanPool).filter(LoanPool.status == PoolStatus.OPEN).all()
+        # 2 queries regardless of pool count: pools, then all their loans via selectin
+        pools = db.query(LoanPool).options(
+            selectinload(LoanPool.loans)
+        ).filter(LoanPool.status == PoolStatus.OPEN).all()
         
-        response = []
-        for pool in pools:
-            # Query loans directly instead of using relationship
-            loans = db.query(LoanRequest).filter(LoanRequest.pool_id == pool.id).all()
-            if not loans:
-                continue
-                
-            total_amount = float(sum([l.amount for l in loans]))
-            avg_rate = float(sum([l.interest_rate for l in loans]) / len(loans))
-            avg_score = float(sum([l.credit_score for l in loans if l.credit_score]) / len(loans))
-            
-            response.append(PoolResponse(
-                id=pool.id,
-                status=pool.status.value,  # Convert enum to string
-                created_at=pool.created_at,
-                member_count=len(loans),
-                total_amount=total_amount,
-                avg_interest_rate=avg_rate,
-                avg_credit_score=avg_score
-            ))
-            
-        return response
+        # Pools without loans are skipped
+        return [summary for summary in map(summarize_pool, pools) if summary]
+    except QueryCancelled:
+        raise
     except Exception as e:
-        print(f"Error in get_pools: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in get_pools")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{pool_id}", response_model=PoolDetailResponse)
 async def get_pool_detail(
     pool_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: Session = Depends(get_read_db)
 ):
-    from app.models.pool_bid import PoolBid
-    from app.schemas.pool import PoolDetailResponse
-    
-    pool = db.query(LoanPool).filter(LoanPool.id == pool_id).first()
+    # Concurrent readers of the same pool share one fetch; recent writers read their own
+    if settings.coalesce_reads and not wrote_recently(request):
+        return await pool_details.do(pool_id, _load_pool_detail, db, pool_id)
+    return await asyncio.to_thread(_load_pool_detail, db, pool_id)
+
+
+def _load_pool_detail(db: Session, pool_id: int) -> PoolDetailResponse:
+    # 3 queries: pool, then its loans and bids via selectin
+    pool = db.query(LoanPool).options(
+        selectinload(LoanPool.loans),
+        selectinload(LoanPool.bids),
+    ).filter(LoanPool.id == pool_id).first()
+    if not pool:
+        # Settled pools may have been moved to cold storage
+        pool = db.query(LoanPoolArchive).options(
+            selectinload(LoanPoolArchive.loans),
+            selectinload(LoanPoolArchive.bids),
+        ).filter(LoanPoolArchive.id == pool_id).first()
     if not pool:
         raise HTTPException(status_code=404, detail="Bolsa no encontrada")
     
-    # Get loans in pool
-    loans = db.query(LoanRequest).filter(LoanRequest.pool_id == pool_id).all()
-    
-    # Get bids for this pool
-    bids = db.query(PoolBid).filter(PoolBid.pool_id == pool_id).all()
+    loans = pool.loans
+    bids = pool.bids
     
     # Calculate stats
     total_amount = float(sum([l.amount for l in loans])) if loans else 0
@@ -114,13 +110,13 @@ async def get_pool_detail(
 async def place_pool_bid(
     pool_id: int,
     bid: PoolBidCreate,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(bid_rate_limit("pool")),
+    db: Session = Depends(get_db)
 ):
-    from app.models.pool_bid import PoolBid
-    from app.schemas.pool import PoolBidCreate, PoolBidResponse
-    
-    pool = db.query(LoanPool).filter(LoanPool.id == pool_id).first()
+    pool = db.query(LoanPool).options(
+        selectinload(LoanPool.loans),
+        selectinload(LoanPool.bids),
+    ).filter(LoanPool.id == pool_id).first()
     if not pool:
         raise HTTPException(status_code=404, detail="Bolsa no encontrada")
     
@@ -128,12 +124,11 @@ async def place_pool_bid(
         raise HTTPException(status_code=400, detail="Esta bolsa ya no está disponible")
     
     # Check if any loan in pool belongs to current user
-    loans = db.query(LoanRequest).filter(LoanRequest.pool_id == pool_id).all()
-    if any(l.user_id == current_user["id"] for l in loans):
+    if any(l.user_id == current_user["id"] for l in pool.loans):
         raise HTTPException(status_code=400, detail="No puedes pujar en una bolsa que contiene tu préstamo")
     
     # Get current best bid
-    existing_bids = db.query(PoolBid).filter(PoolBid.pool_id == pool_id).all()
+    existing_bids = pool.bids
     current_best = min([b.interest_rate for b in existing_bids]) if existing_bids else float('inf')
     
     if bid.interest_rate >= current_best:
@@ -146,6 +141,12 @@ async def place_pool_bid(
     )
     
     db.add(new_bid)
+    db.flush()
+    record_event(db, "pool.bid_placed", "pool", pool_id, {
+        "bid_id": new_bid.id,
+        "lender_id": new_bid.lender_id,
+        "interest_rate": new_bid.interest_rate,
+    })
     db.commit()
     db.refresh(new_bid)
     
@@ -157,7 +158,9 @@ async def invest_in_pool(
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
-    pool = db.query(LoanPool).filter(LoanPool.id == pool_id).first()
+    pool = db.query(LoanPool).options(
+        selectinload(LoanPool.loans)
+    ).filter(LoanPool.id == pool_id).first()
     if not pool:
         raise HTTPException(status_code=404, detail="Bolsa no encontrada")
         
@@ -171,6 +174,8 @@ async def invest_in_pool(
     for loan in pool.loans:
         loan.status = LoanStatus.FUNDED
         
+    record_fundings(db, pool.loans, channel="pool")
+    record_event(db, "pool.funded", "pool", pool.id, {"lender_id": current_user["id"]})
     db.commit()
     
     return {"message": "Inversión exitosa en la bolsa"}
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import date
+import enum
+
+class RollupDimension(str, enum.Enum):
+    TERM = "term_months"
+    SCORE_BAND = "score_band"
+    CHANNEL = "channel"
+
+class MarketRatePoint(BaseModel):
+    day: date
+    term_months: Optional[int] = None  # None when not grouped by this dimension
+    score_band: Optional[str] = None
+    channel: Optional[str] = None
+    deals: int
+    volume: float
+    avg_rate: Optional[float] = None  # Volume-weighted
+    min_rate: float
+    max_rate: float
@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+from app.schemas.loan import LoanRequestResponse
+from app.schemas.profile import UserProfileResponse
+
+class DashboardLoan(LoanRequestResponse):
+    pool_id: Optional[int] = None
+    bid_count: int = 0
+    best_bid: Optional[float] = None
+
+class DashboardPool(BaseModel):
+    id: int
+    status: str
+    created_at: datetime
+    expires_at: Optional[datetime] = None
+    member_count: int = 0
+    total_amount: float = 0
+    bid_count: int = 0
+    best_bid: Optional[float] = None
+
+class DashboardResponse(BaseModel):
+    user: dict
+    profile: Optional[UserProfileResponse] = None
+    loans: List[DashboardLoan] = []
+    pools: List[DashboardPool] = []
@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import List
+from datetime import datetime
+
+class OutboxEventResponse(BaseModel):
+    id: int
+    event_type: str
+    aggregate_type: str
+    aggregate_id: int
+    payload: dict
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class OutboxEventPage(BaseModel):
+    events: List[OutboxEventResponse] = []
+    next_cursor: int
@@ -0,0 +1,15 @@
+from enum import Enum
+
+class ExportDataset(str, Enum):
+    LOANS = "loans"
+    POOLS = "pools"
+    LOAN_BIDS = "loan_bids"
+    POOL_BIDS = "pool_bids"
+    LOANS_ARCHIVE = "loans_archive"
+    POOLS_ARCHIVE = "pools_archive"
+    LOAN_BIDS_ARCHIVE = "loan_bids_archive"
+    POOL_BIDS_ARCHIVE = "pool_bids_archive"
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    PARQUET = "parquet"
@@ -0,0 +1,34 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import date, datetime
+
+class PaymentCreate(BaseModel):
+    amount: float = Field(..., gt=0)
+
+class LedgerEntryResponse(BaseModel):
+    id: int
+    entry_type: str
+    amount: float
+    entry_date: date
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class LoanAccountResponse(BaseModel):
+    loan_id: int
+    lender_id: Optional[str] = None
+    principal: float
+    annual_rate: float
+    term_months: int
+    installment: float
+    installments_due: int
+    due_total: float
+    paid_total: float
+    balance: float
+    days_past_due: int
+    status: str
+    entries: List[LedgerEntryResponse] = []
+
+    class Config:
+        from_attributes = True
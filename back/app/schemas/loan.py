@@ -62,3 +62,21 @@ class LoanRequestDetail(LoanRequestResponse):
     borrower: Optional[UserProfileSimple] = None
     bids: List[LoanBidResponse] = []
     best_bid: Optional[float] = None
+
+class RateQuote(BaseModel):
+    score_band: str
+    amount: float
+    term_months: int
+    annual_rate: float
+    monthly_payment: float
+    total_payment: float
+    total_interest: float
+
+class LoanSortField(str, Enum):
+    RATE = "rate"
+    AMOUNT = "amount"
+    RECENT = "recent"
+
+class SortOrder(str, Enum):
+    ASC = "asc"
+    DESC = "desc"
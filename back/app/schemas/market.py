@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import List
+
+from app.schemas.loan import LoanRequestResponse, LoanBidResponse
+from app.schemas.pool import PoolBidResponse, PoolResponse
+
+class MarketLoanBid(LoanBidResponse):
+    loan_id: int
+
+class MarketPoolBid(PoolBidResponse):
+    pool_id: int
+
+class MarketRemoval(BaseModel):
+    type: str  # loan | pool
+    id: int
+    status: str  # Why it left the market (funded, rejected, paid, closed)
+
+class MarketChanges(BaseModel):
+    loans: List[LoanRequestResponse] = []
+    pools: List[PoolResponse] = []
+    loan_bids: List[MarketLoanBid] = []
+    pool_bids: List[MarketPoolBid] = []
+    removed: List[MarketRemoval] = []
+    cursor: str
+    has_more: bool = False  # Poll again right away
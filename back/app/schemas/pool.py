@@ -16,6 +16,18 @@ class PoolBidResponse(PoolBidBase):
     class Config:
         from_attributes = True
 
+class PoolResponse(BaseModel):
+    id: int
+    status: str
+    created_at: datetime
+    member_count: int
+    total_amount: float
+    avg_interest_rate: float
+    avg_credit_score: float
+    
+    class Config:
+        from_attributes = True
+
 class PoolDetailResponse(BaseModel):
     id: int
     status: str
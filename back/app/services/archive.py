@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy import Table, delete, exists, func, insert, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.archive import LoanRequestArchive, LoanBidArchive, LoanPoolArchive, PoolBidArchive
+from app.models.loan_bid import LoanBid
+from app.models.loan_pool import LoanPool, PoolStatus
+from app.models.loan_request import LoanRequest, LoanStatus
+from app.models.pool_bid import PoolBid
+
+# Funded loans are still being repaid (see app.services.ledger)
+TERMINAL_LOAN_STATUSES = [LoanStatus.REJECTED, LoanStatus.PAID]
+TERMINAL_POOL_STATUSES = [PoolStatus.FUNDED, PoolStatus.CLOSED]
+
+
+def _move(db: Session, hot: Table, archive: Table, where) -> int:
+    """Copy matching rows into the archive table, then delete them from the hot one."""
+    names = [c.name for c in hot.columns]
+    db.execute(insert(archive).from_select(names, select(*[hot.c[n] for n in names]).where(where)))
+    return db.execute(delete(hot).where(where)).rowcount
+
+
+def archive_settled(db: Session, now: Optional[datetime] = None, batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Move settled auctions older than `archive_after_days` to the archive tables.
+
+    Loans in a terminal status move together with their bids. Pools move with
+    their bids once they're terminal and none of their loans is left in the hot
+    table. Each batch is its own transaction, so the stage can be interrupted
+    and resumed at any point; rows locked by live requests are skipped.
+
+    Args:
+        db: Database session
+        now: Reference time (defaults to now)
+        batch_size: Rows per transaction (defaults to `archive_batch_size`)
+
+    Returns:
+        Number of rows moved per hot table
+    """
+    cutoff = (now or datetime.now()) - timedelta(days=settings.archive_after_days)
+    batch_size = batch_size or settings.archive_batch_size
+    moved = {"loan_requests": 0, "loan_bids": 0, "loan_pools": 0, "pool_bids": 0}
+
+    while True:
+        loan_ids = [row[0] for row in db.query(LoanRequest.id).filter(
+            LoanRequest.status.in_(TERMINAL_LOAN_STATUSES),
+            func.coalesce(LoanRequest.updated_at, LoanRequest.created_at) < cutoff,
+        ).order_by(LoanRequest.id).limit(batch_size).with_for_update(skip_locked=True)]
+        if not loan_ids:
+            break
+
+        moved["loan_bids"] += _move(db, LoanBid.__table__, LoanBidArchive.__table__, LoanBid.loan_id.in_(loan_ids))
+        moved["loan_requests"] += _move(db, LoanRequest.__table__, LoanRequestArchive.__table__, LoanRequest.id.in_(loan_ids))
+        db.commit()
+
+    while True:
+        pool_ids = [row[0] for row in db.query(LoanPool.id).filter(
+            LoanPool.status.in_(TERMINAL_POOL_STATUSES),
+            func.coalesce(LoanPool.expires_at, LoanPool.created_at) < cutoff,
+            ~exists().where(LoanRequest.pool_id == LoanPool.id),
+        ).order_by(LoanPool.id).limit(batch_size).with_for_update(skip_locked=True)]
+        if not pool_ids:
+            break
+
+        moved["pool_bids"] += _move(db, PoolBid.__table__, PoolBidArchive.__table__, PoolBid.pool_id.in_(pool_ids))
+        moved["loan_pools"] += _move(db, LoanPool.__table__, LoanPoolArchive.__table__, LoanPool.id.in_(pool_ids))
+        db.commit()
+
+    return moved
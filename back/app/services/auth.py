@@ -1,12 +1,81 @@
-from workos import WorkOSClient
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from importlib.metadata import version
+
+import httpx
+import jwt
+from fastapi import Response
+from typing import Optional, Tuple
+from workos import AsyncWorkOSClient
+from workos.session import SessionModule
+from workos.types.user_management.user import User as WorkOSUser
+from workos.utils.http_client import AsyncHTTPClient
 from app.config import settings
+from app.services.jwks import JWKSCache
+
+SESSION_COOKIE = "wos-session"
+SESSION_COOKIE_MAX_AGE = 3600 * 24 * 7  # 7 days
+
+
+class PooledAsyncWorkOSClient(AsyncWorkOSClient):
+    """
+    AsyncWorkOSClient whose HTTP client uses an explicitly sized keep-alive
+    connection pool. The SDK constructor does not accept a transport, so the
+    HTTP client is rebuilt with one.
+    """
+    
+    def __init__(self, *, transport: httpx.AsyncBaseTransport, **kwargs):
+        super().__init__(**kwargs)
+        self._http_client = AsyncHTTPClient(
+            api_key=self._api_key,
+            base_url=self.base_url,
+            client_id=self._client_id,
+            version=version("workos"),
+            timeout=self.request_timeout,
+            transport=transport,
+        )
+    
+    async def close(self):
+        await self._http_client.close()
+
 
-# Initialize WorkOS client
-workos_client = WorkOSClient(
+# Initialize WorkOS client (one shared connection pool per worker process)
+workos_client = PooledAsyncWorkOSClient(
     api_key=settings.workos_api_key,
-    client_id=settings.workos_client_id
+    client_id=settings.workos_client_id,
+    base_url=settings.workos_base_url,
+    request_timeout=settings.workos_request_timeout,
+    transport=httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(
+            max_connections=settings.workos_max_connections,
+            max_keepalive_connections=settings.workos_max_keepalive_connections,
+            keepalive_expiry=settings.workos_keepalive_expiry,
+        ),
+        retries=1,  # Retries connection failures only
+    ),
+)
+
+# Signing keys for local access-token verification
+jwks_cache = JWKSCache(
+    jwks_url=workos_client.user_management.get_jwks_url(),
+    refresh_interval=settings.workos_jwks_refresh_seconds,
+    min_refresh_interval=settings.workos_jwks_min_refresh_seconds,
+    timeout=settings.workos_request_timeout,
 )
 
+# Session refresh deduplication: concurrent refreshes of the same cookie share
+# one in-flight call, and recent results are reused for requests that still
+# carry the old cookie (refresh tokens are single-use).
+_refresh_inflight = {}
+_recent_refreshes = OrderedDict()
+_RECENT_REFRESHES_MAX = 10_000
+
 
 def get_authorization_url(state: str = None) -> str:
     """
@@ -35,7 +104,7 @@ async def authenticate_with_code(code: str) -> dict:
     Returns:
         Dictionary with user data and sealed session
     """
-    auth_response = workos_client.user_management.authenticate_with_code(
+    auth_response = await workos_client.user_management.authenticate_with_code(
         code=code,
         session={
             "seal_session": True,
@@ -51,23 +120,127 @@ async def authenticate_with_code(code: str) -> dict:
     }
 
 
-def load_sealed_session(session_data: str):
+def unseal_session(session_data: str) -> Optional[dict]:
     """
-    Load and decrypt a sealed session.
+    Decrypt a sealed session cookie locally.
     
     Args:
         session_data: Encrypted session cookie value
         
     Returns:
-        Session object from WorkOS
+        Session dict (access_token, refresh_token, user, ...) or None if invalid
+    """
+    try:
+        return SessionModule.unseal_data(session_data, settings.workos_cookie_password)
+    except Exception:
+        return None
+
+
+async def _refresh(session_data: str):
+    session = unseal_session(session_data)
+    if not session or not session.get("refresh_token"):
+        raise ValueError("Invalid session cookie")
+    return await workos_client.user_management.authenticate_with_refresh_token(
+        refresh_token=session["refresh_token"],
+        session={
+            "seal_session": True,
+            "cookie_password": settings.workos_cookie_password
+        }
+    )
+
+
+async def refresh_session(session_data: str):
+    """
+    Refresh a sealed session, deduplicated per session.
+    
+    Concurrent callers with the same cookie await a single WorkOS call, and a
+    successful result is reused for `workos_refresh_reuse_seconds` so requests
+    already in flight with the old cookie don't replay its refresh token.
+    
+    Args:
+        session_data: Encrypted session cookie value
+        
+    Returns:
+        WorkOS refresh response with the user and new sealed session
+    
+    Raises:
+        Exception: If the refresh token is invalid or WorkOS is unreachable
+    """
+    key = hashlib.sha256(session_data.encode()).hexdigest()
+    now = time.monotonic()
+    
+    recent = _recent_refreshes.get(key)
+    if recent and recent[0] > now:
+        return recent[1]
+    
+    task = _refresh_inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_refresh(session_data))
+        _refresh_inflight[key] = task
+        task.add_done_callback(lambda _: _refresh_inflight.pop(key, None))
+    
+    # Shield so one cancelled request doesn't cancel the refresh for the others
+    result = await asyncio.shield(task)
+    
+    if key not in _recent_refreshes:
+        _recent_refreshes[key] = (now + settings.workos_refresh_reuse_seconds, result)
+        while len(_recent_refreshes) > _RECENT_REFRESHES_MAX or (
+            _recent_refreshes and next(iter(_recent_refreshes.values()))[0] <= now
+        ):
+            _recent_refreshes.popitem(last=False)
+    
+    return result
+
+
+async def authenticate_session(session_data: str) -> Tuple[Optional[WorkOSUser], Optional[str]]:
+    """
+    Authenticate a session cookie.
+    
+    The access token is verified locally against the cached JWKS; WorkOS is
+    only called when the token has genuinely expired and must be refreshed.
+    
+    Args:
+        session_data: Encrypted session cookie value
+        
+    Returns:
+        (user, refreshed_sealed_session). The user is None if the session is
+        invalid; the sealed session is only set when a refresh happened.
+    """
+    session = unseal_session(session_data)
+    if not session or not session.get("access_token") or not session.get("user"):
+        return None, None
+    
+    try:
+        await jwks_cache.verify(session["access_token"])
+        return WorkOSUser.model_validate(session["user"]), None
+    except jwt.ExpiredSignatureError:
+        pass
+    except jwt.InvalidTokenError:
+        return None, None
+    
+    refresh_response = await refresh_session(session_data)
+    return refresh_response.user, refresh_response.sealed_session
+
+
+def set_session_cookie(response: Response, sealed_session: str):
+    """
+    Set the encrypted session cookie on a response.
+    
+    Args:
+        response: Response to attach the cookie to
+        sealed_session: Sealed session from WorkOS
     """
-    return workos_client.user_management.load_sealed_session(
-        sealed_session=session_data,
-        cookie_password=settings.workos_cookie_password
+    response.set_cookie(
+        key=SESSION_COOKIE,
+        value=sealed_session,
+        httponly=True,
+        secure=False,  # Set to False for localhost development
+        samesite="lax",
+        max_age=SESSION_COOKIE_MAX_AGE
     )
 
 
-def get_logout_url(session_data: str) -> str:
+async def get_logout_url(session_data: str) -> str:
     """
     Get the WorkOS logout URL for a session.
     
@@ -77,5 +250,188 @@ def get_logout_url(session_data: str) -> str:
     Returns:
         Logout URL to redirect user to
     """
-    session = load_sealed_session(session_data)
-    return session.get_logout_url()
+    session = unseal_session(session_data)
+    if not session or not session.get("access_token"):
+        raise ValueError("Invalid session cookie")
+    
+    # Expired tokens still identify the session to end
+    claims = await jwks_cache.verify(session["access_token"], verify_exp=False)
+    return workos_client.user_management.get_logout_url(session_id=claims["sid"])
+
+
+async def close_auth_client():
+    """Close the shared WorkOS and JWKS HTTP connection pools."""
+    await workos_client.close()
+    await jwks_cache.close()
+
+
+class AuthBackend(ABC):
+    """
+    Where sessions come from and how they're verified.
+
+    `get_current_user` and the /auth routes only talk to the backend
+    selected by `AUTH_BACKEND`, so the rest of the app doesn't care whether
+    a session was issued by WorkOS or signed locally. Backends with a
+    redirect login flow also implement RedirectLoginMixin.
+    """
+
+    name = ""
+
+    @abstractmethod
+    async def authenticate_session(self, session_data: str) -> Tuple[Optional[WorkOSUser], Optional[str]]:
+        """Return (user, refreshed_session) as authenticate_session() does."""
+
+    @abstractmethod
+    async def get_logout_url(self, session_data: str) -> str:
+        """Where to send the browser after clearing the session cookie."""
+
+    async def start(self):
+        """Start background work (called at application startup)."""
+
+    async def close(self):
+        pass
+
+
+class RedirectLoginMixin(ABC):
+    """Backends offering the OAuth redirect flow behind /auth/login and /auth/callback."""
+
+    @abstractmethod
+    def get_authorization_url(self, state: str = None) -> str:
+        """URL of the provider's login page."""
+
+    @abstractmethod
+    async def authenticate_with_code(self, code: str) -> dict:
+        """Exchange the code from the callback for the user and sealed session."""
+
+
+class WorkOSAuthBackend(RedirectLoginMixin, AuthBackend):
+    """Sealed WorkOS sessions, access tokens verified against the cached JWKS."""
+
+    name = "workos"
+
+    async def authenticate_session(self, session_data: str):
+        return await authenticate_session(session_data)
+
+    def get_authorization_url(self, state: str = None) -> str:
+        return get_authorization_url(state)
+
+    async def authenticate_with_code(self, code: str) -> dict:
+        return await authenticate_with_code(code)
+
+    async def get_logout_url(self, session_data: str) -> str:
+        return await get_logout_url(session_data)
+
+    async def start(self):
+        # Keep the WorkOS signing keys warm for local token verification
+        asyncio.create_task(jwks_cache.run_refresh_loop())
+
+    async def close(self):
+        await close_auth_client()
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class LocalAuthBackend(AuthBackend):
+    """
+    Sessions signed with HMAC-SHA256 by this app; no external provider.
+
+    For benchmarks, tests and staging: verifying a cookie is one HMAC and a
+    JSON decode (microseconds, no network). Sessions are issued by
+    `issue_session` (POST /auth/local/session or scripts), so anyone who can
+    reach the API can log in as anyone; never enable it in production.
+    """
+
+    name = "local"
+
+    def __init__(self, secret: str, ttl_seconds: int):
+        self._key = secret.encode()
+        self.ttl_seconds = ttl_seconds
+
+    def _sign(self, payload: bytes) -> str:
+        return _b64encode(hmac.new(self._key, payload, hashlib.sha256).digest())
+
+    def issue_session(self, user: dict, now: Optional[float] = None) -> str:
+        """
+        Sign a session cookie for `user` (id, email and optionally first_name,
+        last_name, profile_picture_url, email_verified).
+        """
+        claims = {
+            "user": {
+                "id": user["id"],
+                "email": user["email"],
+                "first_name": user.get("first_name"),
+                "last_name": user.get("last_name"),
+                "profile_picture_url": user.get("profile_picture_url"),
+                "email_verified": bool(user.get("email_verified", True)),
+            },
+            "exp": int((now or time.time()) + self.ttl_seconds),
+        }
+        payload = json.dumps(claims, separators=(",", ":")).encode()
+        return f"{_b64encode(payload)}.{self._sign(payload)}"
+
+    def _verify(self, session_data: str) -> Optional[dict]:
+        try:
+            encoded, signature = session_data.split(".", 1)
+            payload = _b64decode(encoded)
+            if not hmac.compare_digest(signature, self._sign(payload)):
+                return None
+            claims = json.loads(payload)
+        except Exception:
+            return None
+        return claims if claims.get("exp", 0) > time.time() else None
+
+    async def authenticate_session(self, session_data: str):
+        claims = self._verify(session_data)
+        if claims is None:
+            return None, None
+        # Sliding expiry: past half its lifetime, the cookie is reissued
+        refreshed = None
+        if claims["exp"] - time.time() < self.ttl_seconds / 2:
+            refreshed = self.issue_session(claims["user"])
+        return self.user_from_claims(claims["user"]), refreshed
+
+    @staticmethod
+    def user_from_claims(user: dict) -> WorkOSUser:
+        # Trusted claims we signed ourselves: skip model validation
+        return WorkOSUser.model_construct(**{
+            "object": "user",
+            "profile_picture_url": None,
+            "email_verified": True,
+            **user,
+        })
+
+    async def get_logout_url(self, session_data: str) -> str:
+        return f"{settings.frontend_url}/"
+
+
+# Shortest LOCAL_AUTH_SECRET accepted (characters)
+LOCAL_AUTH_SECRET_MIN_LENGTH = 32
+
+
+def build_auth_backend() -> AuthBackend:
+    """
+    Raises:
+        ValueError: Unknown AUTH_BACKEND, or `local` without its own LOCAL_AUTH_SECRET
+    """
+    if settings.auth_backend == "local":
+        secret = settings.local_auth_secret
+        if not secret or len(secret) < LOCAL_AUTH_SECRET_MIN_LENGTH:
+            raise ValueError(
+                f"AUTH_BACKEND=local requires LOCAL_AUTH_SECRET (at least {LOCAL_AUTH_SECRET_MIN_LENGTH} "
+                "characters, e.g. `openssl rand -base64 32`)"
+            )
+        if secret == settings.workos_cookie_password:
+            raise ValueError("LOCAL_AUTH_SECRET must differ from WORKOS_COOKIE_PASSWORD")
+        return LocalAuthBackend(secret=secret, ttl_seconds=settings.local_session_ttl_seconds)
+    if settings.auth_backend != "workos":
+        raise ValueError(f"Unknown AUTH_BACKEND: {settings.auth_backend}")
+    return WorkOSAuthBackend()
+
+
+auth_backend = build_auth_backend()
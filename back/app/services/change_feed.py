@@ -0,0 +1,137 @@
+"""
+Delta sync for marketplace clients.
+
+Clients load the market once (GET /loans/, GET /pools/), then poll
+GET /market/changes with the cursor they were given and apply what changed:
+loans, pools and bids created or updated since the cursor, upserted by id,
+plus tombstones for loans and pools that left the market (funded, rejected,
+paid, closed).
+
+The feed follows the outbox (app.services.outbox): every change to the
+market records an event in the same transaction, and event ids are handed
+out in commit order, so "events after the cursor" never skips a slow
+transaction that committed late. Each poll reads the new events and then
+fetches the current state of the loans, pools and bids they name by
+primary key, whatever the size of the market.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, selectinload
+from app.config import settings
+from app.models.loan_bid import LoanBid
+from app.models.loan_pool import LoanPool, PoolStatus
+from app.models.loan_request import LoanRequest, LoanStatus
+from app.models.outbox_event import OutboxEvent
+from app.models.pool_bid import PoolBid
+from app.services.outbox import read_events
+from app.services.pool_service import summarize_pool
+
+# Pool events that change the status of the pool's loans too
+POOL_EVENTS_TOUCHING_LOANS = {"pool.formed", "pool.funded", "pool.closed"}
+
+
+class CursorExpired(Exception):
+    """The cursor predates archival; changes since then may have been lost."""
+
+
+def _utc(ts: datetime) -> datetime:
+    # SQLite hands back naive UTC timestamps, Postgres aware ones
+    return ts.astimezone(timezone.utc) if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def encode_cursor(event_id: int) -> str:
+    raw = json.dumps({"event": event_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Raises ValueError if the cursor wasn't produced by `encode_cursor`."""
+    try:
+        event_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))["event"]
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(event_id, int) or isinstance(event_id, bool) or event_id < 0:
+        raise ValueError("Invalid cursor")
+    return event_id
+
+
+def read_changes(db: Session, cursor: Optional[str], limit: int = 500) -> dict:
+    """
+    Marketplace changes since `cursor`, from at most `limit` outbox events.
+
+    Rows are returned in their current state, once per poll however many
+    events touched them. Without a cursor, returns an empty page with a
+    starting cursor (load the market first, then start polling).
+
+    Raises:
+        ValueError: malformed cursor
+        CursorExpired: cursor older than `archive_after_days`; reload the market
+    """
+    changes = {"loans": [], "pools": [], "loan_bids": [], "pool_bids": [], "removed": [], "has_more": False}
+    if cursor is None:
+        changes["cursor"] = encode_cursor(db.scalar(select(func.max(OutboxEvent.id))) or 0)
+        return changes
+
+    after = decode_cursor(cursor)
+    if after:
+        # Rows the cursor's client may hold can have been archived since
+        cursor_time = db.scalar(select(OutboxEvent.created_at).where(OutboxEvent.id == after))
+        horizon = db.scalar(select(func.now())) - timedelta(days=settings.archive_after_days)
+        if cursor_time is None:
+            raise ValueError("Invalid cursor")
+        if _utc(cursor_time) < _utc(horizon):
+            raise CursorExpired()
+
+    events = read_events(db, after=after, limit=limit)
+    changes["has_more"] = len(events) == limit
+    changes["cursor"] = encode_cursor(events[-1].id if events else after)
+
+    loan_ids, pool_ids, loan_bid_ids, pool_bid_ids = set(), set(), set(), set()
+    pools_touching_loans = set()
+    for event in events:
+        payload = event.payload or {}
+        if event.aggregate_type == "loan":
+            loan_ids.add(event.aggregate_id)
+            if event.event_type == "loan.bid_placed" and payload.get("bid_id"):
+                loan_bid_ids.add(payload["bid_id"])
+        elif event.aggregate_type == "pool":
+            pool_ids.add(event.aggregate_id)
+            if event.event_type == "pool.bid_placed" and payload.get("bid_id"):
+                pool_bid_ids.add(payload["bid_id"])
+            elif event.event_type in POOL_EVENTS_TOUCHING_LOANS:
+                pools_touching_loans.add(event.aggregate_id)
+
+    loans = []
+    if loan_ids or pools_touching_loans:
+        loans = db.query(LoanRequest).filter(
+            LoanRequest.id.in_(loan_ids) | LoanRequest.pool_id.in_(pools_touching_loans)
+        ).order_by(LoanRequest.id).all()
+    for loan in loans:
+        if loan.status != LoanStatus.PENDING:
+            changes["removed"].append({"type": "loan", "id": loan.id, "status": loan.status})
+        else:
+            changes["loans"].append(loan)
+
+    if pool_ids:
+        pools = db.query(LoanPool).options(selectinload(LoanPool.loans)).filter(
+            LoanPool.id.in_(pool_ids)
+        ).order_by(LoanPool.id).all()
+        for pool in pools:
+            if pool.status != PoolStatus.OPEN:
+                changes["removed"].append({"type": "pool", "id": pool.id, "status": pool.status.value})
+            else:
+                summary = summarize_pool(pool)
+                if summary:
+                    changes["pools"].append(summary)
+
+    # Bids are immutable: only new ones are sent
+    if loan_bid_ids:
+        changes["loan_bids"] = db.query(LoanBid).filter(LoanBid.id.in_(loan_bid_ids)).order_by(LoanBid.id).all()
+    if pool_bid_ids:
+        changes["pool_bids"] = db.query(PoolBid).filter(PoolBid.id.in_(pool_bid_ids)).order_by(PoolBid.id).all()
+
+    return changes
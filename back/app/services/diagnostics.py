@@ -0,0 +1,222 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Optional
+import anyio.to_thread
+from sqlalchemy import func, text
+from app.config import settings
+from app.log import get_logger
+from app.database import SessionLocal, engine, read_engine, pool_status
+from app.models.job import Job, JobStatus
+
+logger = get_logger(__name__)
+
+# Job whose last successful run is reported as the settlement heartbeat
+SETTLEMENT_JOB = "pools.settle"
+
+
+class LoopMonitor:
+    """
+    Measures event-loop lag and catches code that blocks the loop.
+
+    A coroutine wakes up every `interval` seconds and records how late it
+    was. A watchdog thread checks that those wake-ups keep happening; when
+    the loop has been stuck for longer than `slow_ms`, it captures the loop
+    thread's stack, which points at the blocking call. Works with asyncio
+    and uvloop alike, at the cost of one timer per interval.
+    """
+
+    def __init__(self, interval: float = 0.1, slow_ms: Optional[float] = None, window: int = 600):
+        self.interval = interval
+        self.slow_ms = slow_ms or settings.loop_lag_warn_ms
+        self.lags = deque(maxlen=window)  # ms; the last minute at the default interval
+        self.slow_callbacks = deque(maxlen=20)
+        self.slow_callback_count = 0
+        self._last_tick = None
+        self._loop_thread_id = None
+        self._stall = None  # Record of the stall in progress, if any
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        threading.Thread(target=self._watchdog, name="loop-watchdog", daemon=True).start()
+
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - expected, 0.0) * 1000
+            self._last_tick = time.monotonic()
+            self.lags.append(lag)
+
+            stall = self._stall
+            if stall is not None:
+                self._stall = None
+                stall["blocked_ms"] = round(lag, 1)
+                logger.warning("Event loop blocked", extra={"blocked_ms": stall["blocked_ms"], "stack": stall["stack"]})
+
+    def _watchdog(self):
+        while True:
+            time.sleep(self.interval / 2)
+            stalled_ms = (time.monotonic() - self._last_tick - self.interval) * 1000
+            if stalled_ms < self.slow_ms or self._stall is not None:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = [
+                f"{f.filename}:{f.lineno} {f.name}"
+                for f in traceback.extract_stack(frame)[-8:]
+            ] if frame is not None else []
+            self._stall = {
+                "at": datetime.now().isoformat(),
+                "blocked_ms": round(stalled_ms, 1),  # Updated once the loop resumes
+                "stack": stack,
+            }
+            self.slow_callbacks.append(self._stall)
+            self.slow_callback_count += 1
+
+    def snapshot(self) -> dict:
+        lags = sorted(self.lags)
+        pct = lambda p: round(lags[min(len(lags) - 1, int(len(lags) * p))], 1) if lags else None
+        return {
+            "lag_ms": {
+                "last": round(self.lags[-1], 1) if self.lags else None,
+                "p50": pct(0.5),
+                "p99": pct(0.99),
+                "max": pct(1.0),
+            },
+            "slow_callbacks": self.slow_callback_count,
+            "recent_slow_callbacks": list(self.slow_callbacks),
+        }
+
+
+def threadpool_status() -> dict:
+    """Queue depth of the thread pools blocking work runs on (call from the loop)."""
+    # Sync route handlers and dependencies: anyio's capacity limiter
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    status = {
+        "route_threads": {
+            "limit": limiter.total_tokens,
+            "in_use": limiter.borrowed_tokens,
+            "waiting": limiter.statistics().tasks_waiting,
+        },
+        "executor": None,
+    }
+    # asyncio.to_thread (job worker, background stages): the loop's default executor
+    executor = getattr(asyncio.get_running_loop(), "_default_executor", None)
+    if executor is not None:
+        status["executor"] = {
+            "max_workers": executor._max_workers,
+            "threads": len(executor._threads),
+            "queued": executor._work_queue.qsize(),
+        }
+    return status
+
+
+def _probe_engine(target_engine) -> dict:
+    """Time a pool checkout and a SELECT 1 round trip."""
+    start = time.perf_counter()
+    try:
+        with target_engine.connect() as conn:
+            checked_out = time.perf_counter()
+            conn.execute(text("SELECT 1"))
+            done = time.perf_counter()
+        return {
+            "ok": True,
+            "checkout_ms": round((checked_out - start) * 1000, 1),
+            "round_trip_ms": round((done - checked_out) * 1000, 1),
+        }
+    except Exception as e:
+        return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+
+def _settlement_heartbeat() -> dict:
+    """Last successful settlement run and queue backlog, from the jobs table."""
+    db = SessionLocal()
+    try:
+        now = datetime.now()
+        last_run = db.query(func.max(Job.finished_at)).filter(
+            Job.kind == SETTLEMENT_JOB, Job.status == JobStatus.DONE
+        ).scalar()
+        backlog, oldest = db.query(func.count(Job.id), func.min(Job.run_after)).filter(
+            Job.status == JobStatus.QUEUED, Job.run_after <= now
+        ).one()
+
+        age = (now - last_run.replace(tzinfo=None)).total_seconds() if last_run else None
+        return {
+            "last_settlement_at": last_run.isoformat() if last_run else None,
+            "settlement_age_seconds": round(age, 1) if age is not None else None,
+            # Missed three runs in a row: no worker is running the queue
+            "settlement_stale": age is None or age > 3 * settings.pool_check_interval_seconds,
+            "jobs_due": backlog,
+            "oldest_due_seconds": round((now - oldest.replace(tzinfo=None)).total_seconds(), 1) if oldest else None,
+        }
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    finally:
+        db.close()
+
+
+class Diagnostics:
+    """
+    Runtime health of this process, refreshed in the background.
+
+    Probes that touch the database run every `diagnostics_interval_seconds`
+    in a thread and are cached, so reading the snapshot (GET /health,
+    GET /diagnostics) costs no queries no matter how often it's polled.
+    """
+
+    def __init__(self):
+        self.loop_monitor = LoopMonitor()
+        self.probes = {}
+        self.probed_at = None
+
+    def probe(self):
+        probes = {"database": _probe_engine(engine)}
+        if read_engine is not engine:
+            probes["read_database"] = _probe_engine(read_engine)
+        probes["background"] = _settlement_heartbeat()
+        self.probes = probes
+        self.probed_at = datetime.now().isoformat()
+
+    async def run(self):
+        asyncio.create_task(self.loop_monitor.run())
+        while True:
+            try:
+                await asyncio.to_thread(self.probe)
+            except Exception:
+                logger.exception("Error in diagnostics probe")
+            await asyncio.sleep(settings.diagnostics_interval_seconds)
+
+    def database_ok(self) -> Optional[bool]:
+        """Result of the last primary database probe (None before the first one)."""
+        database = self.probes.get("database")
+        return database["ok"] if database else None
+
+    def snapshot(self) -> dict:
+        loop = self.loop_monitor.snapshot()
+        problems = []
+        if self.database_ok() is False:
+            problems.append("database unreachable")
+        if (loop["lag_ms"]["p99"] or 0) > self.loop_monitor.slow_ms:
+            problems.append("event loop lagging")
+        if self.probes.get("background", {}).get("settlement_stale"):
+            problems.append("settlement not running")
+
+        return {
+            "status": "degraded" if problems else "healthy",
+            "problems": problems,
+            "probed_at": self.probed_at,
+            "event_loop": loop,
+            "threadpools": threadpool_status(),
+            "db_pool": pool_status(engine),
+            "db_read_pool": pool_status(read_engine) if read_engine is not engine else None,
+            **self.probes,
+        }
+
+
+diagnostics = Diagnostics()
@@ -0,0 +1,140 @@
+import csv
+import enum
+import io
+from typing import Iterator
+from sqlalchemy import select, Boolean, Date, DateTime, Enum, Float, Integer
+from app.database import ReadSessionLocal
+from app.models.loan_request import LoanRequest
+from app.models.loan_pool import LoanPool
+from app.models.loan_bid import LoanBid
+from app.models.pool_bid import PoolBid
+from app.models.archive import LoanRequestArchive, LoanBidArchive, LoanPoolArchive, PoolBidArchive
+from app.schemas.export import ExportDataset
+
+# Rows fetched per round trip; also one CSV chunk / one Parquet row group
+EXPORT_CHUNK_ROWS = 5000
+
+EXPORT_TABLES = {
+    ExportDataset.LOANS: LoanRequest.__table__,
+    ExportDataset.POOLS: LoanPool.__table__,
+    ExportDataset.LOAN_BIDS: LoanBid.__table__,
+    ExportDataset.POOL_BIDS: PoolBid.__table__,
+    ExportDataset.LOANS_ARCHIVE: LoanRequestArchive.__table__,
+    ExportDataset.POOLS_ARCHIVE: LoanPoolArchive.__table__,
+    ExportDataset.LOAN_BIDS_ARCHIVE: LoanBidArchive.__table__,
+    ExportDataset.POOL_BIDS_ARCHIVE: PoolBidArchive.__table__,
+}
+
+
+def _iter_chunks(dataset: ExportDataset, chunk_rows: int) -> Iterator[list]:
+    """
+    Yield the dataset in id order, `chunk_rows` rows at a time.
+
+    Uses a server-side cursor (yield_per implies stream_results), so only one
+    chunk is in memory at a time. Owns its session because the response body
+    is produced after the request's dependencies may have been torn down.
+    """
+    table = EXPORT_TABLES[dataset]
+    enum_positions = [i for i, c in enumerate(table.columns) if isinstance(c.type, Enum) and c.type.enum_class]
+
+    db = ReadSessionLocal()
+    try:
+        result = db.execute(
+            select(table).order_by(table.c.id).execution_options(yield_per=chunk_rows)
+        )
+        for rows in result.partitions():
+            if enum_positions:
+                rows = [_plain_enums(row, enum_positions) for row in rows]
+            yield rows
+    finally:
+        db.close()
+
+
+def _plain_enums(row, positions) -> tuple:
+    values = list(row)
+    for i in positions:
+        if isinstance(values[i], enum.Enum):
+            values[i] = values[i].value
+    return tuple(values)
+
+
+def stream_csv(dataset: ExportDataset, chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    """Stream a dataset as CSV (header row first), one encoded chunk per DB fetch."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow([c.name for c in EXPORT_TABLES[dataset].columns])
+    for rows in _iter_chunks(dataset, chunk_rows):
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    if buffer.tell():
+        # Empty dataset: header only
+        yield buffer.getvalue().encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _arrow_type(pa, column_type):
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us", tz="UTC" if column_type.timezone else None)
+    if isinstance(column_type, Date):
+        return pa.date32()
+    return pa.string()
+
+
+def stream_parquet(dataset: ExportDataset, chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    """Stream a dataset as Parquet, one row group per DB fetch."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = EXPORT_TABLES[dataset]
+    schema = pa.schema([(c.name, _arrow_type(pa, c.type)) for c in table.columns])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+
+    try:
+        for rows in _iter_chunks(dataset, chunk_rows):
+            columns = zip(*rows)
+            writer.write_batch(pa.record_batch(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    except BaseException:
+        writer.close()
+        raise
+
+    # Footer
+    writer.close()
+    yield sink.drain()
@@ -0,0 +1,387 @@
+import asyncio
+import os
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import delete, func, text, update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.log import get_logger
+from app.database import SessionLocal, upsert_insert
+from app.models.job import Job, JobStatus
+
+logger = get_logger(__name__)
+
+# Arbitrary key for the Postgres advisory lock that serializes claims
+CLAIM_LOCK_KEY = 7_281_002
+
+
+@dataclass
+class JobSpec:
+    handler: Callable[[Session, dict], object]
+    concurrency: int  # Jobs of this kind running at once, across all workers
+    max_attempts: int
+    priority: int
+    every: Optional[float]  # Seconds between runs for periodic jobs
+
+
+# kind -> spec; filled by register_job (see app.jobs)
+JOB_HANDLERS: Dict[str, JobSpec] = {}
+
+
+def register_job(kind: str, concurrency: int = 1, max_attempts: Optional[int] = None,
+                 priority: int = 0, every: Optional[float] = None):
+    """
+    Register a job handler: `handler(db, payload)`.
+
+    The handler runs in a worker thread with its own session; it may commit
+    as it goes and whatever is left is committed when it returns. Raising
+    re-queues the job with backoff until `max_attempts` is reached. Jobs with
+    `every` are enqueued automatically once per interval.
+    """
+    def decorator(handler):
+        JOB_HANDLERS[kind] = JobSpec(
+            handler=handler,
+            concurrency=concurrency,
+            max_attempts=max_attempts or settings.job_max_attempts,
+            priority=priority,
+            every=every,
+        )
+        return handler
+    return decorator
+
+
+def enqueue(db: Session, kind: str, payload: dict = None, priority: Optional[int] = None,
+            run_after: Optional[datetime] = None, dedupe_key: Optional[str] = None):
+    """
+    Add a job to the queue in the caller's transaction.
+
+    Does not commit, so a job enqueued from a request becomes visible together
+    with the change that caused it. A job whose `dedupe_key` was already used
+    is silently dropped.
+    """
+    spec = JOB_HANDLERS.get(kind)
+    if spec is None:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    db.execute(
+        upsert_insert(db)(Job).values(
+            kind=kind,
+            payload=payload or {},
+            priority=spec.priority if priority is None else priority,
+            dedupe_key=dedupe_key,
+            status=JobStatus.QUEUED,
+            max_attempts=spec.max_attempts,
+            run_after=run_after or datetime.now(),
+        ).on_conflict_do_nothing(index_elements=[Job.dedupe_key])
+    )
+
+
+def _retry_at(attempts: int, now: datetime) -> datetime:
+    return now + timedelta(seconds=settings.job_retry_backoff_seconds * 2 ** max(attempts - 1, 0))
+
+
+def requeue_stale(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Release jobs whose worker died mid-run (lease not renewed for `job_lease_seconds`).
+
+    Returns:
+        Number of jobs released
+    """
+    now = now or datetime.now()
+    stale = (Job.status == JobStatus.RUNNING) & (Job.locked_at < now - timedelta(seconds=settings.job_lease_seconds))
+    released = 0
+    # Out of attempts: dead; otherwise back in the queue right away
+    for condition, values in (
+        (Job.attempts >= Job.max_attempts, {"status": JobStatus.DEAD, "finished_at": now}),
+        (Job.attempts < Job.max_attempts, {"status": JobStatus.QUEUED, "run_after": now}),
+    ):
+        released += db.execute(
+            update(Job).where(stale, condition).values(
+                locked_by=None,
+                last_error="Lease expired (worker stopped?)",
+                **values,
+            ).execution_options(synchronize_session=False)
+        ).rowcount
+    return released
+
+
+def claim_jobs(db: Session, worker_id: str, limit: int, now: Optional[datetime] = None) -> List[int]:
+    """
+    Claim up to `limit` due jobs for this worker, highest priority first.
+
+    Rows are selected with FOR UPDATE SKIP LOCKED, so concurrent workers
+    never claim the same job. Kinds already at their concurrency limit are
+    left in the queue; claims are serialized (Postgres advisory lock, held
+    until the commit) so two workers can't both count a free slot. Commits.
+
+    Returns:
+        Ids of the claimed jobs, now marked running
+    """
+    now = now or datetime.now()
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": CLAIM_LOCK_KEY})
+    running = dict(db.query(Job.kind, func.count(Job.id)).filter(
+        Job.status == JobStatus.RUNNING
+    ).group_by(Job.kind).all())
+    free = {kind: spec.concurrency - running.get(kind, 0) for kind, spec in JOB_HANDLERS.items()}
+    kinds = [kind for kind, slots in free.items() if slots > 0]
+    if not kinds or limit <= 0:
+        db.commit()
+        return []
+
+    candidates = db.query(Job).filter(
+        Job.status == JobStatus.QUEUED,
+        Job.run_after <= now,
+        Job.kind.in_(kinds),
+    ).order_by(Job.priority.desc(), Job.id).limit(limit).with_for_update(skip_locked=True).all()
+
+    claimed = []
+    for job in candidates:
+        if free[job.kind] <= 0:
+            continue
+        free[job.kind] -= 1
+        job.status = JobStatus.RUNNING
+        job.locked_by = worker_id
+        job.locked_at = now
+        job.attempts += 1
+        claimed.append(job.id)
+
+    db.commit()
+    return claimed
+
+
+class JobMetrics:
+    """Per-kind counters of the jobs run by this process (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._kinds: Dict[str, dict] = {}
+
+    def record(self, kind: str, ok: bool, elapsed_ms: float):
+        with self._lock:
+            stats = self._kinds.setdefault(kind, {
+                "runs": 0, "failures": 0, "total_ms": 0.0, "max_ms": 0.0, "last_run_at": None,
+            })
+            stats["runs"] += 1
+            stats["failures"] += 0 if ok else 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            stats["last_run_at"] = datetime.now().isoformat()
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                kind: {
+                    **stats,
+                    "total_ms": round(stats["total_ms"], 1),
+                    "max_ms": round(stats["max_ms"], 1),
+                    "avg_ms": round(stats["total_ms"] / stats["runs"], 1),
+                }
+                for kind, stats in self._kinds.items()
+            }
+
+
+class LeaseHeartbeat:
+    """
+    Renew a running job's lease (`locked_at`) from a background thread, so a
+    long job isn't re-queued by `requeue_stale` while its worker is alive.
+
+    Renews every third of `job_lease_seconds`, only while the row is still
+    held by this claim (same worker and attempt).
+    """
+
+    def __init__(self, job_id: int, worker_id: str, attempt: int, session_factory=SessionLocal):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.attempt = attempt
+        self.session_factory = session_factory
+        self.interval = settings.job_lease_seconds / 3
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"job-lease-{job_id}", daemon=True)
+
+    def renew(self) -> bool:
+        """Returns False once the lease has been lost."""
+        db = self.session_factory()
+        try:
+            renewed = db.execute(
+                update(Job).where(
+                    Job.id == self.job_id,
+                    Job.status == JobStatus.RUNNING,
+                    Job.locked_by == self.worker_id,
+                    Job.attempts == self.attempt,
+                ).values(locked_at=datetime.now()).execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            return bool(renewed)
+        finally:
+            db.close()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                if not self.renew():
+                    logger.warning("Job lease lost", extra={"job_id": self.job_id, "worker_id": self.worker_id})
+                    return
+            except Exception:
+                logger.exception("Error renewing job lease", extra={"job_id": self.job_id})
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stopped.set()
+        self._thread.join()
+
+
+def _owns(job: Optional[Job], worker_id: str, attempt: Optional[int] = None) -> bool:
+    """Whether `worker_id` still holds the claim on `job` (for the given attempt)."""
+    return (
+        job is not None
+        and job.status == JobStatus.RUNNING
+        and job.locked_by == worker_id
+        and (attempt is None or job.attempts == attempt)
+    )
+
+
+def run_job(job_id: int, worker_id: str, session_factory=SessionLocal, metrics: Optional[JobMetrics] = None):
+    """
+    Run one job claimed by `worker_id` in its own session and record the
+    outcome on its row, unless the claim was lost meanwhile (lease expired
+    and the job was re-queued): then the row belongs to its new owner.
+    Jobs that are gone or no longer claimed by `worker_id` are not run.
+
+    Returns:
+        What the handler returned (None on failure or if not run)
+    """
+    db = session_factory()
+    try:
+        job = db.get(Job, job_id)
+        if not _owns(job, worker_id):
+            logger.warning("Job missing or claimed by another worker, not run", extra={
+                "job_id": job_id, "worker_id": worker_id,
+            })
+            return None
+        kind = job.kind
+        attempt = job.attempts
+        start = time.perf_counter()
+        try:
+            spec = JOB_HANDLERS.get(kind)
+            if spec is None:
+                raise LookupError(f"No handler registered for job kind {kind}")
+            with LeaseHeartbeat(job_id, worker_id, attempt, session_factory):
+                result = spec.handler(db, job.payload or {})
+                db.commit()
+            error = None
+        except Exception as e:
+            db.rollback()
+            result = None
+            error = f"{type(e).__name__}: {e}"
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        if metrics is not None:
+            metrics.record(kind, error is None, elapsed_ms)
+
+        now = datetime.now()
+        job = db.query(Job).filter(Job.id == job_id).with_for_update().populate_existing().first()
+        if not _owns(job, worker_id, attempt):
+            db.rollback()
+            logger.warning("Job lease lost before it finished, outcome not recorded", extra={
+                "job_id": job_id, "kind": kind, "worker_id": worker_id, "error": error,
+            })
+            return result
+
+        job.locked_by = None
+        job.duration_ms = elapsed_ms
+        if error is None:
+            job.status = JobStatus.DONE
+            job.finished_at = now
+        elif job.attempts >= job.max_attempts:
+            job.status = JobStatus.DEAD
+            job.finished_at = now
+            job.last_error = error
+            logger.error("Job dead after repeated failures", extra={"job_id": job_id, "kind": kind, "attempts": job.attempts, "error": error})
+        else:
+            job.status = JobStatus.QUEUED
+            job.run_after = _retry_at(job.attempts, now)
+            job.last_error = error
+            logger.warning("Job failed, will retry", extra={"job_id": job_id, "kind": kind, "attempts": job.attempts, "error": error})
+        db.commit()
+        return result
+    finally:
+        db.close()
+
+
+def prune_jobs(db: Session, now: Optional[datetime] = None) -> int:
+    """Delete finished jobs older than `job_retention_days` (dead jobs are kept)."""
+    cutoff = (now or datetime.now()) - timedelta(days=settings.job_retention_days)
+    return db.execute(delete(Job).where(Job.status == JobStatus.DONE, Job.finished_at < cutoff)).rowcount
+
+
+class JobWorker:
+    """
+    Polls the queue and runs claimed jobs in threads, up to `concurrency` at once.
+
+    Every API process runs one (unless `JOB_WORKER_ENABLED=false`), and more
+    can run standalone with `python run_worker.py`; they coordinate through
+    the jobs table only.
+    """
+
+    def __init__(self, session_factory=SessionLocal, concurrency: Optional[int] = None,
+                 poll_seconds: Optional[float] = None):
+        self.session_factory = session_factory
+        self.concurrency = concurrency or settings.job_worker_concurrency
+        self.poll_seconds = poll_seconds or settings.job_poll_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.metrics = JobMetrics()
+        self._inflight = set()
+        self._scheduled: Dict[str, int] = {}  # kind -> last periodic slot enqueued
+
+    def _poll(self, free: int) -> List[int]:
+        db = self.session_factory()
+        try:
+            now = datetime.now()
+            # Periodic jobs: one row per interval slot, deduplicated across workers
+            for kind, spec in JOB_HANDLERS.items():
+                if not spec.every:
+                    continue
+                slot = int(now.timestamp() // spec.every)
+                if self._scheduled.get(kind) != slot:
+                    enqueue(db, kind, dedupe_key=f"{kind}@{slot}")
+                    self._scheduled[kind] = slot
+            requeue_stale(db, now)
+            db.commit()
+            return claim_jobs(db, self.worker_id, free, now)
+        finally:
+            db.close()
+
+    async def _run(self, job_id: int):
+        result = await asyncio.to_thread(run_job, job_id, self.worker_id, self.session_factory, self.metrics)
+        if result:
+            logger.info("Job finished", extra={"job_id": job_id, "result": result})
+
+    async def run(self):
+        while True:
+            try:
+                free = self.concurrency - len(self._inflight)
+                if free > 0:
+                    for job_id in await asyncio.to_thread(self._poll, free):
+                        task = asyncio.create_task(self._run(job_id))
+                        self._inflight.add(task)
+                        task.add_done_callback(self._inflight.discard)
+            except Exception:
+                logger.exception("Error in job worker")
+
+            await asyncio.sleep(self.poll_seconds)
+
+    def status(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "running": len(self._inflight),
+            "concurrency": self.concurrency,
+            "jobs": self.metrics.snapshot(),
+        }
@@ -0,0 +1,102 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+import httpx
+import jwt
+from app.config import settings
+from app.log import get_logger
+
+logger = get_logger(__name__)
+
+# Algorithms are fixed on purpose; never trust the token header for this
+JWT_ALGORITHMS = ["RS256"]
+
+
+class JWKSCache:
+    """
+    In-memory cache of the WorkOS signing keys used to verify access tokens.
+
+    Keys are fetched asynchronously and refreshed in the background. A token
+    signed with an unknown key id triggers an immediate refetch (key rotation),
+    rate-limited so a stream of bogus tokens can't hammer the JWKS endpoint.
+    """
+
+    def __init__(self, jwks_url: str, refresh_interval: float, min_refresh_interval: float, timeout: float):
+        self.jwks_url = jwks_url
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self._client = httpx.AsyncClient(timeout=timeout)
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._last_fetch = 0.0
+        self._inflight: Optional[asyncio.Task] = None
+
+    async def _fetch(self):
+        response = await self._client.get(self.jwks_url)
+        response.raise_for_status()
+        jwk_set = jwt.PyJWKSet.from_dict(response.json())
+        self._keys = {key.key_id: key for key in jwk_set.keys if key.key_id}
+        self._last_fetch = time.monotonic()
+
+    async def refresh(self):
+        """Fetch the key set, sharing one in-flight request between callers."""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._fetch())
+            self._inflight.add_done_callback(lambda _: setattr(self, "_inflight", None))
+        await asyncio.shield(self._inflight)
+
+    async def get_signing_key(self, kid: str) -> Optional[jwt.PyJWK]:
+        """
+        Return the key for a key id, refetching once if it is unknown.
+
+        Args:
+            kid: Key id from the token header
+
+        Returns:
+            The signing key, or None if the key set doesn't contain it
+        """
+        key = self._keys.get(kid)
+        if key is None and time.monotonic() - self._last_fetch >= self.min_refresh_interval:
+            await self.refresh()
+            key = self._keys.get(kid)
+        return key
+
+    async def verify(self, token: str, verify_exp: bool = True) -> dict:
+        """
+        Verify an access token locally and return its claims.
+
+        Args:
+            token: Access token (JWT)
+            verify_exp: Set to False to accept expired tokens (e.g. for logout)
+
+        Returns:
+            Decoded claims
+
+        Raises:
+            jwt.ExpiredSignatureError: Token is valid but expired
+            jwt.InvalidTokenError: Token is malformed or not signed by WorkOS
+        """
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = await self.get_signing_key(kid) if kid else None
+        if key is None:
+            raise jwt.InvalidKeyError(f"Unknown signing key: {kid}")
+
+        return jwt.decode(
+            token,
+            key.key,
+            algorithms=JWT_ALGORITHMS,
+            options={"verify_aud": False, "verify_exp": verify_exp},
+            leeway=settings.workos_jwt_leeway,
+        )
+
+    async def run_refresh_loop(self):
+        """Background task that keeps the key set warm."""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning("Error refreshing JWKS", extra={"error": str(e)})
+            await asyncio.sleep(self.refresh_interval)
+
+    async def close(self):
+        await self._client.aclose()
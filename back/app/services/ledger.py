@@ -0,0 +1,207 @@
+from datetime import date
+from typing import Dict, Optional
+from sqlalchemy import Date, case, func, insert, literal, select, update
+from sqlalchemy.orm import Session
+from app.database import upsert_insert
+from app.models.ledger_entry import LedgerEntry, LedgerEntryType
+from app.models.loan_account import LoanAccount, AccountStatus
+from app.models.loan_request import LoanRequest, LoanStatus
+from app.services.outbox import read_events, record_event
+from app.services.pricing import installment_factor
+from app.services.watermarks import lock_watermark
+
+# Outbox events that fund loans; each payload carries the lender_id
+FUNDING_EVENTS = {"loan.bid_accepted", "loan.funded", "pool.funded"}
+
+OUTBOX_WATERMARK = "ledger.outbox_cursor"
+ACCRUAL_WATERMARK = "ledger.accrued_day"
+
+INSTALLMENT_DAYS = 30
+# Amounts below this are treated as settled (float rounding)
+PAYMENT_TOLERANCE = 0.01
+
+
+def open_accounts(db: Session, batch_size: int = 500) -> int:
+    """
+    Open a repayment account for every newly funded loan.
+
+    Reads funding events from the outbox after the job's cursor, so each run
+    only sees loans funded since the previous one. Accounts are inserted with
+    ON CONFLICT DO NOTHING and the disbursement is posted only for rows that
+    were actually inserted, so replaying events is harmless.
+
+    Returns:
+        Number of accounts opened
+    """
+    opened = 0
+    while True:
+        watermark = lock_watermark(db, OUTBOX_WATERMARK)
+        events = read_events(db, after=watermark.value, limit=batch_size)
+        if not events:
+            db.commit()
+            return opened
+
+        loan_fundings: Dict[int, tuple] = {}
+        pool_fundings: Dict[int, tuple] = {}
+        for event in events:
+            if event.event_type not in FUNDING_EVENTS:
+                continue
+            funding = ((event.payload or {}).get("lender_id"), event.created_at.date())
+            if event.aggregate_type == "pool":
+                pool_fundings[event.aggregate_id] = funding
+            else:
+                loan_fundings[event.aggregate_id] = funding
+
+        rows = []
+        if loan_fundings or pool_fundings:
+            loans = db.query(LoanRequest).filter(
+                LoanRequest.status == LoanStatus.FUNDED,
+                LoanRequest.id.in_(list(loan_fundings)) | LoanRequest.pool_id.in_(list(pool_fundings)),
+            ).all()
+            for loan in loans:
+                lender_id, funded_on = loan_fundings.get(loan.id) or pool_fundings[loan.pool_id]
+                rows.append({
+                    "loan_id": loan.id,
+                    "borrower_id": loan.user_id,
+                    "lender_id": lender_id,
+                    "pool_id": loan.pool_id,
+                    "principal": loan.amount,
+                    "annual_rate": loan.interest_rate,
+                    "term_months": loan.term_months,
+                    "installment": loan.amount * installment_factor(loan.interest_rate, loan.term_months),
+                    "funded_day": funded_on.toordinal(),
+                    "next_due_day": funded_on.toordinal() + INSTALLMENT_DAYS,
+                    "installments_due": 0,
+                    "due_total": 0.0,
+                    "paid_total": 0.0,
+                    "balance": loan.amount,
+                    "days_past_due": 0,
+                    "status": AccountStatus.CURRENT.value,
+                })
+
+        if rows:
+            stmt = upsert_insert(db)(LoanAccount).on_conflict_do_nothing(index_elements=[LoanAccount.loan_id])
+            inserted = set(db.scalars(stmt.returning(LoanAccount.loan_id), rows))
+            db.execute(insert(LedgerEntry), [
+                {
+                    "loan_id": row["loan_id"],
+                    "entry_type": LedgerEntryType.DISBURSEMENT.value,
+                    "amount": row["principal"],
+                    "entry_date": date.fromordinal(row["funded_day"]),
+                }
+                for row in rows if row["loan_id"] in inserted
+            ])
+            opened += len(inserted)
+
+        watermark.value = events[-1].id
+        db.commit()
+
+
+def accrue_day(db: Session, day: date):
+    """
+    Accrue one day of interest and advance schedules for every open account.
+
+    Two set-based statements regardless of the number of loans: post the
+    interest entries to the ledger, then update every account's balance,
+    installments due and delinquency in a single UPDATE. The caller commits.
+    """
+    day_number = day.toordinal()
+    accruing = (LoanAccount.status != AccountStatus.PAID.value) & (LoanAccount.funded_day < day_number)
+    interest = LoanAccount.balance * LoanAccount.annual_rate / 365
+
+    db.execute(insert(LedgerEntry).from_select(
+        ["loan_id", "entry_type", "amount", "entry_date"],
+        select(
+            LoanAccount.loan_id,
+            literal(LedgerEntryType.INTEREST.value),
+            interest,
+            literal(day, Date),
+        ).where(accruing, LoanAccount.balance > 0),
+    ))
+
+    # Every SET expression below reads the row's values from before the update
+    installment_due = (LoanAccount.next_due_day <= day_number) & (LoanAccount.installments_due < LoanAccount.term_months)
+    due_total = case((installment_due, LoanAccount.due_total + LoanAccount.installment), else_=LoanAccount.due_total)
+    behind = LoanAccount.paid_total + PAYMENT_TOLERANCE < due_total
+
+    db.execute(update(LoanAccount).where(accruing).values(
+        balance=case((LoanAccount.balance > 0, LoanAccount.balance + interest), else_=LoanAccount.balance),
+        installments_due=case((installment_due, LoanAccount.installments_due + 1), else_=LoanAccount.installments_due),
+        next_due_day=case((installment_due, LoanAccount.next_due_day + INSTALLMENT_DAYS), else_=LoanAccount.next_due_day),
+        due_total=due_total,
+        days_past_due=case((behind, LoanAccount.days_past_due + 1), else_=0),
+        status=case((behind, AccountStatus.DELINQUENT.value), else_=AccountStatus.CURRENT.value),
+    ).execution_options(synchronize_session=False))
+
+
+def run_accrual(db: Session, today: Optional[date] = None) -> int:
+    """
+    Accrue every complete day since the last run (incremental from a watermark).
+
+    Each day is committed together with the watermark, so an interrupted run
+    resumes where it stopped and no day is ever accrued twice.
+
+    Returns:
+        Number of days accrued
+    """
+    today = today or date.today()
+    days = 0
+    while True:
+        watermark = lock_watermark(db, ACCRUAL_WATERMARK)
+        if not watermark.value:
+            # First run: start from the oldest account
+            first_funded = db.query(func.min(LoanAccount.funded_day)).scalar()
+            watermark.value = first_funded or today.toordinal() - 1
+
+        next_day = watermark.value + 1
+        if next_day >= today.toordinal():
+            db.commit()
+            return days
+
+        accrue_day(db, date.fromordinal(next_day))
+        watermark.value = next_day
+        db.commit()
+        days += 1
+
+
+def run_ledger_jobs(db: Session, today: Optional[date] = None) -> Dict[str, int]:
+    """Open accounts for new fundings, then accrue any complete days."""
+    return {
+        "accounts_opened": open_accounts(db),
+        "days_accrued": run_accrual(db, today),
+    }
+
+
+def record_payment(db: Session, account: LoanAccount, amount: float, today: Optional[date] = None) -> float:
+    """
+    Post a borrower payment. The caller holds the account row lock and commits.
+
+    Payments above the outstanding balance are capped. Paying the balance off
+    marks the account and the loan PAID.
+
+    Returns:
+        Amount actually applied
+    """
+    applied = min(amount, account.balance)
+    db.add(LedgerEntry(
+        loan_id=account.loan_id,
+        entry_type=LedgerEntryType.PAYMENT.value,
+        amount=-applied,
+        entry_date=today or date.today(),
+    ))
+
+    account.balance -= applied
+    account.paid_total += applied
+    if account.paid_total + PAYMENT_TOLERANCE >= account.due_total:
+        account.days_past_due = 0
+        account.status = AccountStatus.CURRENT.value
+
+    if account.balance <= PAYMENT_TOLERANCE:
+        account.balance = 0.0
+        account.status = AccountStatus.PAID.value
+        db.query(LoanRequest).filter(LoanRequest.id == account.loan_id).update(
+            {"status": LoanStatus.PAID}, synchronize_session=False
+        )
+        record_event(db, "loan.paid", "loan", account.loan_id, {"paid_total": account.paid_total})
+
+    return applied
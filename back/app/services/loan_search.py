@@ -0,0 +1,91 @@
+from sqlalchemy import func, literal_column, text
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.models.loan_request import LoanRequest, LoanStatus
+from app.models.profile import UserProfile
+from app.schemas.loan import LoanSortField, SortOrder
+
+# Sort keys map onto the (status, <column>) composite indexes of loan_requests
+SORT_COLUMNS = {
+    LoanSortField.RATE: LoanRequest.interest_rate,
+    LoanSortField.AMOUNT: LoanRequest.amount,
+    LoanSortField.RECENT: LoanRequest.created_at,
+}
+
+
+def _fts5_query(q: str) -> str:
+    """Quote every term so user input can't inject FTS5 query syntax."""
+    terms = [t.replace('"', '""') for t in q.split()]
+    return " ".join(f'"{t}"*' for t in terms if t)
+
+
+def _purpose_match(db: Session, q: str):
+    """
+    Build a full-text predicate on LoanRequest.purpose for the bound dialect.
+
+    Postgres matches against the GIN-indexed tsvector expression, SQLite goes
+    through the loan_requests_fts FTS5 table. Anything else falls back to ILIKE.
+    """
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        # Must match the ix_loan_requests_purpose_tsv expression to use the index
+        return func.to_tsvector(literal_column("'spanish'"), LoanRequest.purpose).op("@@")(
+            func.plainto_tsquery(literal_column("'spanish'"), q)
+        )
+
+    if dialect == "sqlite":
+        matches = text(
+            "SELECT rowid FROM loan_requests_fts WHERE loan_requests_fts MATCH :fts_query"
+        ).bindparams(fts_query=_fts5_query(q))
+        return LoanRequest.id.in_(matches)
+
+    return LoanRequest.purpose.ilike(f"%{q}%")
+
+
+def search_loan_requests(
+    db: Session,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    term_months: Optional[int] = None,
+    min_score: Optional[int] = None,
+    max_score: Optional[int] = None,
+    work_situation: Optional[str] = None,
+    q: Optional[str] = None,
+    sort_by: LoanSortField = LoanSortField.RECENT,
+    order: SortOrder = SortOrder.DESC,
+    limit: int = 100,
+    offset: int = 0,
+) -> List[LoanRequest]:
+    """
+    Search the PENDING loan marketplace.
+
+    Every filter is optional; filters are combined with AND. Results are
+    ordered by the requested field with id as a stable tie-breaker.
+    """
+    query = db.query(LoanRequest).filter(LoanRequest.status == LoanStatus.PENDING)
+
+    if min_amount is not None:
+        query = query.filter(LoanRequest.amount >= min_amount)
+    if max_amount is not None:
+        query = query.filter(LoanRequest.amount <= max_amount)
+    if term_months is not None:
+        query = query.filter(LoanRequest.term_months == term_months)
+    if min_score is not None:
+        query = query.filter(LoanRequest.credit_score >= min_score)
+    if max_score is not None:
+        query = query.filter(LoanRequest.credit_score <= max_score)
+    if work_situation:
+        query = query.join(UserProfile, UserProfile.user_id == LoanRequest.user_id).filter(
+            UserProfile.work_situation == work_situation
+        )
+    if q and q.strip():
+        query = query.filter(_purpose_match(db, q.strip()))
+
+    sort_column = SORT_COLUMNS[sort_by]
+    if order == SortOrder.ASC:
+        query = query.order_by(sort_column.asc(), LoanRequest.id.asc())
+    else:
+        query = query.order_by(sort_column.desc(), LoanRequest.id.desc())
+
+    return query.offset(offset).limit(limit).all()
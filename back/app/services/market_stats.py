@@ -0,0 +1,173 @@
+from datetime import date, datetime
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import delete, func, select, union_all
+from sqlalchemy.orm import Session
+from app.database import upsert_insert
+from app.models.archive import LoanRequestArchive
+from app.models.loan_request import LoanRequest, LoanStatus
+from app.models.market_rate_rollup import MarketRateRollup
+from app.services.pricing import score_band
+
+BUCKET_COLUMNS = ["day", "term_months", "score_band", "channel"]
+
+# Dimensions the analytics endpoint can group by (day is always included)
+ROLLUP_DIMENSIONS = {
+    "term_months": MarketRateRollup.term_months,
+    "score_band": MarketRateRollup.score_band,
+    "channel": MarketRateRollup.channel,
+}
+
+
+def _aggregate(fundings: Iterable[Tuple[date, int, str, str, float, float]]) -> List[dict]:
+    """Fold (day, term, band, channel, amount, rate) tuples into one row per bucket."""
+    buckets = {}
+    for day, term_months, band, channel, amount, rate in fundings:
+        key = (day, term_months, band, channel)
+        row = buckets.get(key)
+        if row is None:
+            buckets[key] = {
+                "day": day,
+                "term_months": term_months,
+                "score_band": band,
+                "channel": channel,
+                "deals": 1,
+                "volume": amount,
+                "rate_amount_sum": rate * amount,
+                "min_rate": rate,
+                "max_rate": rate,
+            }
+        else:
+            row["deals"] += 1
+            row["volume"] += amount
+            row["rate_amount_sum"] += rate * amount
+            row["min_rate"] = min(row["min_rate"], rate)
+            row["max_rate"] = max(row["max_rate"], rate)
+    return list(buckets.values())
+
+
+def _upsert_rollups(db: Session, rows: List[dict]):
+    """Add bucket increments with INSERT ... ON CONFLICT DO UPDATE (safe under concurrency)."""
+    if not rows:
+        return
+
+    insert = upsert_insert(db)
+    if db.get_bind().dialect.name == "postgresql":
+        least, greatest = func.least, func.greatest
+    else:
+        least, greatest = func.min, func.max  # SQLite: scalar min/max with two arguments
+
+    table = MarketRateRollup.__table__
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=BUCKET_COLUMNS,
+        set_={
+            "deals": table.c.deals + stmt.excluded.deals,
+            "volume": table.c.volume + stmt.excluded.volume,
+            "rate_amount_sum": table.c.rate_amount_sum + stmt.excluded.rate_amount_sum,
+            "min_rate": least(table.c.min_rate, stmt.excluded.min_rate),
+            "max_rate": greatest(table.c.max_rate, stmt.excluded.max_rate),
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(stmt, rows)
+
+
+def record_fundings(db: Session, loans: Iterable[LoanRequest], channel: str, now: Optional[datetime] = None):
+    """
+    Add newly funded loans to the daily market rollups.
+
+    Call in the same transaction that marks the loans FUNDED, after their
+    final interest rate is set; the caller commits.
+
+    Args:
+        db: Database session
+        loans: Loans that were just funded
+        channel: "loan" for direct funding, "pool" for pooled funding
+        now: Funding time (defaults to now)
+    """
+    day = (now or datetime.now()).date()
+    _upsert_rollups(db, _aggregate(
+        (day, loan.term_months, score_band(loan.credit_score), channel, loan.amount, loan.interest_rate)
+        for loan in loans
+    ))
+
+
+def rebuild_market_rollups(db: Session, batch_size: int = 5000) -> int:
+    """
+    Recompute all rollups from funded loans (one-off backfill).
+
+    Reads both the hot and the archive table, so settled loans moved by
+    app.services.archive keep counting. Funding time isn't stored, so each
+    loan is bucketed by its last update.
+
+    Returns:
+        Number of loans aggregated
+    """
+    db.execute(delete(MarketRateRollup))
+
+    def funded_from(model):
+        return select(
+            model.term_months,
+            model.credit_score,
+            model.pool_id,
+            model.amount,
+            model.interest_rate,
+            func.coalesce(model.updated_at, model.created_at).label("funded_at"),
+        ).where(model.status.in_([LoanStatus.FUNDED, LoanStatus.PAID]))
+
+    funded = db.execute(
+        union_all(funded_from(LoanRequest), funded_from(LoanRequestArchive)).execution_options(yield_per=batch_size)
+    )
+
+    loans_seen = 0
+
+    def fundings():
+        nonlocal loans_seen
+        for term_months, credit_score, pool_id, amount, rate, funded_at in funded:
+            loans_seen += 1
+            yield (funded_at.date(), term_months, score_band(credit_score), "pool" if pool_id else "loan", amount, rate)
+
+    # Folded while streaming; memory is bounded by the number of buckets
+    _upsert_rollups(db, _aggregate(fundings()))
+    db.commit()
+    return loans_seen
+
+
+def get_market_rates(
+    db: Session,
+    start: date,
+    end: date,
+    term_months: Optional[int] = None,
+    band: Optional[str] = None,
+    channel: Optional[str] = None,
+    group_by: Iterable[str] = ("term_months", "score_band", "channel"),
+) -> List[dict]:
+    """
+    Daily clearing-rate series read from the rollups.
+
+    Rows cover [start, end] and are grouped by day plus the requested
+    dimensions; dimensions left out are summed over. Cost depends on the
+    number of days and buckets, not on the size of the loan history.
+    """
+    dimensions = [ROLLUP_DIMENSIONS[d] for d in ROLLUP_DIMENSIONS if d in group_by]
+    volume = func.sum(MarketRateRollup.volume)
+
+    query = db.query(
+        MarketRateRollup.day,
+        *dimensions,
+        func.sum(MarketRateRollup.deals).label("deals"),
+        volume.label("volume"),
+        (func.sum(MarketRateRollup.rate_amount_sum) / func.nullif(volume, 0)).label("avg_rate"),
+        func.min(MarketRateRollup.min_rate).label("min_rate"),
+        func.max(MarketRateRollup.max_rate).label("max_rate"),
+    ).filter(MarketRateRollup.day >= start, MarketRateRollup.day <= end)
+
+    if term_months is not None:
+        query = query.filter(MarketRateRollup.term_months == term_months)
+    if band:
+        query = query.filter(MarketRateRollup.score_band == band)
+    if channel:
+        query = query.filter(MarketRateRollup.channel == channel)
+
+    query = query.group_by(MarketRateRollup.day, *dimensions).order_by(MarketRateRollup.day, *dimensions)
+    return [row._asdict() for row in query.all()]
@@ -0,0 +1,111 @@
+from sqlalchemy import event, insert, text
+from sqlalchemy.orm import Session
+from typing import Iterator, List
+from app.models.outbox_event import OutboxEvent
+
+# Arbitrary key for the Postgres advisory lock that serializes outbox writers
+OUTBOX_LOCK_KEY = 7_281_001
+
+# Session.info key of the events recorded in the current transaction
+_PENDING_EVENTS = "outbox_pending_events"
+
+
+def _lock_outbox(db: Session):
+    """
+    Serialize outbox writers until commit (Postgres only).
+
+    Sequence values are handed out at insert time but become visible at
+    commit time, so two concurrent writers could commit out of order and a
+    consumer reading "id > cursor" would skip the slower one. Holding a
+    transaction-level advisory lock makes commit order match id order.
+    Only taken by _insert_pending_events, right before the COMMIT, so the
+    lock is held for the INSERT and the COMMIT, however long the rest of
+    the transaction ran.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": OUTBOX_LOCK_KEY})
+
+
+def record_event(db: Session, event_type: str, aggregate_type: str, aggregate_id: int, payload: dict = None):
+    """
+    Append an event to the outbox in the caller's transaction.
+
+    Does not commit; the event is inserted when the caller commits and
+    becomes visible together with the state change. Rolling back drops it.
+    """
+    record_events(db, [{
+        "event_type": event_type,
+        "aggregate_type": aggregate_type,
+        "aggregate_id": aggregate_id,
+        "payload": payload,
+    }])
+
+
+def record_events(db: Session, events: List[dict]):
+    """
+    Append many events, inserted with a single INSERT when the caller
+    commits. Each dict has the keys of record_event(). Does not commit.
+    """
+    if events:
+        db.info.setdefault(_PENDING_EVENTS, []).extend(events)
+
+
+@event.listens_for(Session, "before_commit")
+def _insert_pending_events(session: Session):
+    events = session.info.pop(_PENDING_EVENTS, None)
+    if not events:
+        return
+    _lock_outbox(session)
+    session.execute(insert(OutboxEvent), [
+        {
+            "event_type": e["event_type"],
+            "aggregate_type": e["aggregate_type"],
+            "aggregate_id": e["aggregate_id"],
+            "payload": e.get("payload") or {},
+        }
+        for e in events
+    ])
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending_events(session: Session, transaction):
+    # Rolled back or closed without committing: the events go with the changes
+    if transaction.parent is None:
+        session.info.pop(_PENDING_EVENTS, None)
+
+
+def read_events(db: Session, after: int = 0, limit: int = 500) -> List[OutboxEvent]:
+    """
+    Read up to `limit` events with a sequence greater than `after`, in order.
+
+    Args:
+        db: Database session
+        after: Cursor, the id of the last event already processed (0 to start)
+        limit: Maximum number of events to return
+
+    Returns:
+        Events ordered by id; the last one's id is the next cursor
+    """
+    return (
+        db.query(OutboxEvent)
+        .filter(OutboxEvent.id > after)
+        .order_by(OutboxEvent.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def iter_events(db: Session, after: int = 0, batch_size: int = 500) -> Iterator[OutboxEvent]:
+    """
+    Iterate over every event after the cursor, fetching in batches until
+    caught up. In-process consumers persist the id of the last event they
+    handled and pass it back as `after` on the next run.
+    """
+    while True:
+        batch = read_events(db, after=after, limit=batch_size)
+        if not batch:
+            return
+        yield from batch
+        after = batch[-1].id
+        if len(batch) < batch_size:
+            return
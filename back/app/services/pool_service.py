@@ -1,60 +1,335 @@
-from sqlalchemy.orm import Session
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.orm import Session, selectinload
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from app.config import settings
+from app.database import SessionLocal
 from app.models.loan_pool import LoanPool, PoolStatus
 from app.models.loan_request import LoanRequest, LoanStatus
-from app.models.pool_bid import PoolBid
+from app.models.settlement_failure import SettlementFailure
+from app.schemas.pool import PoolResponse
+from app.services.pricing import score_band
+from app.services.outbox import record_event, record_events
+from app.services.market_stats import record_fundings
+from app.log import get_logger
 
-def process_expired_pools(db: Session):
+logger = get_logger(__name__)
+
+
+def summarize_pool(pool: LoanPool) -> Optional[PoolResponse]:
+    """Marketplace summary of a pool (its `loans` should be eager-loaded); None if it has no loans."""
+    loans = pool.loans
+    if not loans:
+        return None
+    return PoolResponse(
+        id=pool.id,
+        status=pool.status.value,  # Convert enum to string
+        created_at=pool.created_at,
+        member_count=len(loans),
+        total_amount=float(sum([l.amount for l in loans])),
+        avg_interest_rate=float(sum([l.interest_rate for l in loans]) / len(loans)),
+        avg_credit_score=float(sum([l.credit_score for l in loans if l.credit_score]) / len(loans)),
+    )
+
+
+def group_pool_candidates(
+    candidates,
+    target_amount: float,
+    max_members: int,
+    min_members: int,
+) -> Tuple[List[List[int]], List[int]]:
     """
-    Check for expired pools and process them.
-    If a pool has bids, accept the best one.
-    If not, close the pool.
+    Group pool candidates into risk-homogeneous pools.
+
+    Candidates are bucketed by (score band, term), each bucket is sorted by
+    amount (largest first) and filled next-fit: a pool closes as soon as it
+    reaches the target amount or the member cap. A trailing partial pool
+    keeps waiting for more loans until one of its loans is stale (has waited
+    past the configured maximum); it is then formed if it has at least
+    min_members loans, and otherwise released to direct bidding so it
+    doesn't wait forever.
+
+    Args:
+        candidates: (id, amount, term_months, credit_score, stale) rows
+        target_amount: Total amount at which a pool is considered full
+        max_members: Maximum loans per pool
+        min_members: Minimum loans for a partial pool to be formed
+
+    Returns:
+        (groups, each a list of loan ids; ids of loans released to direct bidding)
     """
-    now = datetime.now()
-    
-    # Find open pools that have expired
-    expired_pools = db.query(LoanPool).filter(
+    bands = {}
+    buckets = defaultdict(list)
+    for loan_id, amount, term_months, credit_score, stale in candidates:
+        band = bands.get(credit_score)
+        if band is None:
+            band = bands[credit_score] = score_band(credit_score)
+        buckets[(band, term_months)].append((amount, loan_id, stale))
+
+    groups, released = [], []
+    for members in buckets.values():
+        members.sort(reverse=True)
+
+        current, total = [], 0.0
+        for member in members:
+            current.append(member)
+            total += member[0]
+            if total >= target_amount or len(current) >= max_members:
+                groups.append(current)
+                current, total = [], 0.0
+
+        if any(stale for _, _, stale in current):
+            if len(current) >= min_members:
+                groups.append(current)
+            else:
+                released.extend(loan_id for _, loan_id, _ in current)
+
+    return [[loan_id for _, loan_id, _ in group] for group in groups], released
+
+
+def form_pools(db: Session, now: datetime = None) -> List[str]:
+    """
+    Periodic matching stage: assign waiting wants_pool loans to new pools.
+
+    Reads only the columns needed for matching, groups them in memory with
+    group_pool_candidates, then creates the pools and assigns loans with two
+    bulk statements. Each new pool gets expires_at set to the end of its
+    bidding window. Stale loans that can't fill a pool are released to direct
+    bidding (wants_pool=False).
+    """
+    now = now or datetime.now()
+    stale_cutoff = now - timedelta(hours=settings.pool_max_wait_hours)
+
+    candidates = db.query(
+        LoanRequest.id,
+        LoanRequest.amount,
+        LoanRequest.term_months,
+        LoanRequest.credit_score,
+        (LoanRequest.created_at < stale_cutoff).label("stale"),
+    ).filter(
+        LoanRequest.status == LoanStatus.PENDING,
+        LoanRequest.wants_pool.is_(True),
+        LoanRequest.pool_id.is_(None),
+    ).with_for_update(skip_locked=True).all()
+
+    groups, released = group_pool_candidates(
+        candidates,
+        target_amount=settings.pool_target_amount,
+        max_members=settings.pool_max_members,
+        min_members=settings.pool_min_members,
+    )
+    results = []
+    if released:
+        db.execute(
+            update(LoanRequest).where(LoanRequest.id.in_(released)).values(wants_pool=False)
+            .execution_options(synchronize_session=False)
+        )
+        record_events(db, [
+            {"event_type": "loan.pool_released", "aggregate_type": "loan", "aggregate_id": loan_id}
+            for loan_id in released
+        ])
+        results.append(f"{len(released)} stale loans released to direct bidding")
+    if not groups:
+        db.commit()
+        return results
+
+    expires_at = now + timedelta(hours=settings.pool_bidding_hours)
+    pool_ids = db.scalars(
+        insert(LoanPool).returning(LoanPool.id, sort_by_parameter_order=True),
+        [{"status": PoolStatus.OPEN, "expires_at": expires_at} for _ in groups],
+    ).all()
+
+    # Core executemany by primary key; skips ORM per-row bookkeeping
+    loans = LoanRequest.__table__
+    db.execute(
+        update(loans).where(loans.c.id == bindparam("loan_id")).values(pool_id=bindparam("new_pool_id")),
+        [
+            {"loan_id": loan_id, "new_pool_id": pool_id}
+            for pool_id, group in zip(pool_ids, groups)
+            for loan_id in group
+        ],
+    )
+    record_events(db, [
+        {
+            "event_type": "pool.formed",
+            "aggregate_type": "pool",
+            "aggregate_id": pool_id,
+            "payload": {"loan_ids": group, "expires_at": expires_at.isoformat()},
+        }
+        for pool_id, group in zip(pool_ids, groups)
+    ])
+    db.commit()
+
+    return results + [
+        f"Pool {pool_id} formed with {len(group)} loans"
+        for pool_id, group in zip(pool_ids, groups)
+    ]
+
+def _settle_pool(db: Session, pool_id: int, now: datetime) -> Optional[str]:
+    """
+    Settle one expired pool in the session's transaction (the caller commits).
+    If it has bids, accept the best one. If not, close the pool.
+
+    Returns:
+        Result message, or None if the pool is no longer settleable or is
+        being settled by another worker
+    """
+    pool = db.query(LoanPool).options(
+        selectinload(LoanPool.bids),
+        selectinload(LoanPool.loans),
+    ).filter(
+        LoanPool.id == pool_id,
         LoanPool.status == PoolStatus.OPEN,
         LoanPool.expires_at < now
-    ).all()
+    ).with_for_update(skip_locked=True).first()
     
-    results = []
+    if not pool:
+        return None
     
-    for pool in expired_pools:
-        print(f"Processing expired pool {pool.id}...")
+    logger.debug("Processing expired pool", extra={"pool_id": pool.id})
+    
+    bids = pool.bids
+    
+    if bids:
+        # Find the best bid (lowest interest rate)
+        # In case of tie, pick the earliest one (by ID or created_at)
+        best_bid = min(bids, key=lambda b: (b.interest_rate, b.created_at))
         
-        # Get all bids for this pool
-        bids = db.query(PoolBid).filter(PoolBid.pool_id == pool.id).all()
+        logger.debug("Found winning bid", extra={
+            "pool_id": pool.id, "rate": best_bid.interest_rate, "lender_id": best_bid.lender_id,
+        })
         
-        if bids:
-            # Find the best bid (lowest interest rate)
-            # In case of tie, pick the earliest one (by ID or created_at)
-            best_bid = min(bids, key=lambda b: (b.interest_rate, b.created_at))
-            
-            print(f"  Found winning bid: {best_bid.interest_rate*100}% by lender {best_bid.lender_id}")
-            
-            # Update pool
-            pool.status = PoolStatus.FUNDED
-            pool.winning_bid_id = best_bid.id
-            
-            # Update all loans in the pool
-            loans = db.query(LoanRequest).filter(LoanRequest.pool_id == pool.id).all()
-            for loan in loans:
-                loan.status = LoanStatus.FUNDED
-                loan.interest_rate = best_bid.interest_rate
-                # Note: In a real app, we might want to record who funded it specifically for the loan
-                # But for now, the pool association is enough
-            
-            results.append(f"Pool {pool.id} funded at {best_bid.interest_rate*100}%")
-            
-        else:
-            # No bids, close the pool? Or leave it open?
-            # For now, let's close it to avoid stuck pools
-            print(f"  No bids found. Closing pool {pool.id}.")
-            pool.status = PoolStatus.CLOSED
-            results.append(f"Pool {pool.id} closed (no bids)")
-            
-    if expired_pools:
-        db.commit()
+        # Update pool
+        pool.status = PoolStatus.FUNDED
+        pool.winning_bid_id = best_bid.id
+        
+        # Update all loans in the pool
+        for loan in pool.loans:
+            loan.status = LoanStatus.FUNDED
+            loan.interest_rate = best_bid.interest_rate
+            # Note: In a real app, we might want to record who funded it specifically for the loan
+            # But for now, the pool association is enough
         
+        record_fundings(db, pool.loans, channel="pool", now=now)
+        record_event(db, "pool.funded", "pool", pool.id, {
+            "bid_id": best_bid.id,
+            "lender_id": best_bid.lender_id,
+            "interest_rate": best_bid.interest_rate,
+        })
+        return f"Pool {pool.id} funded at {best_bid.interest_rate*100}%"
+        
+    else:
+        # No bids, close the pool? Or leave it open?
+        # For now, let's close it to avoid stuck pools
+        logger.debug("No bids found, closing pool", extra={"pool_id": pool.id})
+        pool.status = PoolStatus.CLOSED
+        record_event(db, "pool.closed", "pool", pool.id)
+        return f"Pool {pool.id} closed (no bids)"
+
+
+def settle_pool(pool_id: int, now: datetime, session_factory=SessionLocal) -> Tuple[Optional[str], float]:
+    """
+    Settle one pool in its own transaction, retrying failed attempts.
+
+    Args:
+        pool_id: Pool to settle
+        now: Reference time for expiry
+        session_factory: Creates the worker's session
+
+    Returns:
+        (result message or None, seconds spent on the successful attempt)
+
+    Raises:
+        Exception: The last error once `settlement_max_attempts` attempts failed
+    """
+    for attempt in range(1, settings.settlement_max_attempts + 1):
+        db = session_factory()
+        try:
+            start = time.perf_counter()
+            result = _settle_pool(db, pool_id, now)
+            # A successful settlement clears any earlier failures
+            db.query(SettlementFailure).filter(SettlementFailure.pool_id == pool_id).delete()
+            db.commit()
+            return result, time.perf_counter() - start
+        except Exception:
+            db.rollback()
+            if attempt == settings.settlement_max_attempts:
+                raise
+        finally:
+            db.close()
+        time.sleep(settings.settlement_retry_backoff_seconds * 2 ** (attempt - 1))
+
+
+def _record_settlement_failure(db: Session, pool_id: int, error: Exception, now: datetime) -> bool:
+    """Count a failed settlement run; returns True if the pool is now dead-lettered."""
+    failure = db.query(SettlementFailure).filter(SettlementFailure.pool_id == pool_id).first()
+    if not failure:
+        failure = SettlementFailure(pool_id=pool_id, attempts=0, first_failed_at=now)
+        db.add(failure)
+    
+    failure.attempts += 1
+    failure.last_error = f"{type(error).__name__}: {error}"
+    failure.last_failed_at = now
+    if failure.attempts >= settings.settlement_dead_letter_after:
+        failure.dead_lettered_at = now
+    
+    db.commit()
+    return failure.dead_lettered_at is not None
+
+
+def process_expired_pools(db: Session, now: Optional[datetime] = None, session_factory=SessionLocal):
+    """
+    Settle every expired pool.
+
+    Each pool is settled in its own transaction by a bounded thread pool, so
+    a slow or failing pool neither delays nor rolls back the others. Failed
+    pools are retried (see settle_pool) and counted in settlement_failures;
+    dead-lettered pools are skipped.
+
+    Args:
+        db: Database session used to find expired pools and record failures
+        now: Reference time (defaults to now)
+        session_factory: Creates one session per settlement attempt
+
+    Returns:
+        List of result messages, with per-pool timing
+    """
+    now = now or datetime.now()
+    
+    dead_lettered = select(SettlementFailure.pool_id).where(SettlementFailure.dead_lettered_at.isnot(None))
+    pool_ids = [row[0] for row in db.query(LoanPool.id).filter(
+        LoanPool.status == PoolStatus.OPEN,
+        LoanPool.expires_at < now,
+        LoanPool.id.not_in(dead_lettered),
+    ).order_by(LoanPool.expires_at)]
+    db.commit()
+    
+    if not pool_ids:
+        return []
+    
+    results = []
+    start = time.perf_counter()
+    
+    with ThreadPoolExecutor(max_workers=min(settings.settlement_workers, len(pool_ids))) as executor:
+        futures = {executor.submit(settle_pool, pool_id, now, session_factory): pool_id for pool_id in pool_ids}
+        
+        for future in as_completed(futures):
+            pool_id = futures[future]
+            try:
+                result, elapsed = future.result()
+                if result:
+                    results.append(f"{result} ({elapsed * 1000:.0f} ms)")
+            except Exception as e:
+                logger.warning("Error settling pool", extra={"pool_id": pool_id, "error": str(e)})
+                if _record_settlement_failure(db, pool_id, e, now):
+                    results.append(f"Pool {pool_id} dead-lettered after repeated failures: {e}")
+                else:
+                    results.append(f"Pool {pool_id} failed, will retry: {e}")
+    
+    logger.info("Settled expired pools", extra={
+        "pools": len(pool_ids), "elapsed_ms": round((time.perf_counter() - start) * 1000),
+    })
     return results
@@ -0,0 +1,134 @@
+from bisect import bisect_left
+from typing import Dict, NamedTuple, Optional, Tuple
+
+# Pricing parameters are tuples: replace them (don't mutate) and the grid is rebuilt
+
+# Credit score bands, best first: (minimum score, band label, base annual rate)
+SCORE_BANDS = (
+    (700, "A", 0.12),
+    (600, "B", 0.18),
+    (0, "C", 0.25),
+)
+
+# Score assumed when the profile has none yet
+DEFAULT_SCORE = 500
+
+
+def score_band(score: Optional[int]) -> str:
+    """Return the risk band label ("A", "B" or "C") for a credit score."""
+    score = score if score is not None else DEFAULT_SCORE
+    for min_score, band, _ in SCORE_BANDS:
+        if score >= min_score:
+            return band
+    return SCORE_BANDS[-1][1]
+
+
+def base_rate_for_score(score: Optional[int]) -> float:
+    """Return the starting annual interest rate offered for a credit score."""
+    score = score if score is not None else DEFAULT_SCORE
+    for min_score, _, rate in SCORE_BANDS:
+        if score >= min_score:
+            return rate
+    return SCORE_BANDS[-1][2]
+
+
+# Terms offered to borrowers (months); the grid covers these, other terms are priced on the fly
+TERM_OPTIONS = (6, 12, 24, 36)
+
+# Amount buckets: (upper bound inclusive, annual rate adjustment), ascending.
+# No adjustments yet: every amount is priced at its band's base rate.
+AMOUNT_BUCKETS = (
+    (1_000_000, 0.0),
+    (5_000_000, 0.0),
+    (10_000_000, 0.0),
+    (float("inf"), 0.0),
+)
+
+# Rates are quoted and stored with this many decimals (0.1825 = 18.25%)
+RATE_DECIMALS = 6
+
+
+class PriceCell(NamedTuple):
+    annual_rate: float
+    payment_factor: float  # Monthly installment per unit of principal (French amortization)
+
+
+def installment_factor(annual_rate: float, term_months: int) -> float:
+    """Monthly installment per unit of principal (French amortization)."""
+    monthly_rate = annual_rate / 12
+    if monthly_rate:
+        return monthly_rate / (1 - (1 + monthly_rate) ** -term_months)
+    return 1 / term_months
+
+
+def _price_cell(base_rate: float, term_months: int, amount_adjustment: float) -> PriceCell:
+    annual_rate = round(max(base_rate + amount_adjustment, 0.0), RATE_DECIMALS)
+    return PriceCell(annual_rate, installment_factor(annual_rate, term_months))
+
+
+_grid: Dict[Tuple[str, int, int], PriceCell] = {}
+_bucket_bounds: Tuple[float, ...] = ()
+# The parameter tuples the grid was built from, compared by identity on each lookup
+_grid_params: Tuple[Optional[tuple], ...] = (None, None, None)
+
+
+def _refresh_grid():
+    global _grid, _bucket_bounds, _grid_params
+    if SCORE_BANDS is _grid_params[0] and TERM_OPTIONS is _grid_params[1] and AMOUNT_BUCKETS is _grid_params[2]:
+        return
+    _grid = {
+        (band, term, bucket): _price_cell(base_rate, term, adjustment)
+        for _, band, base_rate in SCORE_BANDS
+        for term in TERM_OPTIONS
+        for bucket, (_, adjustment) in enumerate(AMOUNT_BUCKETS)
+    }
+    _bucket_bounds = tuple(upper for upper, _ in AMOUNT_BUCKETS)
+    _grid_params = (SCORE_BANDS, TERM_OPTIONS, AMOUNT_BUCKETS)
+
+
+def get_pricing_grid() -> Dict[Tuple[str, int, int], PriceCell]:
+    """
+    Return the (band, term, amount bucket) -> PriceCell grid.
+
+    Built in one pass over every combination and kept in memory; it is only
+    rebuilt when one of the pricing parameters above is replaced.
+    """
+    _refresh_grid()
+    return _grid
+
+
+def amount_bucket(amount: float) -> int:
+    """Return the index of the amount bucket an amount falls into."""
+    _refresh_grid()
+    return min(bisect_left(_bucket_bounds, amount), len(_bucket_bounds) - 1)
+
+
+def quote(score: Optional[int], term_months: int, amount: float) -> dict:
+    """
+    Price a loan without writing anything.
+
+    Args:
+        score: Borrower credit score (None uses DEFAULT_SCORE)
+        term_months: Loan term
+        amount: Principal
+
+    Returns:
+        Dictionary with the band, annual rate, monthly payment and totals
+    """
+    band = score_band(score)
+    bucket = amount_bucket(amount)
+    cell = get_pricing_grid().get((band, term_months, bucket))
+    if cell is None:
+        cell = _price_cell(base_rate_for_score(score), term_months, AMOUNT_BUCKETS[bucket][1])
+
+    monthly_payment = amount * cell.payment_factor
+    total_payment = monthly_payment * term_months
+    return {
+        "score_band": band,
+        "amount": amount,
+        "term_months": term_months,
+        "annual_rate": cell.annual_rate,
+        "monthly_payment": monthly_payment,
+        "total_payment": total_payment,
+        "total_interest": total_payment - amount,
+    }
@@ -0,0 +1,147 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple
+from app.config import settings
+from app.log import get_logger
+
+logger = get_logger(__name__)
+
+# (key, tokens added per second, bucket size)
+Bucket = Tuple[str, float, float]
+
+
+class RateLimitBackend(ABC):
+    """
+    Token-bucket storage. `take` consumes one token from each of `buckets`
+    only if every one of them has a token, and returns 0; otherwise it
+    consumes nothing and returns the seconds until all of them will.
+    """
+
+    @abstractmethod
+    async def take(self, buckets: Sequence[Bucket]) -> float:
+        ...
+
+    async def close(self):
+        pass
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process buckets. Exact for a single worker and for tests; with several
+    workers each one enforces the limits independently.
+    """
+
+    def __init__(self, max_keys: int = 100_000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+
+    async def take(self, buckets: Sequence[Bucket]) -> float:
+        now = self.clock()
+        refilled = {}
+        retry_after = 0.0
+        for key, rate, capacity in buckets:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            refilled[key] = tokens
+            if tokens < 1:
+                retry_after = max(retry_after, (1 - tokens) / rate)
+
+        for key, tokens in refilled.items():
+            self._buckets[key] = (tokens if retry_after else tokens - 1, now)
+            self._buckets.move_to_end(key)
+        # Least recently used buckets are the fullest; dropping one just resets it
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+        return retry_after
+
+
+# Refill and take atomically on the Redis server, using its clock.
+# ARGV holds (rate, capacity) for each key, in order.
+_REDIS_TOKEN_BUCKET = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local tokens = {}
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local capacity = tonumber(ARGV[2 * i])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local ts = tonumber(bucket[2]) or now
+    tokens[i] = math.min(capacity, (tonumber(bucket[1]) or capacity) + math.max(0, now - ts) * rate)
+    if tokens[i] < 1 then
+        retry_after = math.max(retry_after, (1 - tokens[i]) / rate)
+    end
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local capacity = tonumber(ARGV[2 * i])
+    if retry_after == 0 then
+        tokens[i] = tokens[i] - 1
+    end
+    redis.call('HSET', key, 'tokens', tokens[i], 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000) + 1000)
+end
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Buckets shared by every worker through Redis (requires the `redis` package)."""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+        self._script = self._redis.register_script(_REDIS_TOKEN_BUCKET)
+
+    async def take(self, buckets: Sequence[Bucket]) -> float:
+        keys = [self.prefix + key for key, _, _ in buckets]
+        args = [value for _, rate, capacity in buckets for value in (rate, capacity)]
+        return float(await self._script(keys=keys, args=args))
+
+    async def close(self):
+        await self._redis.aclose()
+
+
+class RateLimiter:
+    """Token-bucket rate limiter over a pluggable backend."""
+
+    def __init__(self, backend: RateLimitBackend):
+        self.backend = backend
+
+    async def hit(self, *buckets: Bucket) -> float:
+        """
+        Consume one token from every bucket, or from none if any is empty.
+
+        Args:
+            buckets: (key, rate, capacity) tuples; key identifies the bucket
+                (e.g. "bid:lender:<user_id>"), rate is tokens added per
+                second and capacity the bucket size (maximum burst)
+
+        Returns:
+            0 if allowed, otherwise seconds to wait before retrying
+        """
+        try:
+            return await self.backend.take(buckets)
+        except Exception as e:
+            # A limiter outage must not take bidding down with it
+            # Once per request while the backend is down: sampled
+            logger.warning("Rate limiter error, allowing request", extra={"error": str(e), "sample_rate": 0.01})
+            return 0.0
+
+
+def build_backend(name: str, redis_url: Optional[str] = None) -> RateLimitBackend:
+    if name == "memory":
+        return MemoryRateLimitBackend()
+    if name == "redis":
+        if not redis_url:
+            raise ValueError("RATE_LIMIT_REDIS_URL is required for the redis rate limit backend")
+        return RedisRateLimitBackend(redis_url)
+    raise ValueError(f"Unknown rate limit backend: {name}")
+
+
+rate_limiter = RateLimiter(build_backend(settings.rate_limit_backend, settings.rate_limit_redis_url))
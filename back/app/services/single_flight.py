@@ -0,0 +1,65 @@
+import asyncio
+from typing import Callable, Dict, Hashable
+from app.database import QueryCancelled
+
+# name -> instance, for GET /diagnostics
+SINGLE_FLIGHTS: Dict[str, "SingleFlight"] = {}
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical reads within this process.
+
+    The first caller for a key runs `fetch` in a thread; callers arriving for
+    the same key while it's in flight wait for it and share its result (or
+    its exception) instead of running their own queries. Nothing is cached
+    once the fetch completes, so a result is never older than the request
+    that waited for it. If the fetch was cancelled because its own client
+    disconnected, waiting callers fetch again instead of failing.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.fetches = 0
+        self.shared = 0
+        SINGLE_FLIGHTS[name] = self
+
+    async def do(self, key: Hashable, fetch: Callable, *args):
+        while True:
+            future = self._inflight.get(key)
+            if future is None:
+                return await self._lead(key, fetch, *args)
+
+            self.shared += 1
+            try:
+                # shield: a waiter giving up must not cancel the fetch for the others
+                return await asyncio.shield(future)
+            except QueryCancelled as e:
+                if e.reason != "disconnected":
+                    raise
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # This caller itself was cancelled
+
+    async def _lead(self, key: Hashable, fetch: Callable, *args):
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.fetches += 1
+        try:
+            result = await asyncio.to_thread(fetch, *args)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Consumed here even if nobody was waiting
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    def status(self) -> dict:
+        return {"in_flight": len(self._inflight), "fetches": self.fetches, "shared": self.shared}
@@ -0,0 +1,27 @@
+from sqlalchemy.orm import Session
+from app.database import upsert_insert
+from app.models.job_watermark import JobWatermark
+
+
+def lock_watermark(db: Session, name: str, default: int = 0) -> JobWatermark:
+    """
+    Return a job's watermark row, locked until the transaction ends.
+
+    Creates the row with `default` if the job never ran. Holding the lock
+    makes concurrent runners of the same job (other workers or processes)
+    wait instead of processing the same range twice.
+
+    Args:
+        db: Database session
+        name: Job name (e.g. "ledger.accrued_day")
+        default: Initial value for a new watermark
+
+    Returns:
+        The JobWatermark row; set `.value` and commit to advance it
+    """
+    db.execute(
+        upsert_insert(db)(JobWatermark)
+        .values(name=name, value=default)
+        .on_conflict_do_nothing(index_elements=[JobWatermark.name])
+    )
+    return db.query(JobWatermark).filter(JobWatermark.name == name).with_for_update().one()
@@ -0,0 +1,19 @@
+"""
+Rebuild market_rate_rollups from funded loans, hot and archived.
+
+Rollups are maintained incrementally when loans are funded; run this once
+after deploying them on a database with existing history (or to repair them):
+
+    python backfill_market_rollups.py
+"""
+from app.database import SessionLocal, init_db
+from app.services.market_stats import rebuild_market_rollups
+
+init_db()
+db = SessionLocal()
+
+try:
+    count = rebuild_market_rollups(db)
+    print(f"Rebuilt market rollups from {count} funded loans")
+finally:
+    db.close()
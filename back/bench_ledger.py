@@ -0,0 +1,75 @@
+"""
+Benchmark the daily accrual job.
+
+Inserts N funded loan accounts into the configured database, all funded DAYS
+days ago, then runs the accrual from a fresh watermark and reports how long
+each day takes. Every day is two set-based statements, so time per day grows
+with N but not with the number of past days. Point DATABASE_URL at a scratch
+database:
+
+    DATABASE_URL=sqlite:///bench.db python bench_ledger.py 1000000 3
+"""
+import random
+import sys
+import time
+from datetime import date
+
+from sqlalchemy import delete, insert
+
+from app.database import SessionLocal, init_db
+from app.models.job_watermark import JobWatermark
+from app.models.loan_account import LoanAccount, AccountStatus
+from app.services.ledger import ACCRUAL_WATERMARK, INSTALLMENT_DAYS, run_accrual
+from app.services.pricing import installment_factor
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+DAYS = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+init_db()
+db = SessionLocal()
+
+try:
+    rng = random.Random(42)
+    # Due on the last accrued day, so that day also posts an installment for every loan
+    funded_day = date.today().toordinal() - DAYS - 1
+    first_id = 10_000_000
+    db.execute(delete(LoanAccount).where(LoanAccount.loan_id >= first_id))
+    for start in range(0, N, 50_000):
+        rows = []
+        for i in range(start, min(N, start + 50_000)):
+            amount = float(rng.randrange(500_000, 8_000_000, 100_000))
+            rate = rng.uniform(0.12, 0.30)
+            term = rng.choice([6, 12, 24, 36])
+            rows.append({
+                "loan_id": first_id + i,
+                "borrower_id": f"bench_user_{i % 1000}",
+                "lender_id": f"bench_lender_{i % 100}",
+                "principal": amount,
+                "annual_rate": rate,
+                "term_months": term,
+                "installment": amount * installment_factor(rate, term),
+                "funded_day": funded_day,
+                "next_due_day": funded_day + min(DAYS, INSTALLMENT_DAYS),
+                "balance": amount,
+                "status": AccountStatus.CURRENT.value,
+            })
+        db.execute(insert(LoanAccount), rows)
+        db.commit()
+    print(f"Inserted {N} accounts funded {DAYS + 1} days ago")
+
+    db.execute(delete(JobWatermark).where(JobWatermark.name == ACCRUAL_WATERMARK))
+    db.execute(insert(JobWatermark).values(name=ACCRUAL_WATERMARK, value=funded_day))
+    db.commit()
+
+    start = time.perf_counter()
+    days = run_accrual(db)
+    elapsed = time.perf_counter() - start
+    print(f"Accrued {days} days in {elapsed:.2f} s ({elapsed / max(days, 1):.2f} s/day, "
+          f"{N * days / elapsed:,.0f} loan-days/s)")
+
+    counts = {}
+    for status in AccountStatus:
+        counts[status.value] = db.query(LoanAccount).filter(LoanAccount.status == status.value).count()
+    print(f"Accounts by status: {counts}")
+finally:
+    db.close()
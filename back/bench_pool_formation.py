@@ -0,0 +1,48 @@
+"""
+Benchmark the pool formation stage.
+
+Inserts N pending wants_pool loans into the configured database, then times
+form_pools(). Point DATABASE_URL at a scratch database before running:
+
+    DATABASE_URL=sqlite:///bench.db python bench_pool_formation.py 50000
+"""
+import random
+import sys
+import time
+
+from sqlalchemy import insert
+
+from app.database import SessionLocal, init_db
+from app.models.loan_request import LoanRequest, LoanStatus
+from app.services.pool_service import form_pools
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+init_db()
+db = SessionLocal()
+
+try:
+    rng = random.Random(42)
+    db.execute(insert(LoanRequest), [
+        {
+            "user_id": f"bench_user_{i % 1000}",
+            "amount": float(rng.randrange(500_000, 8_000_000, 100_000)),
+            "term_months": rng.choice([6, 12, 24, 36]),
+            "interest_rate": 0.18,
+            "status": LoanStatus.PENDING,
+            "credit_score": rng.randint(450, 850),
+            "purpose": "Benchmark",
+            "wants_pool": True,
+        }
+        for i in range(N)
+    ])
+    db.commit()
+    print(f"Inserted {N} pending pooled loans")
+
+    start = time.perf_counter()
+    results = form_pools(db)
+    elapsed = time.perf_counter() - start
+
+    print(f"Formed {len(results)} pools in {elapsed * 1000:.1f} ms ({N / elapsed:,.0f} loans/s)")
+finally:
+    db.close()
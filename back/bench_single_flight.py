@@ -0,0 +1,100 @@
+"""
+Benchmark request coalescing on the hot detail endpoints.
+
+Fires bursts of N concurrent GET /pools/{id} and GET /loans/{id} for the same
+id through the ASGI app (no server needed) and counts the SQL statements
+each burst ran, with COALESCE_READS on and off. With coalescing the query
+count should stay roughly flat as N grows; without it, it grows with N.
+Each statement sleeps for a simulated network round trip (ms, default 2).
+Point DATABASE_URL at a scratch database:
+
+    DATABASE_URL=sqlite:///bench.db python bench_single_flight.py 2
+"""
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import event, insert
+
+from app.config import settings
+from app.database import SessionLocal, engine, read_engine, init_db
+from app.main import app
+from app.models.loan_bid import LoanBid
+from app.models.loan_pool import LoanPool
+from app.models.loan_request import LoanRequest, LoanStatus
+from app.models.pool_bid import PoolBid
+from app.models.profile import UserProfile
+from app.models.user import User
+
+ROUND_TRIP = (float(sys.argv[1]) if len(sys.argv) > 1 else 2.0) / 1000
+READERS = [1, 10, 50, 200, 500]
+
+init_db()
+db = SessionLocal()
+try:
+    db.add(User(id="bench_borrower", email="bench_borrower@example.com", first_name="Bench"))
+    db.add(UserProfile(user_id="bench_borrower", work_situation="Empleado", score=700))
+    pool = LoanPool(expires_at=datetime.now() + timedelta(hours=1))
+    db.add(pool)
+    db.flush()
+    loans = db.scalars(insert(LoanRequest).returning(LoanRequest.id), [
+        {
+            "user_id": "bench_borrower",
+            "amount": 2_000_000.0,
+            "term_months": 12,
+            "interest_rate": 0.18,
+            "status": LoanStatus.PENDING,
+            "credit_score": 700,
+            "purpose": "Benchmark",
+            "pool_id": pool.id if i else None,
+        }
+        for i in range(6)
+    ]).all()
+    db.execute(insert(LoanBid), [{"loan_id": loans[0], "lender_id": "bench_borrower", "interest_rate": 0.17} for _ in range(50)])
+    db.execute(insert(PoolBid), [{"pool_id": pool.id, "lender_id": "bench_borrower", "interest_rate": 0.16} for _ in range(50)])
+    db.commit()
+    paths = {"pool": f"/pools/{pool.id}", "loan": f"/loans/{loans[0]}"}
+finally:
+    db.close()
+
+statements = 0
+
+
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    global statements
+    statements += 1
+    time.sleep(ROUND_TRIP)
+
+
+for target in {engine, read_engine}:
+    event.listen(target, "before_cursor_execute", count_statement)
+
+
+async def burst(client: httpx.AsyncClient, path: str, readers: int):
+    global statements
+    statements = 0
+    start = time.perf_counter()
+    responses = await asyncio.gather(*[client.get(path) for _ in range(readers)])
+    elapsed = time.perf_counter() - start
+    assert all(r.status_code == 200 for r in responses), {r.status_code for r in responses}
+    return statements, elapsed
+
+
+async def main():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, path in paths.items():
+            print(f"\nGET {path} ({ROUND_TRIP * 1000:g} ms per statement)")
+            print(f"{'readers':>8} {'queries (coalesced)':>20} {'ms':>8} {'queries (off)':>14} {'ms':>8}")
+            for readers in READERS:
+                row = [f"{readers:>8}"]
+                for coalesce in (True, False):
+                    settings.coalesce_reads = coalesce
+                    queries, elapsed = await burst(client, path, readers)
+                    row.append(f"{queries:>{20 if coalesce else 14}} {elapsed * 1000:>8.0f}")
+                print(" ".join(row))
+
+
+asyncio.run(main())
@@ -3,7 +3,7 @@ Script to drop and recreate all database tables.
 Run this when you've added new columns to models.
 """
 from app.database import Base, engine
-from app.models import user, profile, loan_request, loan_bid, loan_pool, pool_bid
+from app.models import user, profile, loan_request, loan_bid, loan_pool, pool_bid, outbox_event, market_rate_rollup, archive, settlement_failure, job_watermark, ledger_entry, loan_account, job
 from sqlalchemy import text
 
 print("Dropping all tables with CASCADE...")
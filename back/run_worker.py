@@ -0,0 +1,29 @@
+"""
+Standalone background job worker.
+
+Runs the same queue worker as the API processes, without HTTP. Start as many
+as needed; they share the jobs table and never run the same job twice:
+
+    python run_worker.py --concurrency 8
+"""
+import argparse
+import asyncio
+
+from app.database import init_db
+from app.log import configure_logging, get_logger
+from app.services.jobs import JobWorker
+from app import jobs  # noqa: F401 - registers the background jobs
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--concurrency", type=int, default=None, help="Jobs at once (default: JOB_WORKER_CONCURRENCY)")
+parser.add_argument("--poll-seconds", type=float, default=None, help="Default: JOB_POLL_SECONDS")
+args = parser.parse_args()
+
+configure_logging()
+init_db()
+worker = JobWorker(concurrency=args.concurrency, poll_seconds=args.poll_seconds)
+get_logger("app.worker").info("Job worker started", extra={"worker_id": worker.worker_id, "concurrency": worker.concurrency})
+try:
+    asyncio.run(worker.run())
+except KeyboardInterrupt:
+    pass
@@ -0,0 +1,240 @@
+"""
+In-process auction market simulator.
+
+Drives virtual borrowers and lenders directly against the route handlers and
+services (no HTTP) on a simulated clock, then reports settlement throughput,
+bid acceptance and lock contention. Point DATABASE_URL at a scratch database:
+
+    DATABASE_URL=sqlite:///sim.db python simulate_market.py --borrowers 5000 --lenders 500 --hours 96
+
+Each tick (default: one simulated hour):
+  1. New borrowers create loan requests (some want a pool).
+  2. Lenders bid concurrently (--threads) on open loans and pools, undercutting
+     the best rate they last saw, so stale views produce rejected bids.
+  3. Borrowers accept the best bid on direct loans after --accept-after hours.
+  4. form_pools() and process_expired_pools() run with the simulated time.
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import func, insert, update
+from sqlalchemy.exc import OperationalError
+
+from app.config import settings
+from app.database import SessionLocal, engine, init_db, pool_status
+from app.models.user import User
+from app.models.profile import UserProfile
+from app.models.loan_request import LoanRequest, LoanStatus
+from app.models.loan_bid import LoanBid
+from app.models.loan_pool import LoanPool, PoolStatus
+from app.models.pool_bid import PoolBid
+from app.routers.loans import create_loan_request, place_bid, accept_bid
+from app.routers.pools import place_pool_bid
+from app.schemas.loan import LoanRequestCreate, LoanBidCreate
+from app.schemas.pool import PoolBidCreate
+from app.services.pool_service import form_pools, process_expired_pools
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--borrowers", type=int, default=2000)
+parser.add_argument("--lenders", type=int, default=300)
+parser.add_argument("--hours", type=int, default=72, help="Simulated duration")
+parser.add_argument("--tick-minutes", type=int, default=60)
+parser.add_argument("--bids-per-lender", type=float, default=0.5, help="Average bids per lender per tick")
+parser.add_argument("--pool-share", type=float, default=0.5, help="Share of loans that want a pool")
+parser.add_argument("--accept-after", type=int, default=12, help="Hours before a borrower accepts the best bid")
+parser.add_argument("--threads", type=int, default=8, help="Concurrent lenders")
+parser.add_argument("--seed", type=int, default=42)
+args = parser.parse_args()
+
+rng = random.Random(args.seed)
+_thread_state = threading.local()
+
+
+def call(handler, **kwargs):
+    """Run an async route handler with its own session, as a request would."""
+    if not hasattr(_thread_state, "loop"):
+        _thread_state.loop = asyncio.new_event_loop()
+    db = SessionLocal()
+    try:
+        return _thread_state.loop.run_until_complete(handler(db=db, **kwargs))
+    finally:
+        db.close()
+
+
+def user(user_id):
+    return {"id": user_id}
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.outcomes = Counter()
+        self.latencies = []
+
+    def record(self, outcome: str, elapsed: float):
+        with self._lock:
+            self.outcomes[outcome] += 1
+            self.latencies.append(elapsed)
+
+
+bid_stats = Stats()
+
+
+def bid(lender_id, kind, target_id, seen_best):
+    # Undercut the best rate this lender saw at the start of the tick
+    rate = round(seen_best - rng.uniform(0.0005, 0.01), 4)
+    start = time.perf_counter()
+    try:
+        if kind == "loan":
+            call(place_bid, loan_id=target_id, bid=LoanBidCreate(interest_rate=rate), _=None, current_user=user(lender_id))
+        else:
+            call(place_pool_bid, pool_id=target_id, bid=PoolBidCreate(interest_rate=rate), _=None, current_user=user(lender_id))
+        outcome = "accepted"
+    except HTTPException as e:
+        outcome = "rejected: not the best rate" if "mejor tasa" in str(e.detail) else f"rejected: {e.status_code}"
+    except OperationalError:
+        outcome = "lock error"
+    bid_stats.record(outcome, time.perf_counter() - start)
+
+
+def open_auctions(db):
+    """Snapshot of biddable loans and pools with the best rate so far."""
+    loan_best = dict(db.query(LoanBid.loan_id, func.min(LoanBid.interest_rate)).join(LoanRequest).filter(
+        LoanRequest.status == LoanStatus.PENDING
+    ).group_by(LoanBid.loan_id).all())
+    loans = db.query(LoanRequest.id, LoanRequest.interest_rate).filter(
+        LoanRequest.status == LoanStatus.PENDING,
+        LoanRequest.wants_pool.is_(False),
+    ).all()
+
+    pool_best = dict(db.query(PoolBid.pool_id, func.min(PoolBid.interest_rate)).join(LoanPool).filter(
+        LoanPool.status == PoolStatus.OPEN
+    ).group_by(PoolBid.pool_id).all())
+    pools = db.query(LoanPool.id).filter(LoanPool.status == PoolStatus.OPEN).all()
+
+    targets = [("loan", loan_id, loan_best.get(loan_id, rate)) for loan_id, rate in loans]
+    targets += [("pool", pool_id, pool_best.get(pool_id, 0.30)) for (pool_id,) in pools]
+    # Most recent auctions first: lenders crowd the newest ones
+    targets.sort(key=lambda t: -t[1])
+    return targets
+
+
+# Setup: virtual users with profiles spread over the score bands
+init_db()
+db = SessionLocal()
+borrowers = [f"sim_borrower_{i}" for i in range(args.borrowers)]
+lenders = [f"sim_lender_{i}" for i in range(args.lenders)]
+existing = {row[0] for row in db.query(User.id).filter(User.id.like("sim_%"))}
+new_users = [u for u in borrowers + lenders if u not in existing]
+if new_users:
+    db.execute(insert(User), [{"id": u, "email": f"{u}@sim.local", "first_name": u} for u in new_users])
+    db.execute(insert(UserProfile), [
+        {"user_id": u, "work_situation": "Empleado", "score": rng.randint(450, 850)}
+        for u in new_users if u.startswith("sim_borrower")
+    ])
+    db.commit()
+db.close()
+
+ticks = args.hours * 60 // args.tick_minutes
+arrivals = Counter(rng.randrange(ticks) for _ in borrowers)
+sim_now = datetime.now()
+direct_loans = {}  # loan_id -> (borrower, created at)
+settle_times = []
+settled = Counter()
+accepted_loans = 0
+wall_start = time.perf_counter()
+
+executor = ThreadPoolExecutor(max_workers=args.threads)
+pending_borrowers = list(borrowers)
+rng.shuffle(pending_borrowers)
+
+for tick in range(ticks):
+    # 1. Loan requests, stamped with the simulated time (one UPDATE per tick)
+    db = SessionLocal()
+    first_id = (db.query(func.max(LoanRequest.id)).scalar() or 0) + 1
+    db.close()
+    for _ in range(arrivals[tick]):
+        borrower = pending_borrowers.pop()
+        loan = call(create_loan_request, loan=LoanRequestCreate(
+            amount=float(rng.randrange(500_000, 8_000_000, 100_000)),
+            term_months=rng.choice([6, 12, 24, 36]),
+            wants_pool=rng.random() < args.pool_share,
+            purpose="Simulación",
+        ), current_user=user(borrower))
+        if not loan.wants_pool:
+            direct_loans[loan.id] = (borrower, sim_now)
+    db = SessionLocal()
+    db.execute(update(LoanRequest).where(LoanRequest.id >= first_id).values(created_at=sim_now))
+    db.commit()
+
+    # 2. Concurrent lender bids against this tick's snapshot
+    targets = open_auctions(db)
+    db.close()
+    if targets:
+        n_bids = int(args.lenders * args.bids_per_lender)
+        picks = [targets[int(len(targets) * rng.random() ** 2)] for _ in range(n_bids)]
+        list(executor.map(lambda t: bid(rng.choice(lenders), *t), picks))
+
+    # 3. Borrowers accept the best bid once their loan has waited long enough
+    due = [loan_id for loan_id, (_, created) in direct_loans.items() if sim_now - created >= timedelta(hours=args.accept_after)]
+    if due:
+        db = SessionLocal()
+        best = {}
+        for bid_row in db.query(LoanBid).filter(LoanBid.loan_id.in_(due)).order_by(LoanBid.interest_rate, LoanBid.id):
+            best.setdefault(bid_row.loan_id, bid_row.id)
+        db.close()
+        for loan_id in due:
+            borrower, _ = direct_loans.pop(loan_id)
+            if loan_id in best:
+                call(accept_bid, loan_id=loan_id, bid_id=best[loan_id], current_user=user(borrower))
+                accepted_loans += 1
+
+    # 4. Pool formation and settlement on the simulated clock
+    db = SessionLocal()
+    form_pools(db, now=sim_now)
+    start = time.perf_counter()
+    results = process_expired_pools(db, now=sim_now)
+    db.close()
+    if results:
+        settle_times.append((len(results), time.perf_counter() - start))
+        for result in results:
+            settled["funded" if " funded " in result else "closed" if " closed " in result else "failed"] += 1
+
+    sim_now += timedelta(minutes=args.tick_minutes)
+
+executor.shutdown()
+wall = time.perf_counter() - wall_start
+
+# Bids that were accepted without beating an earlier bid (check-then-insert race)
+db = SessionLocal()
+out_of_order = 0
+best_so_far = {}
+for loan_id, rate in db.query(LoanBid.loan_id, LoanBid.interest_rate).order_by(LoanBid.id):
+    if loan_id in best_so_far and rate >= best_so_far[loan_id]:
+        out_of_order += 1
+    best_so_far[loan_id] = min(rate, best_so_far.get(loan_id, rate))
+db.close()
+
+total_bids = sum(bid_stats.outcomes.values())
+latencies = sorted(bid_stats.latencies)
+pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+settle_pools = sum(n for n, _ in settle_times)
+settle_seconds = sum(s for _, s in settle_times)
+
+print(f"\nSimulated {args.hours} h in {ticks} ticks, {wall:.1f} s wall clock ({engine.dialect.name}, {args.threads} threads)")
+print(f"Loans: {args.borrowers} requested, {accepted_loans} direct loans funded")
+print(f"Bids: {total_bids} placed, {bid_stats.outcomes['accepted'] / max(total_bids, 1):.1%} accepted, {total_bids / wall:,.0f} bids/s")
+for outcome, count in bid_stats.outcomes.most_common():
+    print(f"  {outcome}: {count}")
+print(f"  latency p50 {pct(0.5):.1f} ms, p95 {pct(0.95):.1f} ms, p99 {pct(0.99):.1f} ms")
+print(f"  accepted without beating an earlier bid (race): {out_of_order}")
+print(f"Settlement: {dict(settled)}, {settle_pools} pools in {settle_seconds:.2f} s "
+      f"({settle_pools / settle_seconds if settle_seconds else 0:,.0f} pools/s, {settings.settlement_workers} workers)")
+print(f"Lock contention: {bid_stats.outcomes['lock error']} lock errors, DB pool waits {pool_status(engine)['wait']}")
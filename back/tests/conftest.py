@@ -0,0 +1,90 @@
+"""
+Shared fixtures. Tests run against a throwaway SQLite database; the
+environment is set before the app is imported so settings pick it up.
+"""
+import os
+import tempfile
+
+_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="platanus-tests-"), "test.db")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_DB_PATH}",
+    "WORKOS_API_KEY": "sk_test_dummy",
+    "WORKOS_CLIENT_ID": "client_test",
+    "WORKOS_REDIRECT_URI": "http://testserver/auth/callback",
+    "WORKOS_COOKIE_PASSWORD": "WWeRjmxviX3RVsCIhRVrGUtWghJMXc5sOvpplbDgteA=",  # Fernet key,
+    "LOCAL_AUTH_SECRET": "test-local-secret-0123456789abcdef",
+    "JOB_WORKER_ENABLED": "false",
+    "LOG_LEVEL": "WARNING",
+})
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import Base, SessionLocal, engine, init_db
+from app.dependencies import get_current_user
+from app.main import app
+from app.models.profile import UserProfile
+from app.models.user import User
+
+init_db()
+
+
+@pytest.fixture(autouse=True)
+def clean_tables():
+    yield
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def users(db):
+    """Three users with profiles: u1, u2, u3."""
+    for i in range(1, 4):
+        db.add(User(id=f"u{i}", email=f"u{i}@example.com", first_name=f"User{i}"))
+        db.add(UserProfile(user_id=f"u{i}", work_situation="Empleado", score=600 + 50 * i))
+    db.commit()
+    return ["u1", "u2", "u3"]
+
+
+@pytest.fixture
+def client():
+    """Test client without lifespan (no background loops); log in with `client.login(user_id)`."""
+    current = {"user": None}
+
+    def fake_current_user():
+        user_id = current["user"]
+        if user_id is None:
+            return None
+        return {
+            "id": user_id, "email": f"{user_id}@example.com", "first_name": user_id,
+            "last_name": None, "profile_picture_url": None, "email_verified": True,
+        }
+
+    app.dependency_overrides[get_current_user] = fake_current_user
+    test_client = TestClient(app)
+    test_client.login = lambda user_id: current.update(user=user_id)
+    try:
+        yield test_client
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+
+@pytest.fixture
+def workos_standin():
+    from tests.workos_standin import WorkOSStandIn
+
+    standin = WorkOSStandIn()
+    try:
+        yield standin
+    finally:
+        standin.stop()
@@ -0,0 +1,40 @@
+import pytest
+
+from app.api import auth as auth_routes
+from app.config import settings
+from app.services.auth import AuthBackend, LocalAuthBackend, RedirectLoginMixin, WorkOSAuthBackend, build_auth_backend
+
+
+def test_backends_must_implement_every_method():
+    class Partial(AuthBackend):
+        async def get_logout_url(self, session_data):
+            return "/"
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_redirect_login_is_separate_from_the_contract():
+    assert not issubclass(LocalAuthBackend, RedirectLoginMixin)
+    assert issubclass(WorkOSAuthBackend, RedirectLoginMixin)
+    assert not {"get_authorization_url", "authenticate_with_code"} & AuthBackend.__abstractmethods__
+
+
+@pytest.mark.parametrize("secret", [None, "short", settings.workos_cookie_password])
+def test_local_backend_needs_its_own_secret(monkeypatch, secret):
+    monkeypatch.setattr(settings, "auth_backend", "local")
+    monkeypatch.setattr(settings, "local_auth_secret", secret)
+    with pytest.raises(ValueError):
+        build_auth_backend()
+
+
+def test_local_backend_built_with_secret(monkeypatch):
+    monkeypatch.setattr(settings, "auth_backend", "local")
+    assert isinstance(build_auth_backend(), LocalAuthBackend)
+
+
+def test_redirect_routes_disabled_in_local_mode(client, monkeypatch):
+    monkeypatch.setattr(auth_routes, "auth_backend", LocalAuthBackend(settings.local_auth_secret, 3600))
+
+    assert client.get("/auth/login", follow_redirects=False).status_code == 404
+    assert client.get("/auth/callback?code=abc", follow_redirects=False).status_code == 404
@@ -0,0 +1,109 @@
+"""GET /market/changes follows the outbox in commit order."""
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.loan_bid import LoanBid
+from app.models.loan_pool import LoanPool, PoolStatus
+from app.models.loan_request import LoanRequest, LoanStatus
+from app.services.outbox import record_event
+
+
+def new_loan(db, **fields):
+    loan = LoanRequest(
+        user_id="u1", amount=1_000_000, term_months=12, interest_rate=0.2,
+        credit_score=700, purpose="x", status=LoanStatus.PENDING, **fields,
+    )
+    db.add(loan)
+    db.flush()
+    record_event(db, "loan.created", "loan", loan.id)
+    return loan
+
+
+def poll(client, cursor, **params):
+    response = client.get("/market/changes", params={"cursor": cursor, **params})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_feed_returns_changes_then_tombstones(client, users, db):
+    cursor = client.get("/market/changes").json()["cursor"]
+
+    loan = new_loan(db)
+    bid = LoanBid(loan_id=loan.id, lender_id="u2", interest_rate=0.15)
+    db.add(bid)
+    db.flush()
+    record_event(db, "loan.bid_placed", "loan", loan.id, {"bid_id": bid.id})
+    pool = LoanPool(status=PoolStatus.OPEN, expires_at=datetime.now() + timedelta(hours=1))
+    db.add(pool)
+    db.flush()
+    pooled = new_loan(db, pool_id=pool.id)
+    record_event(db, "pool.formed", "pool", pool.id, {"loan_ids": [pooled.id]})
+    db.commit()
+
+    page = poll(client, cursor)
+    assert [l["id"] for l in page["loans"]] == [loan.id, pooled.id]
+    assert [b["id"] for b in page["loan_bids"]] == [bid.id]
+    assert [p["id"] for p in page["pools"]] == [pool.id]
+    assert page["removed"] == [] and not page["has_more"]
+
+    pool.status = PoolStatus.FUNDED
+    pooled.status = LoanStatus.FUNDED
+    record_event(db, "pool.funded", "pool", pool.id)
+    db.commit()
+
+    page = poll(client, page["cursor"])
+    assert page["loans"] == [] and page["pools"] == []
+    assert {(r["type"], r["id"]) for r in page["removed"]} == {("loan", pooled.id), ("pool", pool.id)}
+    assert poll(client, page["cursor"])["removed"] == []
+
+
+def test_late_commit_is_not_skipped(client, users, db):
+    cursor = client.get("/market/changes").json()["cursor"]
+
+    # A slow transaction changes a loan first but commits after a faster one
+    slow = SessionLocal()
+    try:
+        early = new_loan(db)
+        db.commit()
+        loaded = slow.get(LoanRequest, early.id)
+        loaded.interest_rate = 0.1
+        record_event(slow, "loan.rate_changed", "loan", early.id)
+
+        new_loan(db)
+        db.commit()
+        page = poll(client, cursor)
+        assert len(page["loans"]) == 2
+
+        slow.commit()
+    finally:
+        slow.close()
+
+    page = poll(client, page["cursor"])
+    assert [(l["id"], l["interest_rate"]) for l in page["loans"]] == [(early.id, 0.1)]
+
+
+def test_pages_follow_limit(client, users, db):
+    cursor = client.get("/market/changes").json()["cursor"]
+    for _ in range(3):
+        new_loan(db)
+    db.commit()
+
+    seen = []
+    while True:
+        page = poll(client, cursor, limit=2)
+        seen += [l["id"] for l in page["loans"]]
+        cursor = page["cursor"]
+        if not page["has_more"]:
+            break
+    assert len(seen) == 3
+
+
+def test_bad_and_expired_cursors(client, users, db, monkeypatch):
+    assert client.get("/market/changes", params={"cursor": "not-a-cursor"}).status_code == 400
+
+    new_loan(db)
+    db.commit()
+    cursor = client.get("/market/changes").json()["cursor"]
+    monkeypatch.setattr(settings, "archive_after_days", -1)
+    assert client.get("/market/changes", params={"cursor": cursor}).status_code == 410
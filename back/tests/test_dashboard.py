@@ -0,0 +1,51 @@
+"""GET /dashboard/ totals match the seeded loans, pools and bids."""
+from datetime import datetime, timedelta
+
+from app.models.loan_bid import LoanBid
+from app.models.loan_pool import LoanPool, PoolStatus
+from app.models.loan_request import LoanRequest, LoanStatus
+from app.models.pool_bid import PoolBid
+
+
+def add_loan(db, user_id, amount, pool_id=None):
+    loan = LoanRequest(
+        user_id=user_id, amount=amount, term_months=12, interest_rate=0.2,
+        credit_score=700, purpose="x", status=LoanStatus.PENDING, pool_id=pool_id,
+    )
+    db.add(loan)
+    db.flush()
+    return loan
+
+
+def test_dashboard_totals_match_seeded_data(client, users, db):
+    pool = LoanPool(status=PoolStatus.OPEN, expires_at=datetime.now() + timedelta(hours=1))
+    other_pool = LoanPool(status=PoolStatus.OPEN, expires_at=datetime.now() + timedelta(hours=1))
+    db.add_all([pool, other_pool])
+    db.flush()
+
+    with_bids = add_loan(db, "u1", 1_000_000)
+    without_bids = add_loan(db, "u1", 500_000)
+    pooled = add_loan(db, "u1", 300_000, pool_id=pool.id)
+    add_loan(db, "u3", 200_000, pool_id=pool.id)  # Another borrower in the same pool
+    others = add_loan(db, "u3", 900_000, pool_id=other_pool.id)
+
+    db.add_all([LoanBid(loan_id=with_bids.id, lender_id="u2", interest_rate=rate) for rate in (0.18, 0.15, 0.16)])
+    db.add(LoanBid(loan_id=others.id, lender_id="u2", interest_rate=0.1))
+    db.add_all([PoolBid(pool_id=pool.id, lender_id="u2", interest_rate=rate) for rate in (0.17, 0.14)])
+    db.add(PoolBid(pool_id=other_pool.id, lender_id="u2", interest_rate=0.09))
+    db.commit()
+
+    assert client.get("/dashboard/").status_code == 401
+    client.login("u1")
+    response = client.get("/dashboard/")
+    assert response.status_code == 200
+    body = response.json()
+
+    assert body["profile"]["score"] == 650
+    loans = {loan["id"]: (loan["bid_count"], loan["best_bid"]) for loan in body["loans"]}
+    assert loans == {with_bids.id: (3, 0.15), without_bids.id: (0, None), pooled.id: (0, None)}
+
+    [summary] = body["pools"]
+    assert summary["id"] == pool.id
+    assert (summary["member_count"], summary["total_amount"]) == (2, 500_000)
+    assert (summary["bid_count"], summary["best_bid"]) == (2, 0.14)
@@ -0,0 +1,21 @@
+from app.config import settings
+
+
+def test_diagnostics_requires_admin_or_token(client, users, monkeypatch):
+    monkeypatch.setattr(settings, "admin_emails", ["u1@example.com"])
+    monkeypatch.setattr(settings, "diagnostics_token", "probe-token")
+
+    assert client.get("/diagnostics").status_code == 401
+    assert client.get("/diagnostics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/diagnostics", headers={"Authorization": "Bearer probe-token"}).status_code == 200
+
+    client.login("u2")
+    assert client.get("/diagnostics").status_code == 403
+    client.login("u1")
+    assert client.get("/diagnostics").status_code == 200
+
+
+def test_health_is_public_and_hides_internals(client):
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert set(response.json()) == {"status", "database"}
@@ -0,0 +1,39 @@
+"""Full exports are limited to admins and institutional lenders."""
+import io
+
+import pyarrow.parquet as pq
+
+from app.config import settings
+from app.models.loan_request import LoanRequest, LoanStatus
+
+
+def test_export_requires_role(client, users, monkeypatch):
+    monkeypatch.setattr(settings, "admin_emails", ["U1@example.com"])
+    monkeypatch.setattr(settings, "institutional_lender_emails", ["u2@example.com"])
+
+    assert client.get("/exports/loans").status_code == 401
+
+    client.login("u3")
+    assert client.get("/exports/loans").status_code == 403
+
+    for user_id in ("u1", "u2"):
+        client.login(user_id)
+        response = client.get("/exports/loans")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+
+
+def test_parquet_export(client, users, db, monkeypatch):
+    monkeypatch.setattr(settings, "admin_emails", ["u1@example.com"])
+    db.add_all([
+        LoanRequest(user_id="u1", amount=1_000 * i, term_months=12, interest_rate=0.2, purpose="x", status=LoanStatus.PENDING)
+        for i in range(1, 4)
+    ])
+    db.commit()
+
+    client.login("u1")
+    response = client.get("/exports/loans", params={"format": "parquet"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.parquet"
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.column("amount").to_pylist() == [1_000, 2_000, 3_000]
@@ -0,0 +1,91 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.job import Job, JobStatus
+from app.services.jobs import JOB_HANDLERS, claim_jobs, enqueue, register_job, requeue_stale, run_job
+
+
+@pytest.fixture
+def job_kind():
+    """Register handlers under test kinds; removed afterwards."""
+    kinds = []
+
+    def register(kind, handler, **options):
+        register_job(kind, **options)(handler)
+        kinds.append(kind)
+        return kind
+
+    yield register
+    for kind in kinds:
+        JOB_HANDLERS.pop(kind, None)
+
+
+def claim_one(db, kind, worker_id="worker-1"):
+    enqueue(db, kind, run_after=datetime.now() - timedelta(seconds=1))
+    db.commit()
+    [job_id] = claim_jobs(db, worker_id, 1)
+    return job_id
+
+
+def test_lease_renewed_while_handler_runs(db, job_kind, monkeypatch):
+    monkeypatch.setattr(settings, "job_lease_seconds", 0.3)
+    released = []
+
+    def slow(db, payload):
+        time.sleep(0.5)  # Longer than the lease
+        with SessionLocal() as other:
+            released.append(requeue_stale(other))
+            other.commit()
+        return "ok"
+
+    job_id = claim_one(db, job_kind("test.slow", slow))
+    assert run_job(job_id, "worker-1") == "ok"
+
+    assert released == [0]
+    db.expire_all()
+    assert db.get(Job, job_id).status == JobStatus.DONE
+
+
+def test_outcome_not_recorded_after_lease_lost(db, job_kind):
+    def reclaimed(db, payload):
+        # Meanwhile the lease expired and another worker claimed the job
+        with SessionLocal() as other:
+            other.execute(update(Job).values(locked_by="worker-2", attempts=Job.attempts + 1))
+            other.commit()
+        raise RuntimeError("boom")
+
+    job_id = claim_one(db, job_kind("test.reclaimed", reclaimed))
+    run_job(job_id, "worker-1")
+
+    db.expire_all()
+    job = db.get(Job, job_id)
+    assert (job.status, job.locked_by, job.last_error) == (JobStatus.RUNNING, "worker-2", None)
+
+
+def test_missing_or_reclaimed_job_not_run(db, job_kind):
+    ran = []
+    job_id = claim_one(db, job_kind("test.once", lambda db, payload: ran.append(payload)))
+
+    assert run_job(job_id + 1000, "worker-1") is None
+    assert run_job(job_id, "worker-2") is None
+    assert ran == []
+
+    db.execute(update(Job).values(locked_by="worker-2"))
+    db.commit()
+    assert run_job(job_id, "worker-1") is None
+    assert ran == []
+
+
+def test_claim_respects_concurrency(db, job_kind):
+    kind = job_kind("test.single", lambda db, payload: None, concurrency=1)
+    for _ in range(2):
+        enqueue(db, kind, run_after=datetime.now() - timedelta(seconds=1))
+    db.commit()
+
+    assert len(claim_jobs(db, "worker-1", 5)) == 1
+    assert claim_jobs(db, "worker-2", 5) == []
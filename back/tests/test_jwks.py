@@ -0,0 +1,111 @@
+"""JWKSCache against the local stand-in JWKS endpoint, with a locally generated key pair."""
+import asyncio
+
+import jwt
+import pytest
+
+from app.services.jwks import JWKSCache
+
+
+def make_cache(standin, min_refresh_interval=0.0) -> JWKSCache:
+    return JWKSCache(
+        jwks_url=f"{standin.base_url}sso/jwks/client_standin",
+        refresh_interval=300,
+        min_refresh_interval=min_refresh_interval,
+        timeout=5,
+    )
+
+
+def run(cache: JWKSCache, *coroutines):
+    async def main():
+        try:
+            results = []
+            for coroutine in coroutines:
+                results.append(await coroutine(cache))
+            return results
+        finally:
+            await cache.close()
+    return asyncio.run(main())
+
+
+def test_verifies_valid_token(workos_standin):
+    token = workos_standin.token()
+    [claims] = run(make_cache(workos_standin), lambda cache: cache.verify(token))
+    assert claims["sub"] == "user_01" and claims["sid"] == "session_01"
+    assert workos_standin.calls("/sso/jwks/") == 1
+
+
+def test_refetches_on_unknown_kid(workos_standin):
+    old_token = workos_standin.token()
+    cache = make_cache(workos_standin)
+
+    async def rotate_and_verify(cache):
+        workos_standin.rotate("key_2")
+        return await cache.verify(workos_standin.token())
+
+    first, second = run(cache, lambda cache: cache.verify(old_token), rotate_and_verify)
+    assert first["sub"] == second["sub"] == "user_01"
+    assert workos_standin.calls("/sso/jwks/") == 2
+
+
+def test_known_kid_is_served_from_cache(workos_standin):
+    token = workos_standin.token()
+    run(make_cache(workos_standin), *[lambda cache: cache.verify(token)] * 5)
+    assert workos_standin.calls("/sso/jwks/") == 1
+
+
+def test_unknown_kid_refetch_is_throttled(workos_standin):
+    cache = make_cache(workos_standin, min_refresh_interval=60)
+    stale = workos_standin.token()  # Signed with a key the endpoint no longer serves
+    workos_standin.rotate("key_2")
+    valid = workos_standin.token()
+
+    async def verify_stale(cache):
+        with pytest.raises(jwt.InvalidKeyError):
+            await cache.verify(stale)
+
+    async def verify_valid(cache):
+        return await cache.verify(valid)
+
+    # The valid token fetches the keys; unknown kids right after it don't refetch
+    run(cache, verify_valid, *[verify_stale] * 10)
+    assert workos_standin.calls("/sso/jwks/") == 1
+
+
+def test_rejects_expired_token(workos_standin):
+    token = workos_standin.token(expires_in=-3600)
+
+    async def verify(cache):
+        with pytest.raises(jwt.ExpiredSignatureError):
+            await cache.verify(token)
+        # Still accepted when expiry is deliberately ignored (logout)
+        return await cache.verify(token, verify_exp=False)
+
+    [claims] = run(make_cache(workos_standin), verify)
+    assert claims["sub"] == "user_01"
+
+
+def test_rejects_tampered_token(workos_standin):
+    header, payload, signature = workos_standin.token().split(".")
+    forged_payload = jwt.utils.base64url_encode(b'{"sub":"someone_else","sid":"x","exp":9999999999}').decode()
+    tampered = ".".join([header, forged_payload, signature])
+
+    async def verify(cache):
+        with pytest.raises(jwt.InvalidSignatureError):
+            await cache.verify(tampered)
+
+    run(make_cache(workos_standin), verify)
+
+
+def test_rejects_token_signed_with_another_key(workos_standin):
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    other_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    forged = jwt.encode({"sub": "someone_else", "exp": 9999999999}, other_key, algorithm="RS256",
+                        headers={"kid": workos_standin.kid})
+
+    async def verify(cache):
+        with pytest.raises(jwt.InvalidSignatureError):
+            await cache.verify(forged)
+
+    run(make_cache(workos_standin), verify)
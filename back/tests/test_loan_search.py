@@ -0,0 +1,43 @@
+"""Full-text search on loan purpose (SQLite FTS5 in tests)."""
+import pytest
+from sqlalchemy import text
+
+from app.database import engine, init_db
+from app.models.loan_request import LoanRequest, LoanStatus
+
+
+@pytest.fixture
+def loans(db, users):
+    for purpose in ("Comprar una moto para reparto", "Capital de trabajo para el taller"):
+        db.add(LoanRequest(
+            user_id="u1", amount=1_000_000, term_months=12, interest_rate=0.2,
+            credit_score=700, purpose=purpose, status=LoanStatus.PENDING,
+        ))
+    db.commit()
+
+
+def search(client, q):
+    response = client.get("/loans/", params={"q": q})
+    assert response.status_code == 200, response.text
+    return [loan["purpose"] for loan in response.json()]
+
+
+def test_search_matches_purpose_prefix(client, loans):
+    assert search(client, "mot") == ["Comprar una moto para reparto"]
+    assert len(search(client, "para")) == 2
+
+
+@pytest.mark.parametrize("q", ['moto"', "moto*", "moto OR taller", "NEAR(moto taller)", "-moto", "purpose:moto", "^moto", "(moto", "moto AND"])
+def test_fts_operators_are_searched_literally(client, loans, q):
+    assert search(client, q) in ([], ["Comprar una moto para reparto"])
+
+
+def test_init_db_creates_missing_fts_index_from_existing_rows(client, loans):
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE loan_requests_fts"))
+        for suffix in ("ai", "ad", "au"):
+            conn.execute(text(f"DROP TRIGGER loan_requests_fts_{suffix}"))
+
+    init_db()
+    init_db()  # Idempotent
+    assert search(client, "taller") == ["Capital de trabajo para el taller"]
@@ -0,0 +1,37 @@
+"""Market rollups survive archiving settled loans."""
+from datetime import date, datetime, timedelta
+
+from app.models.loan_request import LoanRequest, LoanStatus
+from app.services.archive import archive_settled
+from app.services.market_stats import get_market_rates, rebuild_market_rollups
+
+
+def test_rebuild_after_archiving_keeps_aggregates(db, users):
+    db.add_all([
+        LoanRequest(
+            user_id="u1", amount=amount, term_months=12, interest_rate=rate,
+            credit_score=score, purpose="x", status=status,
+        )
+        for amount, rate, score, status in [
+            (1_000_000, 0.15, 650, LoanStatus.PAID),
+            (2_000_000, 0.12, 720, LoanStatus.PAID),
+            (500_000, 0.18, 650, LoanStatus.FUNDED),  # Still being repaid: stays hot
+            (700_000, 0.2, 700, LoanStatus.REJECTED),  # Never funded: not counted
+        ]
+    ])
+    db.commit()
+
+    def rates():
+        today = date.today()
+        return get_market_rates(db, today - timedelta(days=1), today + timedelta(days=1))
+
+    assert rebuild_market_rollups(db) == 3
+    before = rates()
+    assert sum(row["deals"] for row in before) == 3
+
+    moved = archive_settled(db, now=datetime.now() + timedelta(days=365))
+    assert moved["loan_requests"] == 3
+    assert db.query(LoanRequest).count() == 1
+
+    assert rebuild_market_rollups(db) == 3
+    assert rates() == before
@@ -0,0 +1,38 @@
+from app.config import settings
+from app.models.outbox_event import OutboxEvent
+from app.services.outbox import read_events, record_event, record_events
+
+
+def test_events_are_inserted_on_commit(db):
+    record_event(db, "loan.created", "loan", 1, {"amount": 10})
+    record_events(db, [
+        {"event_type": "loan.bid_placed", "aggregate_type": "loan", "aggregate_id": 1},
+        {"event_type": "loan.bid_placed", "aggregate_type": "loan", "aggregate_id": 1},
+    ])
+    assert db.query(OutboxEvent).count() == 0  # Nothing written before the commit
+    db.commit()
+
+    events = read_events(db)
+    assert [e.event_type for e in events] == ["loan.created", "loan.bid_placed", "loan.bid_placed"]
+    assert events[0].payload == {"amount": 10}
+
+
+def test_rolled_back_events_are_dropped(db):
+    db.query(OutboxEvent).count()  # Start a transaction
+    record_event(db, "loan.created", "loan", 1)
+    db.rollback()
+    db.commit()
+    assert read_events(db) == []
+
+
+def test_events_endpoint_requires_admin(client, db, users, monkeypatch):
+    monkeypatch.setattr(settings, "admin_emails", ["u1@example.com"])
+    record_event(db, "loan.created", "loan", 1)
+    db.commit()
+
+    assert client.get("/events/").status_code == 401
+    client.login("u2")
+    assert client.get("/events/").status_code == 403
+    client.login("u1")
+    page = client.get("/events/").json()
+    assert [e["event_type"] for e in page["events"]] == ["loan.created"]
@@ -0,0 +1,60 @@
+from app.models.job import Job
+from app.models.loan_request import LoanRequest, LoanStatus
+from app.services.ledger import open_accounts
+from app.services.outbox import record_event
+
+
+def funded_loan(db, borrower="u1", lender="u2"):
+    loan = LoanRequest(
+        user_id=borrower, amount=1_000_000, term_months=12, interest_rate=0.2,
+        status=LoanStatus.FUNDED, credit_score=650, purpose="Test",
+    )
+    db.add(loan)
+    db.flush()
+    record_event(db, "loan.funded", "loan", loan.id, {"lender_id": lender})
+    db.commit()
+    return loan.id
+
+
+def test_payment_before_account_is_opened_queues_ledger_run(client, users, db):
+    loan_id = funded_loan(db)
+
+    client.login("u2")
+    assert client.post(f"/loans/{loan_id}/payments", json={"amount": 1000}).status_code == 403
+    assert db.query(Job).count() == 0
+
+    client.login("u1")
+    for _ in range(2):
+        assert client.post(f"/loans/{loan_id}/payments", json={"amount": 1000}).status_code == 409
+    assert [job.kind for job in db.query(Job).all()] == ["ledger.run"]
+
+    open_accounts(db)
+    db.commit()
+    response = client.post(f"/loans/{loan_id}/payments", json={"amount": 1000})
+    assert response.status_code == 200
+    assert response.json()["balance"] < 1_000_000
+
+
+def test_payment_on_unfunded_loan_is_not_found(client, users, db):
+    loan = LoanRequest(
+        user_id="u1", amount=1_000_000, term_months=12, interest_rate=0.2,
+        status=LoanStatus.PENDING, credit_score=650, purpose="Test",
+    )
+    db.add(loan)
+    db.commit()
+
+    client.login("u1")
+    assert client.post(f"/loans/{loan.id}/payments", json={"amount": 1000}).status_code == 404
+
+
+def test_ledger_routes_require_login(client, users):
+    for method, path in [
+        ("get", "/lender/stats"), ("get", "/lender/investments"),
+        ("get", "/loans/1/account"), ("post", "/loans/1/payments"),
+    ]:
+        kwargs = {"json": {"amount": 1000}} if method == "post" else {}
+        assert getattr(client, method)(path, **kwargs).status_code == 401, path
+
+    client.login("u2")
+    assert client.get("/lender/stats").status_code == 200
+    assert client.get("/lender/investments").json() == []
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.models.loan_request import LoanRequest, LoanStatus
+from app.services.pool_service import form_pools, group_pool_candidates
+
+
+def candidate(loan_id, amount=1_000_000, term=12, score=700, stale=False):
+    return (loan_id, amount, term, score, stale)
+
+
+def test_partial_pool_waits_until_stale():
+    groups, released = group_pool_candidates(
+        [candidate(1), candidate(2)], target_amount=10_000_000, max_members=5, min_members=2,
+    )
+    assert groups == [] and released == []
+
+
+def test_stale_partial_pool_is_formed():
+    groups, released = group_pool_candidates(
+        [candidate(1, stale=True), candidate(2)], target_amount=10_000_000, max_members=5, min_members=2,
+    )
+    assert [sorted(g) for g in groups] == [[1, 2]] and released == []
+
+
+def test_stale_singleton_is_released():
+    groups, released = group_pool_candidates(
+        [candidate(1, stale=True)], target_amount=10_000_000, max_members=5, min_members=2,
+    )
+    assert groups == [] and released == [1]
+
+
+def test_small_buckets_are_released_not_mixed():
+    # Different terms never share a pool, so each stale loan is alone in its bucket
+    groups, released = group_pool_candidates(
+        [candidate(1, term=6, stale=True), candidate(2, term=12, stale=True)],
+        target_amount=10_000_000, max_members=5, min_members=2,
+    )
+    assert groups == [] and sorted(released) == [1, 2]
+
+
+def test_form_pools_releases_stale_singleton(db, users):
+    loan = LoanRequest(
+        user_id="u1", amount=1_000_000, term_months=12, interest_rate=0.2,
+        credit_score=700, purpose="x", wants_pool=True, status=LoanStatus.PENDING,
+    )
+    db.add(loan)
+    db.commit()
+
+    later = datetime.now() + timedelta(hours=settings.pool_max_wait_hours + 1)
+    assert form_pools(db, now=later) == ["1 stale loans released to direct bidding"]
+
+    db.refresh(loan)
+    assert loan.wants_pool is False and loan.pool_id is None
+    assert form_pools(db, now=later) == []
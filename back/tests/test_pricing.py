@@ -0,0 +1,27 @@
+from app.services import pricing
+
+
+def test_quote_uses_base_rate_rounded(client, users):
+    client.login("u1")
+    response = client.get("/loans/quote", params={"amount": 1000, "term_months": 12, "score": 650})
+    assert response.status_code == 200
+    assert response.json()["annual_rate"] == 0.18
+
+
+def test_amount_buckets_adjust_rate(monkeypatch):
+    assert pricing.quote(720, 12, 500_000)["annual_rate"] == pricing.quote(720, 12, 20_000_000)["annual_rate"] == 0.12
+
+    monkeypatch.setattr(pricing, "AMOUNT_BUCKETS", ((1_000_000, 0.02), (float("inf"), 0.0)))
+    assert pricing.quote(650, 12, 500_000)["annual_rate"] == 0.2  # Rounded, not 0.19999999999999998
+    # Terms outside the grid get the same adjustment
+    assert pricing.quote(650, 7, 500_000)["annual_rate"] == 0.2
+    assert pricing.quote(650, 12, 3_000_000)["annual_rate"] == 0.18
+
+
+def test_grid_rebuilt_when_parameters_replaced(monkeypatch):
+    grid = pricing.get_pricing_grid()
+    assert pricing.get_pricing_grid() is grid
+
+    monkeypatch.setattr(pricing, "AMOUNT_BUCKETS", ((float("inf"), 0.05),))
+    assert pricing.get_pricing_grid() is not grid
+    assert pricing.quote(720, 12, 500_000)["annual_rate"] == 0.17
@@ -0,0 +1,102 @@
+"""Detail endpoints run a fixed number of queries, however many bids and loans they return."""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.database import engine
+from app.models.loan_bid import LoanBid
+from app.models.loan_pool import LoanPool, PoolStatus
+from app.models.loan_request import LoanRequest, LoanStatus
+from app.models.pool_bid import PoolBid
+from app.services.archive import archive_settled
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def add_loan(db, status=LoanStatus.PENDING, pool_id=None, bids=0):
+    loan = LoanRequest(
+        user_id="u1", amount=1_000_000, term_months=12, interest_rate=0.2,
+        credit_score=700, purpose="x", status=status, pool_id=pool_id,
+    )
+    db.add(loan)
+    db.flush()
+    db.add_all([LoanBid(loan_id=loan.id, lender_id="u2", interest_rate=0.15 + i / 100) for i in range(bids)])
+    return loan
+
+
+@pytest.fixture
+def loan(db, users):
+    loan = add_loan(db, bids=5)
+    db.commit()
+    return loan.id
+
+
+@pytest.fixture
+def pool(db, users):
+    pool = LoanPool(status=PoolStatus.OPEN, expires_at=datetime.now() + timedelta(hours=1))
+    db.add(pool)
+    db.flush()
+    for _ in range(4):
+        add_loan(db, pool_id=pool.id)
+    db.add_all([PoolBid(pool_id=pool.id, lender_id="u2", interest_rate=0.15 + i / 100) for i in range(5)])
+    db.commit()
+    return pool.id
+
+
+def archive_everything(db):
+    db.query(LoanRequest).update({"status": LoanStatus.PAID})
+    db.query(LoanPool).update({"status": PoolStatus.CLOSED})
+    db.commit()
+    moved = archive_settled(db, now=datetime.now() + timedelta(days=365))
+    assert moved["loan_requests"] > 0
+
+
+def test_loan_detail_runs_two_queries(client, loan):
+    client.login("u3")
+    with count_queries() as statements:
+        response = client.get(f"/loans/{loan}")
+    assert response.status_code == 200
+    assert len(response.json()["bids"]) == 5
+    assert len(statements) == 2
+
+
+def test_archived_loan_detail_runs_three_queries(client, db, loan):
+    archive_everything(db)
+    client.login("u3")
+    with count_queries() as statements:
+        response = client.get(f"/loans/{loan}")
+    assert response.status_code == 200
+    assert len(response.json()["bids"]) == 5
+    assert len(statements) == 3  # Miss on the hot table, then loan + bids from the archive
+
+
+def test_pool_detail_runs_three_queries(client, pool):
+    with count_queries() as statements:
+        response = client.get(f"/pools/{pool}")
+    assert response.status_code == 200
+    assert response.json()["member_count"] == 4 and len(response.json()["bids"]) == 5
+    assert len(statements) == 3
+
+
+def test_archived_pool_detail_runs_four_queries(client, db, pool):
+    archive_everything(db)
+    assert db.query(LoanPool).count() == 0
+    with count_queries() as statements:
+        response = client.get(f"/pools/{pool}")
+    assert response.status_code == 200
+    assert response.json()["member_count"] == 4 and len(response.json()["bids"]) == 5
+    assert len(statements) == 4  # Miss on the hot table, then pool + loans + bids from the archive
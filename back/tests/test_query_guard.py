@@ -0,0 +1,48 @@
+"""Per-route query limits are keyed on the route as mounted in the app."""
+import time
+
+import pytest
+from sqlalchemy import event
+from starlette.requests import Request
+
+from app.config import settings
+from app.database import engine, route_key
+
+
+@pytest.fixture
+def slow_statements():
+    """Every connection checkout takes 20 ms, after the request's guard was set up."""
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        time.sleep(0.02)
+
+    event.listen(engine, "checkout", checkout)
+    yield
+    event.remove(engine, "checkout", checkout)
+
+
+def test_route_deadline_returns_504(client, users, monkeypatch, slow_statements):
+    monkeypatch.setattr(settings, "db_route_deadlines", {"GET /loans/": 5})
+
+    assert client.get("/loans/").status_code == 504
+    assert client.get("/pools/").status_code == 200
+
+
+def test_route_key_uses_full_template(client, users, monkeypatch):
+    keys = []
+
+    import app.database as database
+    original = database.guard_session
+
+    def spy(request, db):
+        keys.append(route_key(request))
+        return original(request, db)
+
+    monkeypatch.setattr(database, "guard_session", spy)
+    client.get("/loans/")
+    client.get("/loans/123")
+    assert keys[0] == "GET /loans/"
+    assert "GET /loans/{loan_id}" in keys
+
+
+def test_route_key_before_routing():
+    assert route_key(Request({"type": "http", "method": "GET", "path": "/", "headers": []})) is None
@@ -0,0 +1,81 @@
+"""Bid rate limiting, with the in-memory backend on a manual clock as the stand-in for Redis."""
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services.rate_limit import MemoryRateLimitBackend, RateLimiter, rate_limiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def take(backend, *buckets):
+    return asyncio.run(backend.take(buckets))
+
+
+def test_bucket_allows_burst_then_refills():
+    clock = Clock()
+    backend = MemoryRateLimitBackend(clock=clock)
+
+    assert [take(backend, ("k", 1.0, 3)) for _ in range(3)] == [0, 0, 0]
+    assert take(backend, ("k", 1.0, 3)) == pytest.approx(1.0)
+
+    clock.now += 0.5
+    assert take(backend, ("k", 1.0, 3)) == pytest.approx(0.5)
+    clock.now += 0.5
+    assert take(backend, ("k", 1.0, 3)) == 0
+
+
+def test_rejected_take_consumes_from_no_bucket():
+    clock = Clock()
+    backend = MemoryRateLimitBackend(clock=clock)
+    assert take(backend, ("auction", 0.1, 1)) == 0
+
+    # The auction bucket is empty: the lender bucket keeps its token
+    assert take(backend, ("lender", 1.0, 1), ("auction", 0.1, 1)) == pytest.approx(10.0)
+    assert take(backend, ("lender", 1.0, 1)) == 0
+
+
+def test_least_recently_used_buckets_are_dropped():
+    backend = MemoryRateLimitBackend(max_keys=2, clock=Clock())
+    for key in ("a", "b", "c"):
+        take(backend, (key, 1.0, 1))
+    assert take(backend, ("a", 1.0, 1)) == 0  # Reset to a full bucket
+    assert take(backend, ("c", 1.0, 1)) > 0
+
+
+def test_backend_errors_fail_open():
+    class Down(MemoryRateLimitBackend):
+        async def take(self, buckets):
+            raise ConnectionError("redis down")
+
+    assert asyncio.run(RateLimiter(Down()).hit(("k", 1.0, 1))) == 0
+
+
+@pytest.fixture
+def limited(monkeypatch):
+    """Fresh buckets on a frozen clock; 2 bids per lender and 1 per auction."""
+    monkeypatch.setattr(rate_limiter, "backend", MemoryRateLimitBackend(clock=Clock()))
+    monkeypatch.setattr(settings, "bid_burst_per_lender", 2)
+    monkeypatch.setattr(settings, "bid_burst_per_auction", 1)
+
+
+def test_bid_rejected_by_auction_does_not_spend_lender_token(client, users, limited):
+    assert client.post("/loans/999/bid", json={"interest_rate": 0.15}).status_code == 401
+    client.login("u2")
+    bid = {"interest_rate": 0.15}
+
+    assert client.post("/loans/999/bid", json=bid).status_code == 404  # Past the limiter
+    response = client.post("/loans/999/bid", json=bid)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    # The lender still has its second token for another auction
+    assert client.post("/loans/998/bid", json=bid).status_code == 404
+    assert client.post("/loans/997/bid", json=bid).status_code == 429
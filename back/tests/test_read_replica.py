@@ -0,0 +1,64 @@
+"""Reads go to the replica, except for clients that just committed a write."""
+import os
+import tempfile
+
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.orm import sessionmaker
+
+from app import database
+from app.database import LAST_WRITE_COOKIE, Base, SessionLocal
+from app.models.user import User
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    """An empty replica database: it never catches up with the primary."""
+    path = os.path.join(tempfile.mkdtemp(prefix="platanus-replica-"), "replica.db")
+    replica_engine = database._create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=replica_engine)
+    monkeypatch.setattr(database, "read_engine", replica_engine)
+    monkeypatch.setattr(database, "ReadSessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=replica_engine))
+    yield
+    replica_engine.dispose()
+
+
+def test_read_after_write_hits_primary(client, users, replica):
+    client.login("u1")
+    listing = client.get("/loans/")
+    assert listing.json() == []
+    assert LAST_WRITE_COOKIE not in listing.cookies
+
+    created = client.post("/loans/", json={"amount": 1_000_000, "term_months": 12, "purpose": "Moto"})
+    assert created.status_code == 200, created.text
+    assert LAST_WRITE_COOKIE in created.cookies
+    assert [loan["id"] for loan in client.get("/loans/").json()] == [created.json()["id"]]
+
+    client.cookies.clear()
+    assert client.get("/loans/").json() == []  # Without the cookie: replica
+
+
+def test_only_committed_writes_are_flagged(users):
+    def session():
+        db = SessionLocal()
+        db.info["request_state"] = SimpleNamespace()
+        return db
+
+    with session() as db:
+        db.get(User, "u1")
+        db.commit()
+        assert not hasattr(db.info["request_state"], "committed_write")
+
+    with session() as db:
+        db.add(User(id="u4", email="u4@example.com"))
+        db.flush()
+        db.rollback()
+        db.commit()
+        assert not hasattr(db.info["request_state"], "committed_write")
+
+    with session() as db:
+        db.execute(update(User).where(User.id == "u1").values(first_name="Ana"))
+        db.commit()
+        assert db.info["request_state"].committed_write
@@ -0,0 +1,69 @@
+"""Concurrent identical reads share one fetch."""
+import asyncio
+import threading
+
+from app.database import QueryCancelled
+from app.services.single_flight import SingleFlight
+
+
+async def gather_while_in_flight(flight, key, fetch, callers, release):
+    """Start `callers` concurrent do() calls, then let the fetch finish once all of them wait."""
+    tasks = [asyncio.create_task(flight.do(key, fetch)) for _ in range(callers)]
+    while flight.shared < callers - 1:
+        await asyncio.sleep(0.001)
+    release.set()
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def test_concurrent_callers_share_one_fetch():
+    flight = SingleFlight("test.shared")
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"id": 1}
+
+    results = asyncio.run(gather_while_in_flight(flight, "loan:1", fetch, 5, release))
+
+    assert results == [{"id": 1}] * 5
+    assert len(calls) == 1
+    assert flight.status() == {"in_flight": 0, "fetches": 1, "shared": 4}
+
+
+def test_exception_reaches_every_waiter_and_key_is_cleared():
+    flight = SingleFlight("test.failing")
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        raise LookupError("boom")
+
+    results = asyncio.run(gather_while_in_flight(flight, "loan:1", fetch, 3, release))
+
+    assert [type(r) for r in results] == [LookupError] * 3
+    assert flight.status()["in_flight"] == 0
+
+    # The next call fetches again instead of reusing the failure
+    assert asyncio.run(flight.do("loan:1", lambda: "fresh")) == "fresh"
+    assert flight.fetches == 2
+
+
+def test_waiters_refetch_when_leader_disconnected():
+    flight = SingleFlight("test.disconnected")
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(5)
+            raise QueryCancelled("disconnected")
+        return "ok"
+
+    results = asyncio.run(gather_while_in_flight(flight, "loan:1", fetch, 2, release))
+
+    assert isinstance(results[0], QueryCancelled)
+    assert results[1] == "ok"
+    assert len(calls) == 2
@@ -0,0 +1,68 @@
+"""get_current_user keeps the local user row in sync with the session."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app import dependencies
+from app.database import SessionLocal
+from app.models.user import User
+from app.services.auth import SESSION_COOKIE
+
+WORKOS_USER = SimpleNamespace(
+    id="user_01", email="ana@example.com", first_name="Ana", last_name=None,
+    profile_picture_url=None, email_verified=True,
+)
+
+
+@pytest.fixture
+def session_user(monkeypatch):
+    """Every session cookie authenticates as WORKOS_USER; the sync cache starts empty."""
+    async def authenticate_session(cookie):
+        return WORKOS_USER, None
+
+    monkeypatch.setattr(dependencies.auth_backend, "authenticate_session", authenticate_session)
+    monkeypatch.setattr(dependencies, "_synced_users", {})
+
+
+def current_user(db):
+    request = SimpleNamespace(cookies={SESSION_COOKIE: "session"}, state=SimpleNamespace())
+    return asyncio.run(dependencies.get_current_user(request, db))
+
+
+def test_user_upserted_once_then_cached(db, session_user):
+    assert current_user(db)["id"] == "user_01"
+    assert db.get(User, "user_01").email == "ana@example.com"
+    assert "user_01" in dependencies._synced_users
+
+    db.get(User, "user_01").email = "old@example.com"
+    db.commit()
+    current_user(db)
+    db.expire_all()
+    assert db.get(User, "user_01").email == "old@example.com"  # Cached: no write
+
+    dependencies._synced_users["user_01"] -= dependencies._SYNCED_USERS_TTL_SECONDS
+    current_user(db)
+    db.expire_all()
+    assert db.get(User, "user_01").email == "ana@example.com"  # Expired: synced again
+
+
+def test_failed_commit_is_not_cached(db, session_user, monkeypatch):
+    failing = SessionLocal()
+
+    def commit():
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(failing, "commit", commit)
+    try:
+        assert current_user(failing) is None
+        failing.rollback()
+    finally:
+        failing.close()
+
+    assert dependencies._synced_users == {}
+    assert db.get(User, "user_01") is None
+
+    # The next request syncs the user again
+    assert current_user(db)["id"] == "user_01"
+    assert db.get(User, "user_01") is not None
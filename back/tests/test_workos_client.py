@@ -0,0 +1,58 @@
+"""
+PooledAsyncWorkOSClient replaces the SDK's private HTTP client, so these
+tests run it against a local stand-in server: a workos release that changes
+those internals fails here instead of in production.
+"""
+import asyncio
+
+import httpx
+
+from app.config import settings
+from app.services.auth import PooledAsyncWorkOSClient
+
+
+def make_client(base_url: str) -> PooledAsyncWorkOSClient:
+    return PooledAsyncWorkOSClient(
+        api_key="sk_test_standin",
+        client_id="client_standin",
+        base_url=base_url,
+        request_timeout=5,
+        transport=httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=4, max_keepalive_connections=4)),
+    )
+
+
+def test_authenticate_with_code_through_pooled_client(workos_standin):
+    async def run():
+        client = make_client(workos_standin.base_url)
+        try:
+            return await client.user_management.authenticate_with_code(
+                code="code_123",
+                session={"seal_session": True, "cookie_password": settings.workos_cookie_password},
+            )
+        finally:
+            await client.close()
+
+    response = asyncio.run(run())
+    assert response.user.id == "user_01"
+    assert response.sealed_session
+
+    method, path, headers, body = workos_standin.requests[-1]
+    assert (method, path) == ("POST", "/user_management/authenticate")
+    # Credentials read from the SDK's private attributes must still reach the API
+    assert headers["Authorization"] == "Bearer sk_test_standin"
+    assert body["client_id"] == "client_standin"
+    assert body["code"] == "code_123"
+
+
+def test_requests_reuse_keep_alive_connections(workos_standin):
+    async def run():
+        client = make_client(workos_standin.base_url)
+        try:
+            for _ in range(5):
+                await client.user_management.authenticate_with_refresh_token(refresh_token="rt_1")
+        finally:
+            await client.close()
+
+    asyncio.run(run())
+    assert workos_standin.calls("/user_management/authenticate") == 5
+    assert len(workos_standin.client_ports) == 1  # Sequential calls share one pooled connection
@@ -0,0 +1,89 @@
+"""
+Local stand-in for the parts of the WorkOS API the backend calls:
+code/refresh-token authentication and the JWKS endpoint. Serves over real
+HTTP on 127.0.0.1 so the SDK's HTTP client and our transport are exercised
+end to end. Tokens are signed with a locally generated RSA key pair.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+USER = {
+    "object": "user", "id": "user_01", "email": "user@example.com", "first_name": "Ana",
+    "last_name": "Pérez", "email_verified": True, "profile_picture_url": None,
+    "created_at": "2024-01-01T00:00:00Z", "updated_at": "2024-01-01T00:00:00Z",
+}
+
+
+class WorkOSStandIn:
+    def __init__(self):
+        self.rotate("key_1")
+        self.requests = []  # (method, path, headers, json body)
+        self.client_ports = set()  # One per TCP connection the client opened
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body=None):
+                data = json.dumps(body).encode() if body is not None else b""
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _record(self, body=None):
+                standin.client_ports.add(self.client_address[1])
+                standin.requests.append((self.command, self.path, dict(self.headers), body))
+
+            def do_GET(self):
+                self._record()
+                if self.path.startswith("/sso/jwks/"):
+                    return self._reply(200, {"keys": [standin.jwk()]})
+                self._reply(404, {"message": "Not found"})
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("content-length", 0))) or b"{}")
+                self._record(body)
+                if self.path.startswith("/user_management/authenticate"):
+                    return self._reply(200, {
+                        "user": USER, "organization_id": None,
+                        "access_token": standin.token(), "refresh_token": f"rt_{len(standin.requests)}",
+                        "authentication_method": "Password", "impersonator": None,
+                    })
+                self._reply(404, {"message": "Not found"})
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self._server.server_port}/"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def rotate(self, kid: str):
+        """Start signing with a new key pair; the JWKS endpoint serves only the new key."""
+        self.kid = kid
+        self.key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    def jwk(self) -> dict:
+        jwk = json.loads(RSAAlgorithm.to_jwk(self.key.public_key()))
+        jwk.update(kid=self.kid, alg="RS256", use="sig")
+        return jwk
+
+    def token(self, expires_in: int = 300, **claims) -> str:
+        now = int(time.time())
+        payload = {"sid": "session_01", "sub": USER["id"], "iat": now, "exp": now + expires_in, **claims}
+        return jwt.encode(payload, self.key, algorithm="RS256", headers={"kid": self.kid})
+
+    def calls(self, path_prefix: str) -> int:
+        return sum(1 for _, path, _, _ in self.requests if path.startswith(path_prefix))
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()